@@ -1,53 +1,94 @@
 # -*- mode: python ; coding: utf-8 -*-
-
-block_cipher = None
+# Generado por build.py (modo onedir); los cambios se pierden al reconstruir
 
 a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[],
-    datas=[
-        ('test_pdf.py', '.'),
-    ],
+    datas=[],
     hiddenimports=[
+        'test_pdf',
+        'balance_batch',
+        'exporters',
+        'result_cache',
+        'log_setup',
+        'instrumentation',
+        'text_backends',
+        'memory_guard',
+        'account_tree',
         'pandas',
         'pdfplumber',
         'xlsxwriter',
-        'openpyxl',
         'tkinter',
         'tkinter.ttk',
         'tkinter.filedialog',
         'tkinter.messagebox',
         'threading',
         'logging',
-        're'
+        're',
+        'fitz',
+        'pymupdf'
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
+    # Manifiesto: build_excludes.txt
+    excludes=[
+        'matplotlib',
+        'scipy',
+        'IPython',
+        'jinja2',
+        'openpyxl',
+        'sqlalchemy',
+        'tables',
+        'pytest',
+        'pandas.tests',
+        'numpy.tests',
+        'numpy.f2py',
+        'numpy.distutils',
+        'tkinter.test',
+        'lib2to3',
+        'pydoc_data',
+        'pdfplumber.display',
+        'pypdfium2',
+        'PIL.ImageTk',
+        'PIL._imagingtk',
+        'PIL.ImageQt',
+        'PIL.ImageShow',
+        'PIL.ImageGrab',
+        'PIL.ImageCms',
+        'PIL._imagingcms',
+        'PIL.ImageFont',
+        'PIL._imagingft',
+        'PIL.AvifImagePlugin',
+        'PIL._avif',
+        'PIL.WebPImagePlugin',
+        'PIL._webp',
+        'PIL.Jpeg2KImagePlugin',
+        'PIL.EpsImagePlugin',
+        'PIL.FpxImagePlugin',
+        'PIL.MicImagePlugin',
+        'PIL.IcnsImagePlugin',
+        'PIL.SpiderImagePlugin',
+        'PIL.WmfImagePlugin',
+        'PIL.PSDraw'
+    ],
     noarchive=False,
 )
 
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+pyz = PYZ(a.pure)
 
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='ExtractorPDF',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,  # Sin ventana de consola
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -55,4 +96,14 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
     icon='assets/icon.ico' if os.path.exists('assets/icon.ico') else None,
-)
\ No newline at end of file
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='ExtractorPDF',
+)
@@ -0,0 +1,195 @@
+"""
+Índice jerárquico del plan de cuentas a partir de los códigos.
+
+En el balance el código de una subcuenta empieza con el de su cuenta padre
+(1 → 11 → 111 → 1117 → 111709 → 11170901 ...), aunque los niveles no siempre
+tienen la misma longitud. El padre de cada código es el prefijo propio más
+largo que también aparece en el documento:
+
+    tree = AccountTree(df['CODIGO'])
+    tree.parent('11170901')      # '111709'
+    tree.children('111709')      # ['11170901', '11170902', ...]
+    tree.subtree('1117')         # '1117' y todos sus descendientes
+    tree.with_prefix('11')       # todos los códigos que empiezan con '11'
+
+Se construye ordenando los códigos (O(n log n)) y recorriéndolos una vez con
+una pila de ancestros. En el orden lexicográfico los descendientes de una
+cuenta quedan contiguos justo después de ella, así que las consultas por
+prefijo o subárbol son dos búsquedas binarias.
+
+rollup_mismatches() comprueba que los cuatro montos de cada cuenta padre sean
+la suma de los de sus hijas directas. En céntimos la comparación es exacta, y
+un descuadre casi siempre es una línea mal leída (montos corridos o pegados)
+en la cuenta padre o en alguna de sus hijas.
+
+RollupChecker hace la misma comprobación fila a fila, para la exportación en
+streaming: el balance lista cada rama completa y seguida, así que basta una
+pila con las cuentas de la rama actual y la suma de sus hijas hasta el
+momento, sin guardar las filas.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Sequence, Tuple
+
+# Mayor que cualquier carácter de un código: prefix + _PREFIX_END acota el
+# final del rango de códigos que empiezan con prefix
+_PREFIX_END = '\uffff'
+
+
+class AccountTree:
+    """Códigos de cuenta ordenados con el índice de su cuenta padre (-1 en las raíces)"""
+
+    def __init__(self, codes: Iterable[str]):
+        self.codes: List[str] = sorted({str(code) for code in codes})
+        self._positions = {code: i for i, code in enumerate(self.codes)}
+        self.parents: List[int] = [-1] * len(self.codes)
+
+        # La pila guarda la cadena de ancestros del código actual: al pasar a
+        # otra rama se desapilan los que ya no son prefijo
+        stack: List[int] = []
+        for i, code in enumerate(self.codes):
+            while stack and not code.startswith(self.codes[stack[-1]]):
+                stack.pop()
+            if stack:
+                self.parents[i] = stack[-1]
+            stack.append(i)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._positions
+
+    def parent(self, code: str) -> Optional[str]:
+        """Cuenta padre de code, o None si es raíz"""
+        index = self.parents[self._positions[code]]
+        return self.codes[index] if index >= 0 else None
+
+    def children(self, code: str) -> List[str]:
+        """Subcuentas directas de code, en orden"""
+        index = self._positions[code]
+        _, end = self.prefix_range(code)
+        return [self.codes[i] for i in range(index + 1, end) if self.parents[i] == index]
+
+    def roots(self) -> List[str]:
+        """Cuentas sin padre en el documento"""
+        return [code for code, parent in zip(self.codes, self.parents) if parent < 0]
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Rango [inicio, fin) de self.codes con los códigos que empiezan con prefix"""
+        return (bisect_left(self.codes, prefix),
+                bisect_left(self.codes, prefix + _PREFIX_END))
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        start, end = self.prefix_range(prefix)
+        return self.codes[start:end]
+
+    def subtree(self, code: str) -> List[str]:
+        """code y todos sus descendientes"""
+        if code not in self._positions:
+            raise KeyError(code)
+        # Todo código que empieza con code desciende de él
+        return self.with_prefix(code)
+
+    def rollup_mismatches(self, codes: Sequence[str], amounts) -> List[str]:
+        """
+        Cuentas padre cuyos montos no son la suma de los de sus hijas directas
+
+        codes y amounts (matriz n x columnas de céntimos enteros) van fila a
+        fila; se reordenan al orden del índice. Cada código debe aparecer una
+        sola vez.
+        """
+        import numpy as np
+
+        if not self.codes:
+            return []
+        amounts = np.asarray(amounts, dtype=np.int64)
+        if amounts.ndim == 1:
+            amounts = amounts[:, np.newaxis]
+        aligned = np.zeros((len(self.codes), amounts.shape[1]), dtype=np.int64)
+        aligned[[self._positions[str(code)] for code in codes]] = amounts
+
+        parents = np.asarray(self.parents, dtype=np.intp)
+        is_child = parents >= 0
+        child_sums = np.zeros_like(aligned)
+        np.add.at(child_sums, parents[is_child], aligned[is_child])
+        has_children = np.bincount(parents[is_child], minlength=len(self.codes)) > 0
+
+        mismatched = has_children & (child_sums != aligned).any(axis=1)
+        return [self.codes[i] for i in np.flatnonzero(mismatched)]
+
+
+class _RollupNode:
+    """Cuenta vista por RollupChecker y la suma de sus hijas directas hasta ahora"""
+
+    __slots__ = ('code', 'amounts', 'child_sums', 'children', 'parent')
+
+    def __init__(self, code: str, amounts: Sequence[int]):
+        self.code = code
+        self.amounts = list(amounts)
+        self.child_sums = [0] * len(self.amounts)
+        self.children = 0
+        self.parent: Optional['_RollupNode'] = None
+
+    def attach(self, child: '_RollupNode', sign: int = 1):
+        for i, value in enumerate(child.amounts):
+            self.child_sums[i] += sign * value
+        self.children += sign
+        child.parent = self if sign > 0 else None
+
+
+class RollupChecker:
+    """
+    Versión incremental de AccountTree.rollup_mismatches para filas que llegan
+    en el orden del balance
+
+    Cada rama llega completa y seguida, pero el total de una cuenta puede
+    venir antes de sus subcuentas o después (los totales de grupo y de clase
+    van al final de su rama). Se guardan la rama abierta y las ramas ya
+    terminadas que todavía pueden recibir un padre: una cuenta que llega
+    después de sus subcuentas las adopta y se las quita al ancestro más corto
+    al que se habían sumado.
+
+    Una rama terminada deja de esperar cuando se cierra su padre o, si no lo
+    tiene, cuando el balance pasa a otra clase (otro primer dígito). La
+    memoria depende del ancho de la rama actual, no del total de filas.
+    """
+
+    def __init__(self):
+        self.mismatches: List[str] = []
+        self._open: List[_RollupNode] = []
+        self._waiting: Deque[_RollupNode] = deque()
+
+    def add(self, code: str, amounts: Sequence[int]):
+        node = _RollupNode(code, amounts)
+        while self._open and not code.startswith(self._open[-1].code):
+            self._close(self._open.pop())
+
+        # Subcuentas listadas antes que esta cuenta: son las últimas en espera
+        while self._waiting and self._waiting[-1].code.startswith(code):
+            child = self._waiting.pop()
+            if child.parent is not None:
+                child.parent.attach(child, sign=-1)
+            node.attach(child)
+        while self._waiting and self._waiting[0].code[:1] != code[:1]:
+            self._waiting.popleft()
+
+        if self._open:
+            self._open[-1].attach(node)
+        self._open.append(node)
+
+    def _close(self, node: _RollupNode):
+        # Sus hijas ya no pueden cambiar de padre; ella sí, hasta que se cierre el suyo
+        while self._waiting and self._waiting[-1].parent is node:
+            self._waiting.pop()
+        self._waiting.append(node)
+        if node.children and node.amounts != node.child_sums:
+            self.mismatches.append(node.code)
+
+    def finish(self) -> List[str]:
+        """Cierra las cuentas abiertas y devuelve los descuadres ordenados"""
+        while self._open:
+            self._close(self._open.pop())
+        self._waiting.clear()
+        return sorted(self.mismatches)
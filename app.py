@@ -1,26 +1,74 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-import threading
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+import time
 import os
-import pdfplumber
-from test_pdf import BalanceExtractorEnhanced  # Importamos tu algoritmo
+from balance_batch import claim_output_name, expand_inputs, process_document
+from test_pdf import probe_report_date, report_filename, warm_up_dependencies
+from exporters import OUTPUT_FORMATS, output_extension
+from result_cache import default_cache_dir
+from log_setup import setup_logging, setup_worker_logging
+
+# Cada cuánto el hilo de Tk vacía la cola de eventos del procesamiento (ms)
+EVENT_POLL_MS = 100
+
+# Estados de un trabajo de la cola y su texto en la tabla
+JOB_STATUS_LABELS = {
+    'pending': '⏳ Pendiente',
+    'queued': '🕒 En cola',
+    'running': '⚙️ Procesando',
+    'cancelling': '⏹ Cancelando...',
+    'cancelled': '⏹ Cancelado',
+    'done': '✅ Listo',
+    'error': '❌ Error',
+}
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+FINISHED_STATUSES = ('cancelled', 'done', 'error')
 
 class PDFToExcelApp:
     def __init__(self, root):
         self.root = root
         self.root.title("🏦 Extractor PDF a Excel - Balance de Comprobación")
-        self.root.geometry("700x650")
+        self.root.geometry("820x780")
         self.root.resizable(True, True)
         
         # Configurar tema oscuro
         self.setup_dark_theme()
         
         # Variables
-        self.selected_file = tk.StringVar()
-        self.output_file = tk.StringVar()
+        self.output_dir = tk.StringVar()
+        self.output_format = tk.StringVar(value="xlsx")
+        self.max_jobs = tk.IntVar(value=min(2, os.cpu_count() or 1))
         self.progress_var = tk.DoubleVar()
-        self.status_var = tk.StringVar(value="✨ Listo para procesar...")
+        self.status_var = tk.StringVar(value="✨ Agrega archivos PDF a la cola...")
+        
+        # Cola de trabajos: un PDF por trabajo, con su estado y su salida.
+        # La clave es el id de la fila en la tabla; el dict conserva el orden
+        self.jobs = {}
+        self._next_job = 1
+        
+        # Los procesos no tocan los widgets: publican eventos en colas que el
+        # hilo de Tk vacía por lotes (ver _drain_events). events recibe los
+        # trabajos terminados; _worker_events (de un Manager), el avance por página
+        self.events = queue.SimpleQueue()
+        self._executor = None
+        self._manager = None
+        self._worker_events = None
+        self._processing = False
+        self._run_jobs = []  # trabajos de la corrida actual, para el progreso total
+        self._run_started = None
+        self._claimed_names = set()  # nombres de salida ya usados en la corrida
+        # Sondeo de la fecha de cada PDF agregado (solo la franja del título de
+        # la primera página), en un hilo para no congelar la ventana
+        self._probe_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_probes = 0
+        self._draining = False
         
         # Crear la interfaz
         self.create_widgets()
@@ -30,6 +78,10 @@ class PDFToExcelApp:
         
         # Aplicar efectos hover
         self.setup_hover_effects()
+        
+        # Con la ventana ya dibujada, importar pandas, pdfplumber, etc. en el
+        # hilo de los sondeos: el primer sondeo espera a que termine
+        self.root.after_idle(lambda: self._probe_executor.submit(warm_up_dependencies))
     
     def setup_dark_theme(self):
         """Configurar tema oscuro moderno"""
@@ -146,6 +198,23 @@ class PDFToExcelApp:
                            lightcolor=self.colors['accent_blue'],
                            darkcolor=self.colors['accent_blue'])
         
+        # Tabla de la cola de trabajos
+        self.style.configure('Modern.Treeview',
+                           background=self.colors['bg_secondary'],
+                           fieldbackground=self.colors['bg_secondary'],
+                           foreground=self.colors['fg_primary'],
+                           bordercolor=self.colors['border'],
+                           rowheight=22,
+                           font=('Segoe UI', 9))
+        
+        self.style.configure('Modern.Treeview.Heading',
+                           background=self.colors['bg_accent'],
+                           foreground=self.colors['fg_primary'],
+                           font=('Segoe UI', 9, 'bold'))
+        
+        self.style.map('Modern.Treeview',
+                      background=[('selected', self.colors['accent_blue'])])
+        
         # Separadores
         self.style.configure('Modern.TSeparator',
                            background=self.colors['border'])
@@ -192,51 +261,109 @@ class PDFToExcelApp:
         separator1 = ttk.Separator(main_frame, orient='horizontal', style='Modern.TSeparator')
         separator1.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 20))
         
-        # Sección de selección de archivo
-        file_frame = ttk.LabelFrame(main_frame, text="📄 Seleccionar Archivo PDF", 
+        # Sección de la cola de archivos
+        file_frame = ttk.LabelFrame(main_frame, text="📄 Archivos PDF", 
                                   padding="15", style='Modern.TLabelframe')
-        file_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 20))
-        file_frame.columnconfigure(1, weight=1)
+        file_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 20))
+        file_frame.columnconfigure(0, weight=1)
+        file_frame.rowconfigure(1, weight=1)
+        main_frame.rowconfigure(2, weight=1)
         
-        ttk.Label(file_frame, text="Archivo:", style='Modern.TLabel').grid(
-            row=0, column=0, sticky=tk.W, padx=(0, 15))
-        
-        self.file_entry = ttk.Entry(file_frame, textvariable=self.selected_file, 
-                                  state="readonly", style='Modern.TEntry')
-        self.file_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 15))
+        file_buttons = ttk.Frame(file_frame, style='Modern.TFrame')
+        file_buttons.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
         
         self.browse_button = ttk.Button(
-            file_frame, 
-            text="📁 Examinar", 
+            file_buttons, 
+            text="📁 Agregar PDFs", 
             command=self.browse_file,
             style='Secondary.TButton'
         )
-        self.browse_button.grid(row=0, column=2)
+        self.browse_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.folder_button = ttk.Button(
+            file_buttons,
+            text="📂 Agregar carpeta",
+            command=self.browse_folder,
+            style='Secondary.TButton'
+        )
+        self.folder_button.pack(side=tk.LEFT, padx=(0, 10))
         
-        # Información del archivo
+        self.remove_button = ttk.Button(
+            file_buttons,
+            text="➖ Quitar",
+            command=self.remove_selected_jobs,
+            style='Secondary.TButton'
+        )
+        self.remove_button.pack(side=tk.LEFT)
+        
+        # Un trabajo por fila, con su estado, avance y archivo de salida
+        self.jobs_tree = ttk.Treeview(
+            file_frame,
+            columns=('archivo', 'estado', 'progreso', 'salida'),
+            show='headings',
+            height=7,
+            style='Modern.Treeview'
+        )
+        for column, heading, width in (('archivo', 'Archivo', 220), ('estado', 'Estado', 120),
+                                       ('progreso', 'Páginas', 90), ('salida', 'Salida', 260)):
+            self.jobs_tree.heading(column, text=heading, anchor=tk.W)
+            self.jobs_tree.column(column, width=width, anchor=tk.W, stretch=(column in ('archivo', 'salida')))
+        
+        jobs_scrollbar = ttk.Scrollbar(file_frame, orient=tk.VERTICAL, command=self.jobs_tree.yview)
+        self.jobs_tree.configure(yscrollcommand=jobs_scrollbar.set)
+        self.jobs_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        jobs_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        
+        # Resumen de la cola
         self.file_info_label = ttk.Label(file_frame, text="", style='Info.TLabel')
-        self.file_info_label.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
+        self.file_info_label.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
         
-        # Sección de archivo de salida
-        output_frame = ttk.LabelFrame(main_frame, text="💾 Archivo de Salida", 
+        # Sección de salida
+        output_frame = ttk.LabelFrame(main_frame, text="💾 Salida", 
                                     padding="15", style='Modern.TLabelframe')
         output_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 20))
         output_frame.columnconfigure(1, weight=1)
         
-        ttk.Label(output_frame, text="Guardar como:", style='Modern.TLabel').grid(
+        ttk.Label(output_frame, text="Carpeta:", style='Modern.TLabel').grid(
             row=0, column=0, sticky=tk.W, padx=(0, 15))
         
-        self.output_entry = ttk.Entry(output_frame, textvariable=self.output_file, 
+        self.output_entry = ttk.Entry(output_frame, textvariable=self.output_dir, 
                                     style='Modern.TEntry')
-        self.output_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 15))
+        self.output_entry.grid(row=0, column=1, columnspan=3, sticky=(tk.W, tk.E), padx=(0, 15))
         
         self.output_browse_button = ttk.Button(
             output_frame, 
             text="📁 Guardar en", 
-            command=self.browse_output_file,
+            command=self.browse_output_dir,
             style='Secondary.TButton'
         )
-        self.output_browse_button.grid(row=0, column=2)
+        self.output_browse_button.grid(row=0, column=4)
+        
+        ttk.Label(output_frame, text="Formato:", style='Modern.TLabel').grid(
+            row=1, column=0, sticky=tk.W, padx=(0, 15), pady=(10, 0))
+        
+        self.format_combo = ttk.Combobox(
+            output_frame,
+            textvariable=self.output_format,
+            values=OUTPUT_FORMATS,
+            state="readonly",
+            width=10
+        )
+        self.format_combo.grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
+        
+        # Cantidad de PDFs procesados a la vez (un proceso por archivo)
+        ttk.Label(output_frame, text="Simultáneos:", style='Modern.TLabel').grid(
+            row=1, column=2, sticky=tk.E, padx=(15, 10), pady=(10, 0))
+        
+        self.jobs_spinbox = ttk.Spinbox(
+            output_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.max_jobs,
+            state="readonly",
+            width=5
+        )
+        self.jobs_spinbox.grid(row=1, column=3, sticky=tk.W, pady=(10, 0))
         
         # Separador
         separator2 = ttk.Separator(main_frame, orient='horizontal', style='Modern.TSeparator')
@@ -248,12 +375,21 @@ class PDFToExcelApp:
         
         self.process_button = ttk.Button(
             button_frame,
-            text="Procesar PDF",
+            text="Procesar cola",
             command=self.process_file,
             style="Primary.TButton"
         )
         self.process_button.pack(side=tk.LEFT, padx=(0, 15))
         
+        # Cancela los trabajos seleccionados, o todos si no hay selección
+        self.cancel_button = ttk.Button(
+            button_frame,
+            text="⏹ Cancelar",
+            command=self.cancel_jobs,
+            style="Secondary.TButton"
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 15))
+        
         self.clear_button = ttk.Button(
             button_frame,
             text="🗑️ Limpiar",
@@ -292,7 +428,7 @@ class PDFToExcelApp:
         # Text widget con colores oscuros
         self.log_text = tk.Text(
             log_frame, 
-            height=10, 
+            height=8, 
             wrap=tk.WORD, 
             state=tk.DISABLED,
             font=("Consolas", 9),
@@ -335,7 +471,8 @@ class PDFToExcelApp:
                                          background=self.colors['accent_blue']))
         
         # Hover para botones secundarios
-        buttons = [self.browse_button, self.output_browse_button, self.clear_button]
+        buttons = [self.browse_button, self.folder_button, self.remove_button,
+                   self.output_browse_button, self.cancel_button, self.clear_button]
         for btn in buttons:
             btn.bind("<Enter>", 
                 lambda e: self.style.configure('Secondary.TButton', 
@@ -345,87 +482,138 @@ class PDFToExcelApp:
                                              background=self.colors['bg_secondary']))
     
     def browse_file(self):
-        """Abrir diálogo para seleccionar archivo PDF"""
+        """Abrir diálogo para agregar uno o varios archivos PDF a la cola"""
         filetypes = [
             ("Archivos PDF", "*.pdf"),
             ("Todos los archivos", "*.*")
         ]
         
-        filename = filedialog.askopenfilename(
-            title="Seleccionar archivo PDF",
+        filenames = filedialog.askopenfilenames(
+            title="Seleccionar archivos PDF",
             filetypes=filetypes
         )
         
-        if filename:
-            self.selected_file.set(filename)
-            self.update_file_info(filename)
-            self.auto_generate_output_name(filename)
-    
-    def browse_output_file(self):
-        """Abrir diálogo para seleccionar ubicación de salida"""
-        filename = filedialog.asksaveasfilename(
-            title="Guardar archivo Excel como",
-            defaultextension=".xlsx",
-            filetypes=[
-                ("Archivos Excel", "*.xlsx"),
-                ("Todos los archivos", "*.*")
-            ]
-        )
-        
-        if filename:
-            self.output_file.set(filename)
+        if filenames:
+            self.add_jobs(list(filenames))
+    
+    def browse_folder(self):
+        """Agregar a la cola todos los PDFs de una carpeta"""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con archivos PDF")
+        if folder:
+            pdf_paths = expand_inputs([folder])
+            if not pdf_paths:
+                messagebox.showwarning("Advertencia", f"No se encontraron archivos PDF en {folder}")
+                return
+            self.add_jobs(pdf_paths)
+    
+    def browse_output_dir(self):
+        """Abrir diálogo para seleccionar la carpeta de salida"""
+        folder = filedialog.askdirectory(title="Guardar los archivos de salida en")
+        if folder:
+            self.output_dir.set(folder)
+    
+    def add_jobs(self, pdf_paths):
+        """Agrega un trabajo por PDF, salvo los que ya esperan o se procesan"""
+        waiting = {os.path.normcase(os.path.abspath(job['pdf_path']))
+                   for job in self.jobs.values() if job['status'] not in FINISHED_STATUSES}
+        added = 0
+        for pdf_path in pdf_paths:
+            key = os.path.normcase(os.path.abspath(pdf_path))
+            if key in waiting:
+                continue
+            waiting.add(key)
+            job_id = f"job{self._next_job}"
+            self._next_job += 1
+            self.jobs[job_id] = {'pdf_path': pdf_path, 'status': 'pending', 'pages_done': 0,
+                                 'total_pages': 0, 'future': None, 'cancel_event': None,
+                                 'tmp_output': None, 'output_path': None, 'report_date': None}
+            self.jobs_tree.insert('', tk.END, iid=job_id,
+                                  values=(Path(pdf_path).name, JOB_STATUS_LABELS['pending'], '-', '🔍 ...'))
+            self._probe_date(job_id, pdf_path)
+            added += 1
+        
+        # La salida va por defecto junto al primer PDF
+        if added and not self.output_dir.get():
+            self.output_dir.set(str(Path(pdf_paths[0]).parent))
+        self.update_file_info()
     
-    def update_file_info(self, filepath):
-        """Actualizar información del archivo seleccionado"""
+    def _probe_date(self, job_id, pdf_path):
+        """Sondea la fecha del reporte en segundo plano; el resultado llega como evento"""
+        self._pending_probes += 1
+        future = self._probe_executor.submit(probe_report_date, pdf_path)
+        future.add_done_callback(lambda future: self.events.put(('date', job_id, future)))
+        self._schedule_drain()
+    
+    def remove_selected_jobs(self):
+        """Quitar de la cola los trabajos seleccionados que no estén en proceso"""
+        for job_id in self.jobs_tree.selection():
+            if self.jobs[job_id]['status'] not in ACTIVE_STATUSES:
+                del self.jobs[job_id]
+                self.jobs_tree.delete(job_id)
+        self.update_file_info()
+    
+    def update_file_info(self):
+        """Actualizar el resumen de la cola: archivos, pendientes y tamaño total"""
+        if not self.jobs:
+            self.file_info_label.config(text="")
+            return
         try:
-            file_path = Path(filepath)
-            file_size = file_path.stat().st_size / 1024 / 1024  # MB
-            self.file_info_label.config(
-                text=f"📏 Tamaño: {file_size:.2f} MB | 📁 {file_path.name}"
-            )
-        except Exception as e:
+            total_size = sum(Path(job['pdf_path']).stat().st_size for job in self.jobs.values()) / 1024 / 1024
+        except OSError as e:
             self.file_info_label.config(text=f"⚠️ Error al obtener información: {e}")
+            return
+        pending = sum(job['status'] == 'pending' for job in self.jobs.values())
+        self.file_info_label.config(
+            text=f"📏 {len(self.jobs)} archivos ({pending} pendientes) | {total_size:.2f} MB"
+        )
     
-    def auto_generate_output_name(self, input_file):
-        """Generar automáticamente el nombre del archivo de salida"""
-        input_path = Path(input_file)
-        
+    def _update_job_row(self, job_id):
+        job = self.jobs[job_id]
+        if job['total_pages']:
+            progress = f"{job['pages_done']}/{job['total_pages']}"
+        else:
+            progress = '-'
+        if job['output_path']:
+            output = Path(job['output_path']).name
+        elif job.get('error'):
+            output = job['error']
+        elif job['report_date']:
+            # Nombre previsto; el definitivo sale de la extracción completa
+            output = f"≈ {report_filename(job['report_date'], self.output_format.get())}"
+        else:
+            output = ''
+        self.jobs_tree.item(job_id, values=(Path(job['pdf_path']).name, JOB_STATUS_LABELS[job['status']],
+                                            progress, output))
+    
+    def _usable_cache_dir(self):
+        """Directorio de la caché de resultados, o None si no se puede usar"""
+        cache_dir = default_cache_dir()
         try:
-            from test_pdf import BalanceExtractorEnhanced
-            temp_extractor = BalanceExtractorEnhanced()
-            
-            with pdfplumber.open(input_file) as pdf:
-                temp_extractor.extracted_date = temp_extractor._extract_date_from_pdf(pdf)
-            
-            suggested_name = temp_extractor.get_excel_filename()
-            output_path = input_path.parent / suggested_name
-        
-        except Exception as e:
-            output_name = f"{input_path.stem}_balance_extraido.xlsx"
-            output_path = input_path.parent / output_name
-        self.output_file.set(str(output_path))
-
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            # Sin permisos para el directorio de caché: procesar sin caché
+            return None
+        return cache_dir
+    
     def validate_inputs(self):
         """Validar las entradas del usuario"""
-        if not self.selected_file.get():
-            messagebox.showerror("Error", "Por favor selecciona un archivo PDF")
+        pending = [job for job in self.jobs.values() if job['status'] == 'pending']
+        if not pending:
+            messagebox.showerror("Error", "Agrega al menos un archivo PDF pendiente a la cola")
             return False
         
-        if not Path(self.selected_file.get()).exists():
-            messagebox.showerror("Error", "El archivo seleccionado no existe")
-            return False
-        
-        if not self.selected_file.get().lower().endswith('.pdf'):
-            messagebox.showerror("Error", "El archivo debe ser un PDF")
-            return False
+        for job in pending:
+            if not Path(job['pdf_path']).exists():
+                messagebox.showerror("Error", f"El archivo no existe: {job['pdf_path']}")
+                return False
         
-        if not self.output_file.get():
-            messagebox.showerror("Error", "Por favor especifica un archivo de salida")
+        if not self.output_dir.get():
+            messagebox.showerror("Error", "Por favor especifica una carpeta de salida")
             return False
         
         # Verificar que el directorio de salida existe
-        output_dir = Path(self.output_file.get()).parent
-        if not output_dir.exists():
+        output_dir = Path(self.output_dir.get())
+        if not output_dir.is_dir():
             messagebox.showerror("Error", f"El directorio de salida no existe: {output_dir}")
             return False
         
@@ -460,7 +648,6 @@ class PDFToExcelApp:
         
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
-        self.root.update_idletasks()
     
     def clear_log(self):
         """Limpiar el área de log"""
@@ -473,91 +660,271 @@ class PDFToExcelApp:
         self.progress_var.set(value)
         if status:
             self.status_var.set(status)
-        self.root.update_idletasks()
     
     def process_file(self):
-        """Procesar el archivo PDF en un hilo separado"""
+        """Enviar los trabajos pendientes al pool de procesos"""
         if not self.validate_inputs():
             return
         
-        # Deshabilitar botón durante el procesamiento
-        self.process_button.config(state="disabled")
-        self.clear_log()
-        
-        # Ejecutar en hilo separado para no bloquear la UI
-        thread = threading.Thread(target=self._process_file_thread)
-        thread.daemon = True
-        thread.start()
+        # Las variables de Tk se leen aquí, en el hilo de la interfaz
+        output_dir = self.output_dir.get()
+        output_format = self.output_format.get()
+        extension = output_extension(output_format)
+        cache_dir = self._usable_cache_dir()
+        
+        if not self._processing:
+            # Corrida nueva: el pool se crea con la cantidad de simultáneos elegida
+            self.clear_log()
+            self._executor = ProcessPoolExecutor(max_workers=max(1, int(self.max_jobs.get())),
+                                                 initializer=setup_worker_logging,
+                                                 initargs=(logging.WARNING,))
+            if self._manager is None:
+                # Cola y eventos compartidos con los procesos del pool
+                self._manager = multiprocessing.Manager()
+                self._worker_events = self._manager.Queue()
+            self._run_jobs = []
+            self._run_started = time.perf_counter()
+            self._claimed_names = set()
+            self._processing = True
+            self._schedule_drain()
+        
+        pending = [job_id for job_id, job in self.jobs.items() if job['status'] == 'pending']
+        self.log_message(f"🚀 {len(pending)} archivos en cola...")
+        for job_id in pending:
+            job = self.jobs[job_id]
+            job['cancel_event'] = self._manager.Event()
+            job['output_dir'] = output_dir
+            job['tmp_output'] = os.path.join(output_dir, f".parcial-{os.getpid()}-{job_id}{extension}")
+            job['future'] = self._executor.submit(
+                process_document, job['pdf_path'], job['tmp_output'], output_format, 'pdfplumber',
+                cache_dir, 'text', job_id, self._worker_events, job['cancel_event'])
+            # El callback corre en un hilo del pool: solo publica el evento
+            job['future'].add_done_callback(lambda future, job_id=job_id: self.events.put(('finished', job_id, future)))
+            job['status'] = 'queued'
+            self._run_jobs.append(job_id)
+            self._update_job_row(job_id)
+        self.update_file_info()
+    
+    def cancel_jobs(self):
+        """Cancelar los trabajos seleccionados (o todos los activos si no hay selección)"""
+        # Sin selección, los pendientes (aún no enviados) siguen en la lista
+        # para la próxima conversión
+        job_ids = self.jobs_tree.selection() or [job_id for job_id, job in self.jobs.items()
+                                                 if job['status'] in ACTIVE_STATUSES]
+        for job_id in job_ids:
+            job = self.jobs[job_id]
+            if job['status'] == 'pending':
+                job['status'] = 'cancelled'
+            elif job['status'] in ('queued', 'running'):
+                # Un trabajo que aún no empezó se saca del pool; uno en curso se
+                # detiene al terminar la página actual
+                if job['future'].cancel():
+                    job['status'] = 'cancelled'
+                else:
+                    job['cancel_event'].set()
+                    job['status'] = 'cancelling'
+            else:
+                continue
+            self._update_job_row(job_id)
+        self.update_file_info()
+    
+    def _schedule_drain(self):
+        """Programa _drain_events si no está programado ya"""
+        if not self._draining:
+            self._draining = True
+            self.root.after(EVENT_POLL_MS, self._drain_events)
     
-    def _process_file_thread(self):
-        """Hilo para procesar el archivo"""
+    def _drain_events(self):
+        """
+        Aplica los eventos pendientes de los procesos y de los sondeos de fecha
+        
+        El avance por página de cada trabajo se acumula y la tabla y la barra
+        se actualizan una vez por lote, así que una ráfaga de páginas cuesta un
+        refresco.
+        """
+        touched = set()
+        while self._worker_events is not None:
+            try:
+                _, job_id, pages_done, total_pages, _ = self._worker_events.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                continue
+            job['pages_done'], job['total_pages'] = pages_done, total_pages
+            if job['status'] == 'queued':
+                job['status'] = 'running'
+            touched.add(job_id)
+        
+        while True:
+            try:
+                kind, job_id, future = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'date':
+                self._pending_probes -= 1
+                if job_id in self.jobs:
+                    self._apply_probe(job_id, future)
+            elif job_id in self.jobs:
+                # Un trabajo cancelado antes de empezar se puede quitar de la
+                # lista antes de que llegue su evento; no dejó salida
+                self._finish_job(job_id)
+            touched.add(job_id)
+        
+        for job_id in touched:
+            if job_id in self.jobs:
+                self._update_job_row(job_id)
+        
+        running = self._processing and any(self.jobs[job_id]['status'] in ACTIVE_STATUSES
+                                           for job_id in self._run_jobs if job_id in self.jobs)
+        if self._processing:
+            self._update_overall_progress()
+            if not running:
+                self._finish_run()
+        
+        if running or self._pending_probes:
+            self.root.after(EVENT_POLL_MS, self._drain_events)
+        else:
+            self._draining = False
+    
+    def _apply_probe(self, job_id, future):
+        """Guarda la fecha sondeada de un trabajo (None si el título no estaba en la franja)"""
+        job = self.jobs[job_id]
         try:
-            self.log_message("🚀 Iniciando procesamiento...")
-            self.update_progress(10, "⚡ Inicializando extractor...")
-            
-            # Crear instancia del extractor (tu algoritmo)
-            extractor = BalanceExtractorEnhanced()
-            
-            self.update_progress(20, "📖 Leyendo archivo PDF...")
-            self.log_message(f"📖 Procesando: {Path(self.selected_file.get()).name}")
-            
-            # Extraer datos usando tu algoritmo
-            data = extractor.extract_balance_data(self.selected_file.get())
-            
-            self.update_progress(70, "⚙️ Datos extraídos, generando Excel...")
-            
-            if not data:
-                raise Exception("No se encontraron datos válidos en el PDF")
-            
-            self.log_message(f"✅ Extraídos {len(data)} registros")
-            
-            # Guardar en Excel
-            self.update_progress(90, "💾 Guardando archivo Excel...")
-            extractor.save_to_excel(data, self.output_file.get())
-            
-            self.update_progress(100, "🎉 Proceso completado exitosamente")
-            self.log_message(f"💾 Archivo guardado: {Path(self.output_file.get()).name}")
-            self.log_message(f"📊 Total de cuentas procesadas: {len(data)}")
-            
-            # Mostrar mensaje de éxito
-            self.root.after(0, self._show_success_message)
-            
+            job['report_date'] = future.result()
         except Exception as e:
-            error_msg = f"❌ Error durante el procesamiento: {str(e)}"
-            self.log_message(error_msg)
-            self.update_progress(0, "❌ Error en el procesamiento")
-            
-            # Mostrar error en el hilo principal
-            self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
-        
-        finally:
-            # Rehabilitar botón en el hilo principal
-            self.root.after(0, lambda: self.process_button.config(state="normal"))
+            # Un PDF dañado se reporta al procesarlo; aquí solo se avisa
+            job['report_date'] = None
+            self.log_message(f"⚠️ {Path(job['pdf_path']).name}: no se pudo leer la primera página: {e}")
+            return
+        if job['report_date'] is None:
+            self.log_message(f"🔍 {Path(job['pdf_path']).name}: fecha no encontrada en el título, "
+                             f"se buscará al procesar")
+    
+    def _finish_job(self, job_id):
+        """Resultado de un trabajo terminado: renombra su salida o registra el error"""
+        job = self.jobs[job_id]
+        future = job['future']
+        name = Path(job['pdf_path']).name
+        if future.cancelled():
+            job['status'] = 'cancelled'
+            self.log_message(f"⏹ {name}: cancelado antes de empezar")
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}", 'cancelled': False}
+        
+        if result['cancelled']:
+            job['status'] = 'cancelled'
+            self.log_message(f"⏹ {name}: cancelado en la página {job['pages_done']}/{job['total_pages']}")
+        elif result['error'] is not None:
+            job['status'] = 'error'
+            job['error'] = result['error']
+            self.log_message(f"❌ {name}: {result['error']}")
+        else:
+            # Nombre según la fecha del reporte, sin pisar otro de la misma corrida
+            job['output_path'] = claim_output_name(result, job['output_dir'], self._claimed_names)
+            try:
+                os.replace(job['tmp_output'], job['output_path'])
+            except OSError as e:
+                job['status'] = 'error'
+                job['error'] = str(e)
+                job['output_path'] = None
+                self.log_message(f"❌ {name}: no se pudo guardar la salida: {e}")
+                return
+            job['status'] = 'done'
+            job['pages_done'] = job['total_pages'] = result['pages']
+            rate = result['pages'] / result['seconds'] if result['seconds'] > 0 else 0.0
+            self.log_message(f"✅ {name} → {Path(job['output_path']).name} "
+                             f"({result['rows']} filas, {result['pages']} págs, {rate:.1f} págs/s)")
+            if not result.get('balance_ok', True):
+                self.log_message(f"⚠️ {name}: validación de balance para revisar")
+        
+        if job['status'] != 'done' and job['tmp_output']:
+            try:
+                os.remove(job['tmp_output'])
+            except OSError:
+                pass
     
-    def _show_success_message(self):
-        """Mostrar mensaje de éxito y preguntar si abrir el archivo"""
+    def _update_overall_progress(self):
+        """Barra y estado según las páginas hechas de todos los trabajos de la corrida"""
+        jobs = [self.jobs[job_id] for job_id in self._run_jobs if job_id in self.jobs]
+        if not jobs:
+            return
+        fractions = []
+        for job in jobs:
+            if job['status'] in FINISHED_STATUSES:
+                fractions.append(1.0)
+            elif job['total_pages']:
+                fractions.append(job['pages_done'] / job['total_pages'])
+            else:
+                fractions.append(0.0)
+        fraction = sum(fractions) / len(fractions)
+        finished = sum(job['status'] in FINISHED_STATUSES for job in jobs)
+        
+        status = f"📖 {finished}/{len(jobs)} archivos"
+        elapsed = time.perf_counter() - self._run_started
+        pages = sum(job['pages_done'] for job in jobs)
+        if pages and elapsed > 0:
+            status += f" - {pages / elapsed:.1f} págs/s"
+            if 0 < fraction < 1:
+                status += f" - quedan ~{self._format_eta(elapsed * (1 - fraction) / fraction)}"
+        self.update_progress(fraction * 100, status)
+    
+    @staticmethod
+    def _format_eta(seconds):
+        seconds = int(round(seconds))
+        if seconds < 60:
+            return f"{seconds} s"
+        minutes, seconds = divmod(seconds, 60)
+        return f"{minutes} min {seconds:02d} s"
+    
+    def _finish_run(self):
+        """Cierra el pool y muestra el resumen de la corrida"""
+        self._processing = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
+        jobs = [self.jobs[job_id] for job_id in self._run_jobs if job_id in self.jobs]
+        counts = {status: sum(job['status'] == status for job in jobs) for status in FINISHED_STATUSES}
+        elapsed = time.perf_counter() - self._run_started
+        self.update_progress(100 if jobs else 0,
+                             f"🎉 {counts['done']} listos, {counts['error']} con error, "
+                             f"{counts['cancelled']} cancelados en {elapsed:.1f} s")
+        self.log_message(f"📊 Corrida terminada: {counts['done']} listos, {counts['error']} con error, "
+                         f"{counts['cancelled']} cancelados")
+        self.update_file_info()
+        
+        if counts['done']:
+            self._show_success_message(counts['done'])
+    
+    def _show_success_message(self, done_count):
+        """Mostrar mensaje de éxito y preguntar si abrir la carpeta de salida"""
+        output_dir = self.output_dir.get()
         result = messagebox.askyesno(
             "🎉 Proceso Completado",
-            f"El archivo Excel se ha generado exitosamente.\n\n"
-            f"📁 Ubicación: {self.output_file.get()}\n\n"
-            f"¿Deseas abrir el archivo ahora?"
+            f"Se generaron {done_count} archivos de salida.\n\n"
+            f"📁 Ubicación: {output_dir}\n\n"
+            f"¿Deseas abrir la carpeta ahora?"
         )
         
         if result:
-            self.open_output_file()
+            self.open_output_file(output_dir)
     
-    def open_output_file(self):
-        """Abrir el archivo de salida con la aplicación predeterminada"""
+    def open_output_file(self, path):
+        """Abrir un archivo o carpeta con la aplicación predeterminada"""
         try:
             import subprocess
             import sys
             
             if sys.platform == "win32":
-                os.startfile(self.output_file.get())
+                os.startfile(path)
             elif sys.platform == "darwin":  # macOS
-                subprocess.run(["open", self.output_file.get()])
+                subprocess.run(["open", path])
             else:  # Linux
-                subprocess.run(["xdg-open", self.output_file.get()])
+                subprocess.run(["xdg-open", path])
                 
         except Exception as e:
             messagebox.showwarning(
@@ -566,17 +933,74 @@ class PDFToExcelApp:
             )
     
     def clear_form(self):
-        """Limpiar el formulario"""
-        self.selected_file.set("")
-        self.output_file.set("")
-        self.file_info_label.config(text="")
-        self.update_progress(0, "✨ Listo para procesar...")
+        """Limpiar la cola y el formulario (no mientras se procesa)"""
+        if self._processing:
+            messagebox.showwarning("Advertencia", "Cancela o espera a que termine la cola antes de limpiar")
+            return
+        self.jobs.clear()
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        self.output_dir.set("")
+        self.update_file_info()
+        self.update_progress(0, "✨ Agrega archivos PDF a la cola...")
         self.clear_log()
+    
+    def on_close(self):
+        """Al cerrar la ventana se cancelan los trabajos en curso"""
+        if self._processing:
+            if not messagebox.askyesno("Salir", "Hay archivos en proceso. ¿Cancelarlos y salir?"):
+                return
+            for job in self.jobs.values():
+                if job['status'] in ACTIVE_STATUSES:
+                    job['cancel_event'].set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            for job in self.jobs.values():
+                if job['status'] != 'done' and job['tmp_output']:
+                    try:
+                        os.remove(job['tmp_output'])
+                    except OSError:
+                        pass
+        if self._manager is not None:
+            self._manager.shutdown()
+        self._probe_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+def startup_check(report_path, pdf_path=None):
+    """
+    Arranque sin ventana para verificar un ejecutable construido (build.py)
+    
+    Importa las dependencias como el warm-up de la GUI, lee opcionalmente la
+    primera página de un PDF y escribe en report_path un JSON con los tiempos
+    y los módulos cargados. Escribe a un archivo porque el ejecutable no
+    tiene consola.
+    """
+    start = time.perf_counter()
+    warm_up_dependencies()
+    report = {'frozen': getattr(sys, 'frozen', False), 'warm_up': time.perf_counter() - start}
+    
+    if pdf_path:
+        from text_backends import open_document
+        page_start = time.perf_counter()
+        report['report_date'] = probe_report_date(pdf_path)
+        with open_document(pdf_path, 'pdfplumber') as pdf:
+            report['first_page_chars'] = len(pdf.page_text(0) or '')
+        report['first_page'] = time.perf_counter() - page_start
+    
+    report['modules'] = sorted(sys.modules)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
 
 def main():
     """Función principal"""
+    # app.py --comprobar-arranque REPORTE.json [PDF]: verificación sin ventana
+    if len(sys.argv) >= 3 and sys.argv[1] == '--comprobar-arranque':
+        startup_check(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        return
+    
+    # Los logs se escriben desde un hilo aparte, no desde el de la extracción
+    setup_logging()
     root = tk.Tk()
     app = PDFToExcelApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     
     # Configurar el icono si existe
     try:
@@ -590,4 +1014,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos en el ejecutable congelado (PyInstaller)
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""
+Procesamiento por lotes de balances de comprobación, sin interfaz gráfica.
+
+Recibe archivos, patrones glob o carpetas, reparte los documentos entre un
+pool de procesos (un documento por proceso a la vez) y nombra cada salida
+con get_excel_filename() según la fecha del reporte. Al terminar muestra el
+rendimiento por archivo y el total del lote.
+
+Uso:
+    python balance_batch.py ENTRADA [ENTRADA ...] [-o CARPETA] [-j PROCESOS]
+                            [--formato xlsx|csv|jsonl|parquet] [--motor pdfplumber|pymupdf]
+                            [--modo text|words] [--cache DIR] [--recursivo] [--max-memoria MB]
+
+Ejemplos:
+    python balance_batch.py balances/ -o salida/ -j 8
+    python balance_batch.py "2025-09/*.pdf" --formato parquet --cache ~/.cache/extractor_pdf
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from exporters import OUTPUT_FORMATS, output_extension
+from log_setup import setup_logging, setup_worker_logging
+from test_pdf import LAYOUTS, BalanceExtractorEnhanced, ExtractionCancelled
+from text_backends import BACKENDS, open_document
+
+
+def expand_inputs(inputs: List[str], recursive: bool = False) -> List[str]:
+    """
+    Lista de PDFs a partir de archivos, patrones glob y carpetas, sin repetidos
+    y en el orden en que se indicaron
+    """
+    pdf_paths = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            pdf_paths.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            matches = glob.glob(pattern, recursive=recursive)
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        for path in sorted(matches):
+            if path is item or (path.lower().endswith('.pdf') and os.path.isfile(path)):
+                add(path)
+
+    return pdf_paths
+
+
+def process_document(pdf_path: str, tmp_output: str, fmt: str, backend: str,
+                     cache_dir: Optional[str], layout: str = 'text', job_id: Any = None,
+                     events=None, cancel_event=None, max_rss_mb: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Trabajo de un proceso del pool: extrae un PDF y lo exporta a tmp_output
+
+    Devuelve el nombre de salida sugerido por get_excel_filename() para que el
+    proceso principal lo asigne sin choques entre documentos de la misma fecha.
+
+    events: cola opcional (por ejemplo de un multiprocessing.Manager) donde se
+    publica ('pages', job_id, páginas_hechas, total, segundos) tras cada página.
+    cancel_event: evento opcional; si se activa, la extracción se detiene entre
+    páginas, tmp_output se borra y el resultado queda con cancelled=True.
+    max_rss_mb: límite de memoria del proceso (ver memory_guard.MemoryGuard).
+    """
+    result = {'pdf_path': pdf_path, 'pages': 0, 'rows': 0, 'seconds': 0.0,
+              'date': None, 'output_name': None, 'error': None, 'cancelled': False,
+              'peak_rss_mb': None}
+    start = time.perf_counter()
+
+    if events is not None:
+        def progress_callback(pages_done, total_pages):
+            events.put(('pages', job_id, pages_done, total_pages, time.perf_counter() - start))
+    else:
+        progress_callback = None
+
+    try:
+        with open_document(pdf_path, backend) as pdf:
+            result['pages'] = pdf.page_count
+
+        extractor = BalanceExtractorEnhanced(backend=backend, cache_dir=cache_dir, layout=layout,
+                                             progress_callback=progress_callback,
+                                             cancel_event=cancel_event, max_rss_mb=max_rss_mb)
+        # El resumen que imprimen los escritores se reemplaza por el del lote
+        with contextlib.redirect_stdout(io.StringIO()):
+            result['rows'] = extractor.export_rows(extractor.iter_balance_rows(pdf_path), tmp_output, fmt)
+
+        result['date'] = extractor.extracted_date
+        result['peak_rss_mb'] = extractor.peak_rss_mb
+        result['output_name'] = extractor.get_output_filename(fmt)
+        if result['rows'] and extractor.last_aggregates:
+            result['balance_ok'] = extractor.last_aggregates['balance_ok']
+            result['errores_jerarquia'] = extractor.last_aggregates['errores_jerarquia']
+        elif not result['rows']:
+            result['error'] = "No se encontraron datos válidos en el PDF"
+    except ExtractionCancelled:
+        result['error'] = "Cancelado"
+        result['cancelled'] = True
+        _remove_quietly(tmp_output)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def claim_output_name(result: Dict[str, Any], output_dir: str, claimed: set) -> str:
+    """
+    Ruta final de la salida; si otro PDF del lote ya usó el mismo nombre
+    (misma fecha de reporte) se agrega el nombre del PDF
+    """
+    name = result['output_name']
+    if name in claimed:
+        base, ext = os.path.splitext(name)
+        stem = os.path.splitext(os.path.basename(result['pdf_path']))[0]
+        name = f"{base}_{stem}{ext}"
+        counter = 2
+        while name in claimed:
+            name = f"{base}_{stem}_{counter}{ext}"
+            counter += 1
+    claimed.add(name)
+    return os.path.join(output_dir, name)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_batch(pdf_paths: List[str], output_dir: str, fmt: str = 'xlsx', jobs: int = 1,
+              backend: str = 'pdfplumber', cache_dir: Optional[str] = None,
+              layout: str = 'text', max_rss_mb: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Procesa los PDFs con hasta `jobs` procesos y devuelve un resultado por
+    archivo, en el orden de pdf_paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    ext = output_extension(fmt)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+    claimed = set()
+
+    # Los documentos más grandes primero, para que no quede uno largo al final
+    order = sorted(range(len(pdf_paths)), key=lambda i: -os.path.getsize(pdf_paths[i])
+                   if os.path.isfile(pdf_paths[i]) else 0)
+    tmp_outputs = [os.path.join(output_dir, f".parcial-{os.getpid()}-{i}{ext}") for i in range(len(pdf_paths))]
+
+    def finish(index, result):
+        results[index] = result
+        done = sum(r is not None for r in results)
+        status = '✅' if result['error'] is None else '❌'
+        detail = result['output_name'] if result['error'] is None else result['error']
+        print(f"{status} [{done}/{len(pdf_paths)}] {result['pdf_path']} → {detail} "
+              f"({result['seconds']:.2f} s)")
+
+    jobs = max(1, min(jobs, len(pdf_paths)))
+    try:
+        if jobs == 1:
+            for index in order:
+                finish(index, process_document(pdf_paths[index], tmp_outputs[index], fmt, backend,
+                                               cache_dir, layout, max_rss_mb=max_rss_mb))
+        else:
+            # Cada proceso escribe sus avisos directo a la consola
+            with ProcessPoolExecutor(max_workers=jobs, initializer=setup_worker_logging,
+                                     initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+                futures = {
+                    executor.submit(process_document, pdf_paths[index], tmp_outputs[index],
+                                    fmt, backend, cache_dir, layout, max_rss_mb=max_rss_mb): index
+                    for index in order
+                }
+                for future in as_completed(futures):
+                    finish(futures[future], future.result())
+
+        # Los nombres se asignan en el orden de entrada, así el resultado no
+        # depende de qué proceso terminó primero
+        for result, tmp_output in zip(results, tmp_outputs):
+            if result['error'] is None:
+                result['output_path'] = claim_output_name(result, output_dir, claimed)
+                os.replace(tmp_output, result['output_path'])
+    finally:
+        for tmp_output in tmp_outputs:
+            _remove_quietly(tmp_output)
+    return results
+
+
+def print_summary(results: List[Dict[str, Any]], wall_seconds: float, jobs: int):
+    """Rendimiento por archivo y total del lote"""
+    print("\n📊 RESUMEN DEL LOTE")
+    print("=" * 103)
+    print(f"{'Archivo':<40} {'Fecha':>10} {'Págs':>5} {'Filas':>7} {'Seg':>8} {'Págs/s':>8} {'Filas/s':>9} "
+          f"{'Mem MB':>7}")
+    print("-" * 103)
+    for r in results:
+        name = os.path.basename(r['pdf_path'])
+        if len(name) > 40:
+            name = name[:37] + '...'
+        if r['error'] is not None:
+            print(f"{name:<40} ❌ {r['error']}")
+            continue
+        pages_per_sec = r['pages'] / r['seconds'] if r['seconds'] > 0 else 0.0
+        rows_per_sec = r['rows'] / r['seconds'] if r['seconds'] > 0 else 0.0
+        balance = '' if r.get('balance_ok', True) else '  ⚠️ descuadre'
+        if r.get('errores_jerarquia'):
+            balance += f"  ⚠️ {r['errores_jerarquia']} padres ≠ subcuentas"
+        # Pico del proceso que lo extrajo (incluye los documentos anteriores del mismo proceso)
+        memory = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else '-'
+        print(f"{name:<40} {r['date'] or '-':>10} {r['pages']:>5} {r['rows']:>7} {r['seconds']:>8.2f} "
+              f"{pages_per_sec:>8.1f} {rows_per_sec:>9.1f} {memory:>7}{balance}")
+        print(f"{'':<3}→ {r['output_path']}")
+    print("-" * 103)
+
+    ok = [r for r in results if r['error'] is None]
+    total_pages = sum(r['pages'] for r in ok)
+    total_rows = sum(r['rows'] for r in ok)
+    busy_seconds = sum(r['seconds'] for r in results)
+    print(f"Archivos: {len(ok)} correctos, {len(results) - len(ok)} con error, {jobs} procesos")
+    print(f"Total: {total_pages} páginas, {total_rows} filas en {wall_seconds:.2f} s")
+    if wall_seconds > 0:
+        print(f"⚡ {total_pages / wall_seconds:.1f} páginas/s, {total_rows / wall_seconds:.1f} filas/s, "
+              f"{len(results) / wall_seconds:.2f} archivos/s "
+              f"(paralelismo efectivo {busy_seconds / wall_seconds:.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Extrae balances de comprobación de varios PDFs en paralelo")
+    parser.add_argument('entradas', nargs='+', metavar='ENTRADA',
+                        help="archivos PDF, patrones glob o carpetas")
+    parser.add_argument('-o', '--salida', default='.',
+                        help="carpeta de salida (por defecto la actual)")
+    parser.add_argument('-j', '--procesos', type=int, default=os.cpu_count() or 1,
+                        help="documentos procesados a la vez (por defecto, núcleos disponibles)")
+    parser.add_argument('-f', '--formato', choices=OUTPUT_FORMATS, default='xlsx',
+                        help="formato de salida (por defecto xlsx)")
+    parser.add_argument('-m', '--motor', choices=list(BACKENDS), default='pdfplumber',
+                        help="motor de texto (por defecto pdfplumber)")
+    parser.add_argument('--modo', choices=LAYOUTS, default='text',
+                        help="modo de extracción: text (regex) o words (montos por columna)")
+    parser.add_argument('--cache', metavar='DIR', default=None,
+                        help="directorio de la caché de resultados (por defecto sin caché)")
+    parser.add_argument('-r', '--recursivo', action='store_true',
+                        help="buscar PDFs también en las subcarpetas")
+    parser.add_argument('--max-memoria', type=float, metavar='MB', default=None,
+                        help="memoria máxima por proceso; un documento que la supere falla "
+                             "(por defecto sin límite)")
+    args = parser.parse_args(argv)
+
+    # En un lote solo interesan avisos y errores; el resumen lo imprime este script
+    setup_logging(logging.WARNING)
+
+    pdf_paths = expand_inputs(args.entradas, recursive=args.recursivo)
+    if not pdf_paths:
+        print("⚠️  No se encontraron archivos PDF en las entradas indicadas")
+        return 1
+
+    jobs = max(1, min(args.procesos, len(pdf_paths)))
+    print(f"🏦 EXTRACTOR POR LOTES - {len(pdf_paths)} archivos, {jobs} procesos")
+    print("=" * 55)
+
+    start = time.perf_counter()
+    results = run_batch(pdf_paths, args.salida, fmt=args.formato, jobs=jobs,
+                        backend=args.motor, cache_dir=args.cache, layout=args.modo,
+                        max_rss_mb=args.max_memoria)
+    print_summary(results, time.perf_counter() - start, jobs)
+
+    return 1 if any(r['error'] is not None for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Medición del tiempo de exportación a Excel: escritor con pandas frente a la
+exportación en streaming (xlsxwriter en modo constant_memory).
+
+Extrae las filas del PDF una sola vez y exporta con cada escritor, midiendo
+el tiempo de pared y el pico de memoria reservada por Python (tracemalloc).
+
+Uso:
+    python bench_export.py [ruta.pdf] [repeticiones]
+"""
+
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from test_pdf import BalanceExtractorEnhanced
+
+
+def measure(label, export, repeats):
+    """Ejecuta export() varias veces y devuelve el mejor tiempo y el pico de memoria"""
+    best = None
+    peak = 0
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        # Los escritores imprimen su propio resumen; aquí solo interesa el tiempo
+        with contextlib.redirect_stdout(io.StringIO()):
+            export()
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<12} {best:>8.3f} s  pico {peak / 1024 / 1024:>8.1f} MB")
+    return best
+
+
+def main():
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test.pdf"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    logging.getLogger('test_pdf').setLevel(logging.WARNING)
+
+    extractor = BalanceExtractorEnhanced()
+    rows = extractor.extract_balance_data(pdf_path)
+    print(f"📊 EXPORTACIÓN A EXCEL - {pdf_path} ({len(rows)} filas, mejor de {repeats})")
+    print("=" * 55)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pandas_path = os.path.join(tmp_dir, 'pandas.xlsx')
+        streaming_path = os.path.join(tmp_dir, 'streaming.xlsx')
+
+        pandas_time = measure('pandas', lambda: extractor.save_to_excel(rows, pandas_path), repeats)
+        streaming_time = measure('streaming', lambda: extractor.save_to_excel_streaming(rows, streaming_path), repeats)
+
+        print(f"\nTamaño: pandas {os.path.getsize(pandas_path) / 1024:.0f} KB, "
+              f"streaming {os.path.getsize(streaming_path) / 1024:.0f} KB")
+    if streaming_time > 0:
+        print(f"⚡ Streaming: {pandas_time / streaming_time:.2f}x respecto a pandas")
+
+
+if __name__ == "__main__":
+    main()
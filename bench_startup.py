@@ -0,0 +1,143 @@
+"""
+Benchmark del arranque en frío de la GUI y de la primera página extraída.
+
+Cada repetición lanza un intérprete nuevo (así las importaciones no quedan en
+caché de sys.modules) y mide desde el lanzamiento:
+
+    time_to_window      hasta que la ventana de app.py está dibujada
+                        (sin pantalla: hasta terminar `import app`)
+    time_to_first_page  hasta tener el texto de la primera página del PDF,
+                        empezando apenas aparece la ventana
+    warm_up             lo que tarda warm_up_dependencies() en segundo plano
+
+También lista los módulos pesados que ya estaban cargados al mostrar la
+ventana; con las importaciones diferidas la lista debe quedar vacía.
+
+Uso:
+    python bench_startup.py [--pdf test.pdf] [--repeticiones 5] [--motor pdfplumber|pymupdf]
+                            [--json arranque.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from text_backends import BACKENDS
+
+HEAVY_MODULES = ['numpy', 'pandas', 'xlsxwriter', 'pdfplumber', 'pdfminer', 'PIL', 'fitz']
+METRICS = ['time_to_window', 'time_to_first_page', 'warm_up']
+
+
+def measure_child(pdf_path: str, backend: str, launched: float):
+    """Medición dentro del intérprete nuevo; imprime un JSON con los tiempos"""
+    result: Dict[str, Any] = {}
+    import app
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        gui = app.PDFToExcelApp(root)
+        # Antes de dibujar: el warm-up arranca recién con la ventana visible
+        result['heavy_loaded'] = [name for name in HEAVY_MODULES if name in sys.modules]
+        root.update()
+        result['window'] = True
+    except Exception as e:  # tkinter.TclError sin pantalla
+        gui = None
+        result['window'] = False
+        result['window_error'] = str(e)
+        result['heavy_loaded'] = [name for name in HEAVY_MODULES if name in sys.modules]
+    result['time_to_window'] = time.time() - launched
+
+    # La primera página se pide de inmediato, como si el usuario ya hubiera
+    # elegido el PDF, mientras el warm-up de la GUI sigue en segundo plano
+    from text_backends import open_document
+    with open_document(pdf_path, backend) as pdf:
+        pdf.page_text(0)
+    result['time_to_first_page'] = time.time() - launched
+
+    if gui is not None:
+        gui._probe_executor.shutdown(wait=True)
+        root.destroy()
+    print(json.dumps(result))
+
+
+def measure_warm_up():
+    """Duración de warm_up_dependencies() en un intérprete nuevo"""
+    start = time.perf_counter()
+    from test_pdf import warm_up_dependencies
+    warm_up_dependencies()
+    print(json.dumps({'warm_up': time.perf_counter() - start}))
+
+
+def run_child(args: List[str]) -> Dict[str, Any]:
+    output = subprocess.run([sys.executable, os.path.abspath(__file__)] + args,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del arranque en frío de la GUI")
+    parser.add_argument('--pdf', default='test.pdf',
+                        help="PDF para medir la primera página (por defecto test.pdf)")
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="lanzamientos; se reporta la mediana (por defecto 5)")
+    parser.add_argument('--motor', choices=list(BACKENDS), default='pdfplumber',
+                        help="motor de texto para la primera página (por defecto pdfplumber)")
+    parser.add_argument('--json', metavar='ARCHIVO', default='arranque_resultados.json',
+                        help="archivo de resultados (por defecto arranque_resultados.json)")
+    parser.add_argument('--hijo', nargs=2, metavar=('MEDICION', 'LANZADO'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.hijo:
+        kind, launched = args.hijo
+        if kind == 'ventana':
+            measure_child(args.pdf, args.motor, float(launched))
+        else:
+            measure_warm_up()
+        return 0
+
+    print(f"🚀 BENCHMARK DE ARRANQUE - {args.pdf}, motor {args.motor}, mediana de {args.repeticiones}")
+    print("=" * 75)
+    print(f"{'#':>3} {'Ventana s':>10} {'1ª página s':>12} {'Warm-up s':>10}  Módulos pesados al mostrar")
+    print("-" * 75)
+
+    runs = []
+    for i in range(args.repeticiones):
+        run = run_child(['--pdf', args.pdf, '--motor', args.motor, '--hijo', 'ventana', repr(time.time())])
+        run.update(run_child(['--hijo', 'warm_up', '0']))
+        runs.append(run)
+        print(f"{i + 1:>3} {run['time_to_window']:>10.3f} {run['time_to_first_page']:>12.3f} "
+              f"{run['warm_up']:>10.3f}  {', '.join(run['heavy_loaded']) or '-'}")
+    print("-" * 75)
+
+    summary = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+    print(f"{'med':>3} {summary['time_to_window']:>10.3f} {summary['time_to_first_page']:>12.3f} "
+          f"{summary['warm_up']:>10.3f}")
+    if not runs[0]['window']:
+        print(f"⚠️  Sin pantalla ({runs[0]['window_error']}): 'Ventana' mide solo `import app`")
+
+    report = {
+        'environment': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.motor,
+            'pdf': os.path.basename(args.pdf),
+        },
+        'summary': summary,
+        'runs': runs,
+    }
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
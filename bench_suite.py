@@ -0,0 +1,210 @@
+"""
+Benchmark del extractor de balances sobre PDFs sintéticos de distintos tamaños.
+
+Para cada escala genera un balance con synthetic_pdf.py y mide por separado
+las etapas del proceso:
+
+    extract_date    _extract_date_from_pdf (apertura del PDF y primeras páginas)
+    extract         extract_balance_data (texto + parseo de todas las páginas)
+    clean_validate  _clean_and_validate_data (limpieza, duplicados, totales)
+    save_excel      save_to_excel (DataFrame formateado + hoja Resumen)
+
+Además compara las filas extraídas con las generadas (cantidad y montos
+exactos). Los resultados se imprimen como tabla y se guardan en JSON para
+comparar corridas entre máquinas o versiones.
+
+Uso:
+    python bench_suite.py [--paginas 10 100 1000] [--repeticiones 3] [--json resultados.json]
+                          [--motor pdfplumber|pymupdf] [--modo text|words] [--workers N]
+                          [--pdf real.pdf ...]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from synthetic_pdf import write_balance_pdf
+from test_pdf import LAYOUTS, PARSER_VERSION, BalanceExtractorEnhanced
+from text_backends import BACKENDS, open_document
+
+STAGES = ['extract_date', 'extract', 'clean_validate', 'save_excel']
+AMOUNT_FIELDS = ['SALDO_ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO_ACTUAL']
+
+
+def time_stage(run: Callable[[], Any], repeats: int) -> Dict[str, Any]:
+    """Ejecuta run() `repeats` veces; devuelve tiempos y el resultado de la última"""
+    runs = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        # Las etapas imprimen su propio resumen; aquí solo interesa el tiempo
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run()
+        runs.append(time.perf_counter() - start)
+    return {
+        'best': min(runs),
+        'mean': statistics.mean(runs),
+        'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        'runs': runs,
+        'result': result,
+    }
+
+
+def accuracy(rows: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Filas encontradas y montos exactos respecto a lo generado"""
+    # Las líneas con un solo monto no son filas válidas para el parser
+    expected_by_code = {row['CODIGO']: row for row in expected if row['MONTOS'] >= 2}
+    found = [row for row in rows if row['CODIGO'] in expected_by_code]
+    exact = sum(all(row[f] == expected_by_code[row['CODIGO']][f] for f in AMOUNT_FIELDS) for row in found)
+    return {
+        'expected_rows': len(expected_by_code),
+        'found_rows': len(found),
+        'extra_rows': len(rows) - len(found),
+        'exact_amounts': exact,
+        'exact_ratio': exact / len(expected_by_code) if expected_by_code else 1.0,
+    }
+
+
+def bench_pdf(pdf_path: str, repeats: int, backend: str, workers: int, output_dir: str,
+              expected: Optional[List[Dict[str, Any]]] = None, layout: str = 'text') -> Dict[str, Any]:
+    """Mide las cuatro etapas sobre un PDF"""
+    def extract_date():
+        # Documento y extractor nuevos en cada repetición: pdfplumber guarda el
+        # layout de cada página y se mediría la caché en lugar de la extracción
+        with open_document(pdf_path, backend) as pdf:
+            return pdf.page_count, BalanceExtractorEnhanced(backend=backend)._extract_date_from_pdf(pdf)
+
+    stages = {'extract_date': time_stage(extract_date, repeats)}
+    pages = stages['extract_date']['result'][0]
+
+    extractor = BalanceExtractorEnhanced(backend=backend, layout=layout)
+    stages['extract'] = time_stage(lambda: extractor.extract_balance_data(pdf_path, workers=workers), repeats)
+    rows = stages['extract']['result']
+
+    # _clean_and_validate_data modifica el DataFrame, así que se copia en cada repetición
+    df = pd.DataFrame(rows)
+    stages['clean_validate'] = time_stage(lambda: extractor._clean_and_validate_data(df.copy()), repeats)
+
+    excel_path = os.path.join(output_dir, 'bench.xlsx')
+    stages['save_excel'] = time_stage(lambda: extractor.save_to_excel(rows, excel_path), repeats)
+
+    for stage in stages.values():
+        stage.pop('result')
+
+    total_best = sum(stage['best'] for stage in stages.values())
+    result = {
+        'pdf': os.path.basename(pdf_path),
+        'pages': pages,
+        'rows': len(rows),
+        'size_bytes': os.path.getsize(pdf_path),
+        'date': extractor.extracted_date,
+        'stages': stages,
+        'total_best': total_best,
+        'pages_per_sec': pages / stages['extract']['best'] if stages['extract']['best'] > 0 else 0.0,
+        'rows_per_sec': len(rows) / stages['extract']['best'] if stages['extract']['best'] > 0 else 0.0,
+    }
+    if expected is not None:
+        result['accuracy'] = accuracy(rows, expected)
+    return result
+
+
+def print_result(result: Dict[str, Any]):
+    stages = result['stages']
+    line = f"{result['pdf']:<22} {result['pages']:>6} {result['rows']:>8}"
+    for stage in STAGES:
+        line += f" {stages[stage]['best']:>10.3f}"
+    line += f" {result['pages_per_sec']:>8.1f} {result['rows_per_sec']:>9.1f}"
+    if 'accuracy' in result:
+        line += f" {result['accuracy']['exact_ratio'] * 100:>6.1f}%"
+    print(line)
+
+
+def environment_info(args) -> Dict[str, Any]:
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'parser_version': PARSER_VERSION,
+        'backend': args.motor,
+        'layout': args.modo,
+        'workers': args.workers,
+        'repeats': args.repeticiones,
+        'seed': args.semilla,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del extractor de balances")
+    parser.add_argument('--paginas', type=int, nargs='+', default=[10, 100],
+                        help="tamaños de los PDFs sintéticos (por defecto 10 y 100 páginas)")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="repeticiones por etapa; se reporta la mejor (por defecto 3)")
+    parser.add_argument('--json', metavar='ARCHIVO', default='bench_resultados.json',
+                        help="archivo de resultados (por defecto bench_resultados.json)")
+    parser.add_argument('--motor', choices=list(BACKENDS), default='pdfplumber',
+                        help="motor de texto (por defecto pdfplumber)")
+    parser.add_argument('--modo', choices=LAYOUTS, default='text',
+                        help="modo de extracción (por defecto text)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="procesos para extract_balance_data (por defecto 1)")
+    parser.add_argument('--semilla', type=int, default=0,
+                        help="semilla de los PDFs sintéticos")
+    parser.add_argument('--pdf', nargs='*', default=[],
+                        help="PDFs reales a medir además de los sintéticos")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('test_pdf').setLevel(logging.WARNING)
+
+    print(f"⏱️  BENCHMARK DEL EXTRACTOR - motor {args.motor}, modo {args.modo}, {args.workers} workers, "
+          f"mejor de {args.repeticiones}")
+    print("=" * 105)
+    header = f"{'PDF':<22} {'Págs':>6} {'Filas':>8}"
+    for stage in STAGES:
+        header += f" {stage:>10}"
+    header += f" {'Págs/s':>8} {'Filas/s':>9} {'Exacto':>7}"
+    print(header)
+    print("-" * 105)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.paginas:
+            pdf_path = os.path.join(tmp_dir, f"sintetico_{pages}.pdf")
+            expected: List[Dict[str, Any]] = []
+            stats = write_balance_pdf(pdf_path, pages, seed=args.semilla, expected_rows=expected)
+            result = bench_pdf(pdf_path, args.repeticiones, args.motor, args.workers, tmp_dir, expected,
+                               layout=args.modo)
+            result['synthetic'] = stats
+            del expected
+            results.append(result)
+            print_result(result)
+
+        for pdf_path in args.pdf:
+            result = bench_pdf(pdf_path, args.repeticiones, args.motor, args.workers, tmp_dir,
+                               layout=args.modo)
+            results.append(result)
+            print_result(result)
+
+    report = {'environment': environment_info(args), 'results': results}
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,75 @@
 #!/usr/bin/env python3
 """
 Script para construir el ejecutable del Extractor PDF a Excel usando PyInstaller
+
+Por defecto genera una carpeta (onedir): el ejecutable arranca directo, sin
+descomprimir pandas/pdfminer a un directorio temporal en cada inicio como el
+archivo único (onefile), y sin UPX, que obliga a descomprimir cada biblioteca.
+Los módulos de build_excludes.txt quedan fuera del paquete. Al terminar, el
+ejecutable se lanza sin ventana (--comprobar-arranque) para medir el arranque
+y el tamaño, y el resultado queda en build_report.json.
+
+Uso:
+    python build.py [--modo onedir|onefile] [--upx] [--pyinstaller RUTA]
+                    [--pdf test.pdf] [--repeticiones 3] [--zip] [--sin-pausa]
 """
 
+import argparse
+import importlib.util
+import json
 import os
+import platform
+import statistics
 import sys
 import shutil
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 
-# Ruta específica de PyInstaller
-PYINSTALLER_PATH = r"C:\Users\jsantillana\AppData\Local\Programs\Python\Python312\Scripts\pyinstaller.exe"
+APP_NAME = 'ExtractorPDF'
+EXCLUDES_FILE = 'build_excludes.txt'
+
+# Módulos propios que importa app.py (directa o indirectamente)
+APP_MODULES = [
+    'test_pdf',
+    'balance_batch',
+    'exporters',
+    'result_cache',
+    'log_setup',
+    'instrumentation',
+    'text_backends',
+    'memory_guard',
+    'account_tree',
+]
 
-def check_dependencies():
+# Ruta de PyInstaller en la máquina de construcción original (Windows); se
+# usa solo si no se indica otra y no hay uno en el PATH ni en este Python
+LEGACY_PYINSTALLER_PATH = r"C:\Users\jsantillana\AppData\Local\Programs\Python\Python312\Scripts\pyinstaller.exe"
+
+def find_pyinstaller(explicit_path=None):
+    """
+    Comando para ejecutar PyInstaller, o None si no se encuentra
+    
+    Orden: --pyinstaller, variable EXTRACTOR_PYINSTALLER, `pyinstaller` en
+    el PATH, `python -m PyInstaller` con este intérprete y la ruta original.
+    """
+    for path in (explicit_path, os.environ.get('EXTRACTOR_PYINSTALLER'), shutil.which('pyinstaller')):
+        if path and os.path.exists(path):
+            return [path]
+    if importlib.util.find_spec('PyInstaller') is not None:
+        return [sys.executable, '-m', 'PyInstaller']
+    if os.path.exists(LEGACY_PYINSTALLER_PATH):
+        return [LEGACY_PYINSTALLER_PATH]
+    return None
+
+def check_dependencies(pyinstaller_cmd):
     """Verifica que las dependencias necesarias estén instaladas"""
     required_packages = [
         'tkinter',  # Viene con Python, pero verificamos que esté disponible
         'pandas',
         'pdfplumber',
-        'xlsxwriter',
-        'openpyxl'
+        'xlsxwriter'
     ]
     
     missing_packages = []
@@ -33,13 +83,17 @@ def check_dependencies():
         except ImportError:
             missing_packages.append(package)
     
-    # Verificar que PyInstaller esté disponible en la ruta especificada
-    if not os.path.exists(PYINSTALLER_PATH):
-        print(f"❌ PyInstaller no encontrado en: {PYINSTALLER_PATH}")
-        print("   💡 Verifica la ruta o instala PyInstaller con: pip install pyinstaller")
+    # Verificar que PyInstaller esté disponible
+    if pyinstaller_cmd is None:
+        print("❌ PyInstaller no encontrado (ni --pyinstaller, ni EXTRACTOR_PYINSTALLER, ni en el PATH)")
+        print("   💡 Indica la ruta con --pyinstaller o instala PyInstaller con: pip install pyinstaller")
         return False
     else:
-        print(f"✅ PyInstaller encontrado en: {PYINSTALLER_PATH}")
+        print(f"✅ PyInstaller encontrado: {' '.join(pyinstaller_cmd)}")
+    
+    # PyMuPDF es opcional: si está, el sondeo de fecha lo usa y se incluye
+    if importlib.util.find_spec('fitz') is None:
+        print("ℹ️  PyMuPDF no está instalado: el ejecutable usará solo pdfplumber")
     
     if missing_packages:
         print(f"❌ Paquetes faltantes: {', '.join(missing_packages)}")
@@ -53,10 +107,7 @@ def check_dependencies():
 
 def check_required_files():
     """Verifica que los archivos necesarios existan"""
-    required_files = [
-        'app.py',
-        'test_pdf.py'
-    ]
+    required_files = ['app.py', EXCLUDES_FILE] + [f"{module}.py" for module in APP_MODULES]
     
     missing_files = []
     
@@ -72,25 +123,72 @@ def check_required_files():
     print("✅ Todos los archivos necesarios están presentes")
     return True
 
-def create_spec_file():
-    """Crea el archivo .spec para PyInstaller"""
-    spec_content = '''
-# -*- mode: python ; coding: utf-8 -*-
+def load_excludes(path=EXCLUDES_FILE):
+    """Módulos a excluir según el manifiesto (un nombre por línea, # comenta)"""
+    excludes = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            name = line.split('#', 1)[0].strip()
+            if name:
+                excludes.append(name)
+    return excludes
 
-block_cipher = None
+def run_startup_check(command, pdf_path=None, timeout=300):
+    """
+    Lanza `command --comprobar-arranque` y devuelve (segundos de pared, reporte)
+    
+    El reporte es el JSON que escribe app.startup_check(); None si el proceso
+    falló o no lo escribió.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, 'arranque.json')
+        cmd = list(command) + ['--comprobar-arranque', report_path]
+        if pdf_path:
+            cmd.append(os.path.abspath(pdf_path))
+        start = time.perf_counter()
+        completed = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0 or not os.path.exists(report_path):
+            print(f"   ❌ Código de salida {completed.returncode}")
+            for line in (completed.stdout + completed.stderr).strip().splitlines()[-15:]:
+                print(f"      {line}")
+            return elapsed, None
+        with open(report_path, encoding='utf-8') as f:
+            return elapsed, json.load(f)
 
-a = Analysis(
-    ['app.py'],
-    pathex=[],
-    binaries=[],
-    datas=[
-        ('test_pdf.py', '.'),
-    ],
-    hiddenimports=[
+def check_excludes(excludes, pdf_path=None):
+    """
+    Verifica con Python (sin congelar) que ningún módulo excluido se carga al
+    importar las dependencias y leer una página; si se cargara, el ejecutable
+    fallaría en ese punto
+    """
+    print("🔍 Verificando el manifiesto de exclusiones...")
+    _, report = run_startup_check([sys.executable, 'app.py'], pdf_path)
+    if report is None:
+        print("❌ No se pudo ejecutar app.py --comprobar-arranque")
+        return False
+    
+    loaded = [module for module in report['modules']
+              if any(module == name or module.startswith(name + '.') for name in excludes)]
+    if loaded:
+        print(f"❌ Módulos excluidos en {EXCLUDES_FILE} que la app sí carga: {', '.join(loaded)}")
+        return False
+    
+    print(f"✅ {len(excludes)} exclusiones verificadas ({len(report['modules'])} módulos cargados)")
+    return True
+
+def _spec_list(items):
+    """Lista de cadenas con el formato del .spec, un elemento por línea"""
+    if not items:
+        return '[]'
+    return '[\n' + ',\n'.join(f"        {item!r}" for item in items) + '\n    ]'
+
+def create_spec_file(mode='onedir', upx=False, excludes=()):
+    """Crea el archivo .spec para PyInstaller"""
+    hiddenimports = APP_MODULES + [
         'pandas',
         'pdfplumber',
         'xlsxwriter',
-        'openpyxl',
         'tkinter',
         'tkinter.ttk',
         'tkinter.filedialog',
@@ -98,49 +196,85 @@ a = Analysis(
         'threading',
         'logging',
         're'
-    ],
-    hookspath=[],
-    hooksconfig={},
-    runtime_hooks=[],
-    excludes=[],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
-    noarchive=False,
-)
-
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
-
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    [],
-    name='ExtractorPDF',
+    ]
+    if importlib.util.find_spec('fitz') is not None:
+        hiddenimports += ['fitz', 'pymupdf']
+    
+    exe_options = f'''    name='{APP_NAME}',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx={upx!r},
     upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,  # Sin ventana de consola
     disable_windowed_traceback=False,
     argv_emulation=False,
     target_arch=None,
     codesign_identity=None,
     entitlements_file=None,
-    icon='assets/icon.ico' if os.path.exists('assets/icon.ico') else None,
+    icon='assets/icon.ico' if os.path.exists('assets/icon.ico') else None,'''
+    
+    if mode == 'onefile':
+        # Todo en un archivo: se descomprime a un directorio temporal en cada inicio
+        build_content = f'''exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+{exe_options}
+    runtime_tmpdir=None,
+)'''
+    else:
+        # Carpeta con el ejecutable y las bibliotecas ya descomprimidas
+        build_content = f'''exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+{exe_options}
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx={upx!r},
+    upx_exclude=[],
+    name='{APP_NAME}',
+)'''
+    
+    spec_content = f'''
+# -*- mode: python ; coding: utf-8 -*-
+# Generado por build.py (modo {mode}); los cambios se pierden al reconstruir
+
+a = Analysis(
+    ['app.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports={_spec_list(hiddenimports)},
+    hookspath=[],
+    hooksconfig={{}},
+    runtime_hooks=[],
+    # Manifiesto: {EXCLUDES_FILE}
+    excludes={_spec_list(excludes)},
+    noarchive=False,
 )
+
+pyz = PYZ(a.pure)
+
+{build_content}
 '''
     
-    with open('ExtractorPDF.spec', 'w', encoding='utf-8') as f:
-        f.write(spec_content.strip())
+    with open(f'{APP_NAME}.spec', 'w', encoding='utf-8') as f:
+        f.write(spec_content.strip() + '\n')
     
-    print("✅ Archivo .spec creado: ExtractorPDF.spec")
+    print(f"✅ Archivo .spec creado: {APP_NAME}.spec (modo {mode}, UPX {'sí' if upx else 'no'}, "
+          f"{len(excludes)} exclusiones)")
 
-def prepare_build_environment():
+def prepare_build_environment(mode, upx, excludes):
     """Prepara el entorno para la construcción"""
     print("🔧 Preparando entorno de construcción...")
     
@@ -158,7 +292,7 @@ def prepare_build_environment():
         print("   💡 Puedes agregar un archivo icon.ico en assets/ para personalizar el icono")
     
     # Crear archivo .spec
-    create_spec_file()
+    create_spec_file(mode, upx, excludes)
     
     print("✅ Entorno preparado")
 
@@ -167,7 +301,6 @@ def clean_previous_builds():
     print("🧹 Limpiando construcciones anteriores...")
     
     dirs_to_clean = ['build', 'dist', '__pycache__']
-    files_to_clean = ['ExtractorPDF.spec']
     
     for dir_name in dirs_to_clean:
         if os.path.exists(dir_name):
@@ -185,15 +318,13 @@ def clean_previous_builds():
     
     print("✅ Limpieza completada")
 
-def build_executable():
+def build_executable(pyinstaller_cmd):
     """Construye el ejecutable usando PyInstaller"""
     print("🚀 Iniciando construcción del ejecutable...")
-    print(f"   🔧 Usando PyInstaller desde: {PYINSTALLER_PATH}")
+    print(f"   🔧 Usando PyInstaller: {' '.join(pyinstaller_cmd)}")
     
-    # Comando de PyInstaller usando la ruta específica
-    cmd = [
-        PYINSTALLER_PATH,
-        'ExtractorPDF.spec',
+    cmd = pyinstaller_cmd + [
+        f'{APP_NAME}.spec',
         '--clean',
         '--noconfirm'
     ]
@@ -225,21 +356,36 @@ def build_executable():
             return False
             
     except FileNotFoundError:
-        print(f"❌ Error: No se pudo encontrar PyInstaller en {PYINSTALLER_PATH}")
-        print("   💡 Verifica que la ruta sea correcta o instala PyInstaller")
+        print(f"❌ Error: No se pudo ejecutar PyInstaller: {' '.join(pyinstaller_cmd)}")
+        print("   💡 Verifica la ruta con --pyinstaller o instala PyInstaller")
         return False
     except Exception as e:
         print(f"❌ Error inesperado durante la construcción: {e}")
         return False
 
-def verify_executable():
+def bundle_paths(mode):
+    """(carpeta del paquete, ruta del ejecutable) según el modo y el sistema"""
+    exe_name = f'{APP_NAME}.exe' if sys.platform == 'win32' else APP_NAME
+    bundle_dir = Path('dist') if mode == 'onefile' else Path('dist') / APP_NAME
+    return bundle_dir, bundle_dir / exe_name
+
+def bundle_size(mode):
+    """(bytes, archivos) del ejecutable en onefile o de toda la carpeta en onedir"""
+    bundle_dir, exe_path = bundle_paths(mode)
+    if mode == 'onefile':
+        return exe_path.stat().st_size, 1
+    # Los enlaces simbólicos (bibliotecas compartidas) se cuentan una sola vez
+    files = [path for path in bundle_dir.rglob('*') if path.is_file() and not path.is_symlink()]
+    return sum(path.stat().st_size for path in files), len(files)
+
+def verify_executable(mode):
     """Verifica que el ejecutable se haya creado correctamente"""
-    exe_path = Path('dist/ExtractorPDF.exe')
+    _, exe_path = bundle_paths(mode)
     
     if exe_path.exists():
-        size_mb = exe_path.stat().st_size / (1024 * 1024)
+        size_bytes, file_count = bundle_size(mode)
         print(f"✅ Ejecutable creado: {exe_path}")
-        print(f"   📊 Tamaño: {size_mb:.1f} MB")
+        print(f"   📊 Tamaño: {size_bytes / (1024 * 1024):.1f} MB en {file_count} archivos")
         return True
     else:
         print(f"❌ Ejecutable no encontrado en {exe_path}")
@@ -251,32 +397,88 @@ def verify_executable():
                 print(f"      • {item.name}")
         return False
 
-def post_build_setup():
+def benchmark_startup(mode, upx, excludes, pdf_path=None, repeats=3):
+    """
+    Lanza el ejecutable sin ventana varias veces y guarda en
+    dist/build_report.json el arranque (mediana) y el tamaño del paquete
+    
+    El tiempo de pared incluye, en onefile, la descompresión al directorio
+    temporal; warm_up y first_page los mide el propio ejecutable.
+    """
+    print(f"⏱️  Midiendo el arranque del ejecutable ({repeats} lanzamientos)...")
+    _, exe_path = bundle_paths(mode)
+    
+    runs = []
+    for i in range(repeats):
+        elapsed, report = run_startup_check([str(exe_path.resolve())], pdf_path)
+        if report is None:
+            print("❌ El ejecutable no arrancó correctamente")
+            return False
+        runs.append({
+            'wall': elapsed,
+            'warm_up': report['warm_up'],
+            'first_page': report.get('first_page'),
+            'report_date': report.get('report_date'),
+        })
+        first_page = f", primera página {report['first_page']:.2f} s" if 'first_page' in report else ''
+        print(f"   {i + 1}. {elapsed:.2f} s de pared, importaciones {report['warm_up']:.2f} s{first_page}")
+    
+    size_bytes, file_count = bundle_size(mode)
+    summary = {
+        'startup_wall': statistics.median(run['wall'] for run in runs),
+        'warm_up': statistics.median(run['warm_up'] for run in runs),
+    }
+    if runs[0]['first_page'] is not None:
+        summary['first_page'] = statistics.median(run['first_page'] for run in runs)
+    
+    build_report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'mode': mode,
+        'upx': upx,
+        'excludes': len(excludes),
+        'size_bytes': size_bytes,
+        'files': file_count,
+        'pdf': os.path.basename(pdf_path) if pdf_path else None,
+        'summary': summary,
+        'runs': runs,
+    }
+    report_path = Path('dist') / 'build_report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(build_report, f, ensure_ascii=False, indent=2)
+    
+    print(f"✅ Arranque: {summary['startup_wall']:.2f} s (mediana), "
+          f"paquete {size_bytes / (1024 * 1024):.1f} MB")
+    print(f"   💾 Reporte guardado en {report_path}")
+    return True
+
+def post_build_setup(mode):
     """Configuración post-construcción"""
     print("🔧 Configuración post-construcción...")
     
-    dist_dir = Path('dist')
+    bundle_dir, exe_path = bundle_paths(mode)
     
-    # Crear directorio de salida en dist
-    output_dir = dist_dir / 'output'
+    # Crear directorio de salida junto al ejecutable
+    output_dir = bundle_dir / 'output'
     output_dir.mkdir(exist_ok=True)
     print(f"   📁 Creado directorio de salida: {output_dir}")
     
     # Crear archivo README.txt con instrucciones
-    readme_content = """
+    readme_content = f"""
 🏦 EXTRACTOR PDF A EXCEL - Balance de Comprobación
 ================================================
 
 INSTRUCCIONES DE USO:
-1. Ejecuta ExtractorPDF.exe
-2. Selecciona tu archivo PDF del balance de comprobación
-3. Elige dónde guardar el archivo Excel
-4. Haz clic en "Procesar PDF"
-5. Los archivos se guardarán en la ubicación que elijas
+1. Ejecuta {exe_path.name}
+2. Agrega a la cola tus PDFs del balance de comprobación (o una carpeta)
+3. Elige la carpeta y el formato de salida
+4. Haz clic en "Procesar cola"
+5. Los archivos se guardarán en la carpeta elegida, nombrados por la fecha del reporte
 
 REQUISITOS:
 • Archivos PDF del Banco de la Nación (Balance de Comprobación)
-• Sistema operativo Windows
+• Sistema operativo {platform.system()}
 
 NOTAS:
 • Los archivos Excel generados tendrán formato .xlsx
@@ -297,111 +499,126 @@ SOPORTE:
 © 2025 - Extractor PDF Balance de Comprobación
     """.strip()
     
-    readme_path = dist_dir / 'README.txt'
+    readme_path = bundle_dir / 'README.txt'
     with open(readme_path, 'w', encoding='utf-8') as f:
         f.write(readme_content)
     print(f"   📄 Creado archivo de ayuda: {readme_path}")
     
-    # Crear script de prueba (opcional)
-    test_script = '''@echo off
-echo 🧪 Probando ExtractorPDF...
+    # Crear script de prueba (opcional, solo Windows)
+    if sys.platform == 'win32':
+        test_script = f'''@echo off
+echo 🧪 Probando {APP_NAME}...
 echo.
-echo Ejecutando ExtractorPDF.exe...
-ExtractorPDF.exe
+echo Ejecutando {exe_path.name}...
+{exe_path.name}
 echo.
 echo ✅ Prueba completada
 pause
 '''
-    
-    test_path = dist_dir / 'test.bat'
-    with open(test_path, 'w', encoding='utf-8') as f:
-        f.write(test_script)
-    print(f"   🧪 Creado script de prueba: {test_path}")
+        
+        test_path = bundle_dir / 'test.bat'
+        with open(test_path, 'w', encoding='utf-8') as f:
+            f.write(test_script)
+        print(f"   🧪 Creado script de prueba: {test_path}")
     
     print("✅ Configuración post-construcción completada")
 
-def create_installer_script():
-    """Crea un script opcional para crear un instalador"""
-    installer_content = '''@echo off
-echo 🎁 Creando paquete de distribución...
-
-set PACKAGE_NAME=ExtractorPDF_v1.0
-set PACKAGE_DIR=%PACKAGE_NAME%
-
-if exist %PACKAGE_DIR% rmdir /s /q %PACKAGE_DIR%
-mkdir %PACKAGE_DIR%
-
-echo 📦 Copiando archivos...
-copy /Y ExtractorPDF.exe %PACKAGE_DIR%\\
-copy /Y README.txt %PACKAGE_DIR%\\
-copy /Y test.bat %PACKAGE_DIR%\\
-
-mkdir %PACKAGE_DIR%\\output
-
-echo 🗜️ Creando archivo ZIP...
-powershell Compress-Archive -Path %PACKAGE_DIR% -DestinationPath %PACKAGE_NAME%.zip -Force
-
-echo ✅ Paquete creado: %PACKAGE_NAME%.zip
-echo.
-echo El paquete incluye:
-echo   • ExtractorPDF.exe (ejecutable principal)
-echo   • README.txt (instrucciones)
-echo   • test.bat (script de prueba)
-echo   • output\\ (carpeta para archivos de salida)
-echo.
-pause
-'''
+def create_package(mode, version='1.0'):
+    """Crea un ZIP con el paquete listo para distribuir (en cualquier sistema)"""
+    bundle_dir, exe_path = bundle_paths(mode)
+    package_name = f'{APP_NAME}_v{version}'
+    
+    print("🎁 Creando paquete de distribución...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        package_dir = Path(tmp_dir) / package_name
+        if mode == 'onefile':
+            package_dir.mkdir()
+            for name in (exe_path.name, 'README.txt', 'test.bat'):
+                if (bundle_dir / name).exists():
+                    shutil.copy2(bundle_dir / name, package_dir / name)
+            (package_dir / 'output').mkdir()
+        else:
+            shutil.copytree(bundle_dir, package_dir)
+        archive = shutil.make_archive(str(Path('dist') / package_name), 'zip', tmp_dir, package_name)
     
-    installer_path = Path('dist/create_package.bat')
-    with open(installer_path, 'w', encoding='utf-8') as f:
-        f.write(installer_content)
-    print(f"✅ Creado script de empaquetado: {installer_path}")
+    print(f"✅ Paquete creado: {archive}")
+    return archive
 
-def main():
+def main(argv=None):
     """Función principal del script de construcción"""
+    parser = argparse.ArgumentParser(description="Construye el ejecutable del Extractor PDF a Excel")
+    parser.add_argument('--modo', choices=['onedir', 'onefile'], default='onedir',
+                        help="carpeta (arranque rápido, por defecto) o archivo único")
+    parser.add_argument('--upx', action='store_true',
+                        help="comprimir las bibliotecas con UPX (más chico, arranque más lento)")
+    parser.add_argument('--pyinstaller', metavar='RUTA', default=None,
+                        help="ejecutable de PyInstaller (por defecto se busca en el PATH y en este Python)")
+    parser.add_argument('--pdf', default='test.pdf' if os.path.exists('test.pdf') else None,
+                        help="PDF para medir la primera página en la verificación (por defecto test.pdf)")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="lanzamientos del ejecutable para medir el arranque (por defecto 3)")
+    parser.add_argument('--zip', action='store_true',
+                        help="crear además un ZIP para distribuir")
+    parser.add_argument('--sin-pausa', action='store_true',
+                        help="no esperar Enter al terminar (por ejemplo en integración continua)")
+    args = parser.parse_args(argv)
+    
+    pyinstaller_cmd = find_pyinstaller(args.pyinstaller)
+    _, exe_path = bundle_paths(args.modo)
+    
     print("🏦 Extractor PDF a Excel - Constructor de Ejecutable")
     print("=" * 60)
-    print(f"🔧 PyInstaller Path: {PYINSTALLER_PATH}")
+    print(f"🔧 PyInstaller: {' '.join(pyinstaller_cmd) if pyinstaller_cmd else 'no encontrado'}")
+    print(f"📦 Modo: {args.modo}, UPX: {'sí' if args.upx else 'no'}")
     print("=" * 60)
     
     # Verificaciones previas
-    if not check_dependencies():
+    if not check_dependencies(pyinstaller_cmd):
         return False
     
     if not check_required_files():
         return False
     
+    excludes = load_excludes()
+    if not check_excludes(excludes, args.pdf):
+        return False
+    
     # Preparar entorno
-    prepare_build_environment()
+    prepare_build_environment(args.modo, args.upx, excludes)
     
     # Limpiar construcciones anteriores
     clean_previous_builds()
     
     # Construir ejecutable
-    if not build_executable():
+    if not build_executable(pyinstaller_cmd):
         return False
     
     # Verificar resultado
-    if not verify_executable():
+    if not verify_executable(args.modo):
+        return False
+    
+    # Lanzar el ejecutable sin ventana: debe arrancar y leer el PDF de prueba
+    if not benchmark_startup(args.modo, args.upx, excludes, args.pdf, args.repeticiones):
         return False
     
     # Configuración final
-    post_build_setup()
+    post_build_setup(args.modo)
     
-    # Crear script de empaquetado
-    create_installer_script()
+    if args.zip:
+        create_package(args.modo)
     
     print("\n🎉 ¡Construcción completada exitosamente!")
     print("=" * 60)
-    print(f"📦 Ejecutable disponible en: dist/ExtractorPDF.exe")
-    print(f"📄 Documentación: dist/README.txt")
-    print(f"🧪 Script de prueba: dist/test.bat")
-    print(f"🎁 Script de empaquetado: dist/create_package.bat")
+    print(f"📦 Ejecutable disponible en: {exe_path}")
+    print(f"📄 Documentación: {exe_path.parent / 'README.txt'}")
+    print("⏱️  Arranque y tamaño: dist/build_report.json")
     print()
     print("💡 Próximos pasos:")
-    print("   1. Prueba el ejecutable: cd dist && ExtractorPDF.exe")
-    print("   2. Para distribuir: ejecuta create_package.bat en dist/")
-    print("   3. Comparte el archivo ZIP generado")
+    print(f"   1. Prueba el ejecutable: {exe_path}")
+    if args.modo == 'onedir':
+        print(f"   2. Para distribuir: comparte la carpeta completa {exe_path.parent} (o usa --zip)")
+    else:
+        print("   2. Para distribuir: comparte el ejecutable (o usa --zip)")
     print()
     print("📋 Características del ejecutable:")
     print("   • Interfaz gráfica completa")
@@ -414,5 +631,6 @@ def main():
 
 if __name__ == "__main__":
     success = main()
-    input("\nPresiona Enter para salir...")
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    if '--sin-pausa' not in sys.argv and sys.stdin.isatty():
+        input("\nPresiona Enter para salir...")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+"""
+Comparación lado a lado de los motores de texto del extractor de balances.
+
+Procesa el mismo PDF con cada motor, mide filas por segundo y lista las
+diferencias fila a fila (por CODIGO) respecto al motor de referencia.
+
+Uso:
+    python compare_backends.py [ruta.pdf] [motor_referencia]
+"""
+
+import logging
+import sys
+import time
+from typing import Any, Dict, List
+
+from test_pdf import BalanceExtractorEnhanced
+from text_backends import BACKENDS
+
+FIELDS = ['NOMBRE', 'SALDO_ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO_ACTUAL']
+
+
+def run_backend(pdf_path: str, backend: str) -> Dict[str, Any]:
+    """Extrae el PDF con un motor y devuelve filas y tiempos"""
+    extractor = BalanceExtractorEnhanced(backend=backend)
+    start = time.perf_counter()
+    rows = extractor.extract_balance_data(pdf_path)
+    elapsed = time.perf_counter() - start
+    return {
+        'backend': backend,
+        'rows': rows,
+        'date': extractor.extracted_date,
+        'seconds': elapsed,
+        'rows_per_sec': len(rows) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def diff_rows(reference: List[Dict[str, Any]], other: List[Dict[str, Any]]) -> List[str]:
+    """Lista las diferencias fila a fila entre dos extracciones"""
+    ref_by_code = {row['CODIGO']: row for row in reference}
+    other_by_code = {row['CODIGO']: row for row in other}
+    differences = []
+
+    for codigo in ref_by_code.keys() - other_by_code.keys():
+        differences.append(f"{codigo}: falta en el motor comparado")
+    for codigo in other_by_code.keys() - ref_by_code.keys():
+        differences.append(f"{codigo}: fila adicional en el motor comparado")
+
+    for codigo in ref_by_code.keys() & other_by_code.keys():
+        for field in FIELDS:
+            ref_val = ref_by_code[codigo][field]
+            other_val = other_by_code[codigo][field]
+            if ref_val != other_val:
+                differences.append(f"{codigo} {field}: {ref_val!r} != {other_val!r}")
+
+    if not differences and [r['CODIGO'] for r in reference] != [r['CODIGO'] for r in other]:
+        differences.append("Mismas filas pero en distinto orden")
+
+    return sorted(differences)
+
+
+def main():
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test.pdf"
+    reference_backend = sys.argv[2] if len(sys.argv) > 2 else "pdfplumber"
+
+    # Los logs por línea distorsionan la medición
+    logging.getLogger('test_pdf').setLevel(logging.WARNING)
+
+    print(f"⚖️  COMPARACIÓN DE MOTORES - {pdf_path}")
+    print("=" * 55)
+
+    results = {}
+    for backend in BACKENDS:
+        try:
+            results[backend] = run_backend(pdf_path, backend)
+        except ImportError as e:
+            print(f"⚠️  {backend}: no disponible ({e})")
+            continue
+        r = results[backend]
+        print(f"{backend:<12} {len(r['rows']):>6} filas  {r['seconds']:>8.2f} s  "
+              f"{r['rows_per_sec']:>10.1f} filas/s  fecha {r['date']}")
+
+    if reference_backend not in results:
+        print(f"❌ El motor de referencia '{reference_backend}' no está disponible")
+        return 1
+
+    if len(results) < 2:
+        print("\n⚠️  Solo hay un motor disponible, no hay nada que comparar")
+        return 0
+
+    reference = results[reference_backend]
+    has_differences = False
+    for backend, r in results.items():
+        if backend == reference_backend:
+            continue
+        differences = diff_rows(reference['rows'], r['rows'])
+        if reference['date'] != r['date']:
+            differences.insert(0, f"Fecha: {reference['date']!r} != {r['date']!r}")
+        speedup = reference['seconds'] / r['seconds'] if r['seconds'] > 0 else 0.0
+        print(f"\n📊 {backend} vs {reference_backend}: {speedup:.2f}x, {len(differences)} diferencias")
+        for line in differences[:50]:
+            print(f"   • {line}")
+        if len(differences) > 50:
+            print(f"   ... y {len(differences) - 50} más")
+        has_differences = has_differences or bool(differences)
+
+    if not has_differences:
+        print("\n✅ Paridad completa entre motores")
+    return 1 if has_differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Exportadores rápidos para las filas extraídas: CSV, JSON Lines y Parquet.
+
+Todos comparten la misma interfaz de escritura fila a fila, así que pueden
+recibir las filas mientras se extraen (por ejemplo desde iter_balance_rows):
+
+    with get_exporter('jsonl', 'salida.jsonl', columns) as exporter:
+        for row in rows:
+            exporter.write_row(row)
+
+Las columnas de montos llegan en céntimos enteros con signo y cada formato
+las escribe como decimal exacto con dos decimales.
+"""
+
+import csv
+import json
+import os
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class BaseExporter:
+    """Interfaz común: write_row() por cada fila y close() al terminar"""
+
+    extension = ''
+
+    def __init__(self, output_path: str, columns: List[str],
+                 money_columns: Iterable[str] = (),
+                 integer_columns: Iterable[str] = (),
+                 date_columns: Iterable[str] = ()):
+        self.output_path = output_path
+        self.columns = list(columns)
+        self.money_columns = set(money_columns)
+        self.integer_columns = set(integer_columns)
+        self.date_columns = set(date_columns)
+        self.rows_written = 0
+
+    def write_row(self, row: Dict[str, Any]):
+        self._write(row)
+        self.rows_written += 1
+
+    def _write(self, row: Dict[str, Any]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def cents_to_text(cents: int) -> str:
+    """Céntimos a decimal plano: -123456 -> '-1234.56'"""
+    sign = '-' if cents < 0 else ''
+    soles, centimos = divmod(abs(int(cents)), 100)
+    return f"{sign}{soles}.{centimos:02d}"
+
+
+class CsvExporter(BaseExporter):
+    """CSV con encabezado; montos como decimales planos sin separador de miles"""
+
+    extension = '.csv'
+
+    def __init__(self, output_path: str, columns: List[str], **kwargs):
+        super().__init__(output_path, columns, **kwargs)
+        self._file = open(output_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write(self, row: Dict[str, Any]):
+        self._writer.writerow([
+            cents_to_text(row.get(col) or 0) if col in self.money_columns else row.get(col, '')
+            for col in self.columns
+        ])
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlExporter(BaseExporter):
+    """Un objeto JSON por línea; se puede leer mientras todavía se escribe"""
+
+    extension = '.jsonl'
+
+    def __init__(self, output_path: str, columns: List[str], **kwargs):
+        super().__init__(output_path, columns, **kwargs)
+        self._file = open(output_path, 'w', encoding='utf-8')
+
+    def _write(self, row: Dict[str, Any]):
+        record = {}
+        for col in self.columns:
+            value = row.get(col)
+            if col in self.money_columns:
+                # Hasta 2^53 céntimos el float conserva exactamente los dos decimales
+                value = (value or 0) / 100
+            record[col] = value
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExporter(BaseExporter):
+    """
+    Parquet tipado (requiere pyarrow): montos decimal(18,2), enteros int64,
+    fechas date32 y el resto texto. Escribe por lotes para no acumular filas.
+    """
+
+    extension = '.parquet'
+    batch_size = 10000
+
+    def __init__(self, output_path: str, columns: List[str], **kwargs):
+        super().__init__(output_path, columns, **kwargs)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("La exportación a Parquet requiere pyarrow: pip install pyarrow") from e
+        self._pa = pa
+
+        fields = []
+        for col in self.columns:
+            if col in self.money_columns:
+                fields.append(pa.field(col, pa.decimal128(18, 2)))
+            elif col in self.integer_columns:
+                fields.append(pa.field(col, pa.int64()))
+            elif col in self.date_columns:
+                fields.append(pa.field(col, pa.date32()))
+            else:
+                fields.append(pa.field(col, pa.string()))
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(output_path, self._schema)
+        self._batch: Dict[str, List[Any]] = {col: [] for col in self.columns}
+        self._pending = 0
+
+    def _write(self, row: Dict[str, Any]):
+        for col in self.columns:
+            value = row.get(col)
+            if col in self.money_columns:
+                value = Decimal(int(value or 0)).scaleb(-2)
+            elif col in self.date_columns and isinstance(value, str):
+                value = date.fromisoformat(value)
+            self._batch[col].append(value)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        table = self._pa.Table.from_pydict(self._batch, schema=self._schema)
+        self._writer.write_table(table)
+        self._batch = {col: [] for col in self.columns}
+        self._pending = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'jsonl': JsonlExporter,
+    'parquet': ParquetExporter,
+}
+
+# Formatos disponibles en la CLI y la GUI; 'xlsx' lo escribe el propio extractor
+OUTPUT_FORMATS = ['xlsx'] + list(EXPORTERS)
+
+
+def get_exporter(fmt: str, output_path: str, columns: List[str], **kwargs) -> BaseExporter:
+    """
+    Crea el exportador del formato indicado ('csv', 'jsonl' o 'parquet')
+    """
+    try:
+        exporter_class = EXPORTERS[fmt]
+    except KeyError:
+        raise ValueError(f"Formato de exportación desconocido: {fmt!r} "
+                         f"(opciones: {', '.join(EXPORTERS)})") from None
+    return exporter_class(output_path, columns, **kwargs)
+
+
+def output_extension(fmt: str) -> str:
+    """Extensión de archivo para un formato de salida"""
+    if fmt == 'xlsx':
+        return '.xlsx'
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Formato de salida desconocido: {fmt!r} (opciones: {', '.join(OUTPUT_FORMATS)})")
+    return EXPORTERS[fmt].extension
+
+
+def format_for_extension(path: str) -> Optional[str]:
+    """Formato de salida que corresponde a la extensión de path, o None si no hay"""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt in OUTPUT_FORMATS:
+        if output_extension(fmt) == extension:
+            return fmt
+    return None
+
+
+def report_date_iso(report_date: Optional[str]) -> Optional[str]:
+    """Fecha del reporte 'DD/MM/YYYY' a ISO 'YYYY-MM-DD' (None si no se puede convertir)"""
+    try:
+        day, month, year = report_date.split('/')
+        return date(int(year), int(month), int(day)).isoformat()
+    except (AttributeError, ValueError):
+        return None
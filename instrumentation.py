@@ -0,0 +1,169 @@
+"""
+Medición de tiempos por etapa y contadores del proceso de extracción.
+
+    instr = Instrumentation()
+    extractor = BalanceExtractorEnhanced(instrumentation=instr)
+    ...
+    print(instr.report().format())
+
+Cada etapa se mide con un span (administrador de contexto) que acumula
+cantidad de llamadas, tiempo total, mínimo y máximo; los contadores son
+enteros (páginas, líneas, filas, bytes). Sin instrumentación se usa
+NULL_INSTRUMENTATION, cuyos span() y count() no hacen nada: el costo es una
+llamada a método por etapa o por página, nunca por línea.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+
+class _SpanStats:
+    __slots__ = ('calls', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, elapsed: float, calls: int = 1):
+        self.calls += calls
+        self.total += elapsed
+        if elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'min': self.min if self.calls else 0.0,
+            'max': self.max,
+            'mean': self.total / self.calls if self.calls else 0.0,
+        }
+
+
+class _Span:
+    __slots__ = ('_stats', '_start')
+
+    def __init__(self, stats: _SpanStats):
+        self._stats = stats
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stats.add(time.perf_counter() - self._start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class InstrumentationReport:
+    """Resultado de una medición: tiempos por etapa, contadores y tiempo de pared"""
+
+    def __init__(self, spans: Dict[str, Dict[str, Any]], counters: Dict[str, int], wall_seconds: float):
+        self.spans = spans
+        self.counters = counters
+        self.wall_seconds = wall_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'wall_seconds': self.wall_seconds, 'spans': self.spans, 'counters': self.counters}
+
+    def format(self) -> str:
+        """Tabla de texto con las etapas ordenadas por tiempo total"""
+        lines = ["⏱️  TIEMPOS POR ETAPA",
+                 f"{'Etapa':<22} {'Llamadas':>9} {'Total s':>10} {'Media ms':>10} {'Máx ms':>10} {'% pared':>8}"]
+        for name, stats in sorted(self.spans.items(), key=lambda item: -item[1]['total']):
+            share = stats['total'] / self.wall_seconds * 100 if self.wall_seconds > 0 else 0.0
+            lines.append(f"{name:<22} {stats['calls']:>9} {stats['total']:>10.3f} "
+                         f"{stats['mean'] * 1000:>10.2f} {stats['max'] * 1000:>10.2f} {share:>7.1f}%")
+        lines.append(f"Tiempo de pared: {self.wall_seconds:.3f} s")
+        if self.counters:
+            lines.append("📈 CONTADORES")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<22} {value:>12}")
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+class Instrumentation:
+    """
+    Spans y contadores de un proceso; con enabled=False no registra nada
+
+    Los spans de procesos hijos se suman con merge(), así que en la
+    extracción paralela el total de una etapa puede superar el tiempo de pared.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self._spans: Dict[str, _SpanStats] = {}
+        self._counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    def span(self, name: str):
+        """Administrador de contexto que mide una etapa: with instr.span('parse_page'): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        stats = self._spans.get(name)
+        if stats is None:
+            stats = self._spans[name] = _SpanStats()
+        return _Span(stats)
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Spans y contadores en un dict serializable, para enviarlos entre procesos"""
+        return {
+            'spans': {name: stats.to_dict() for name, stats in self._spans.items()},
+            'counters': dict(self._counters),
+        }
+
+    def merge(self, snapshot: Optional[Dict[str, Any]]):
+        """Suma los spans y contadores de otro proceso (ver snapshot())"""
+        if not self.enabled or not snapshot:
+            return
+        for name, other in snapshot['spans'].items():
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = _SpanStats()
+            stats.calls += other['calls']
+            stats.total += other['total']
+            if other['calls']:
+                stats.min = min(stats.min, other['min'])
+            stats.max = max(stats.max, other['max'])
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+
+    def report(self, wall_seconds: Optional[float] = None) -> InstrumentationReport:
+        """
+        Reporte con lo medido hasta ahora; el tiempo de pared por defecto se
+        cuenta desde la creación o el último reset()
+        """
+        if wall_seconds is None:
+            wall_seconds = time.perf_counter() - self._started
+        return InstrumentationReport(self.snapshot()['spans'], dict(self._counters), wall_seconds)
+
+
+# Instancia compartida para cuando no se pide instrumentación
+NULL_INSTRUMENTATION = Instrumentation(enabled=False)
@@ -0,0 +1,360 @@
+"""
+Extracción de facturas por lotes: muchos PDFs combinados, un solo archivo de salida.
+
+Las páginas de todos los PDFs se reparten en bloques entre un pool de
+procesos. Cada proceso mantiene abierto un único documento PyMuPDF y lo
+reutiliza mientras le lleguen bloques del mismo archivo. Las facturas se
+escriben a medida que terminan los bloques (en el orden de los PDFs y sus
+páginas), así que el lote completo nunca está en memoria. Al final se
+informa el rendimiento en facturas por segundo.
+
+Uso:
+    python invoice_batch.py ENTRADA [ENTRADA ...] [-o facturas.xlsx] [-j PROCESOS]
+                            [--formato xlsx|csv|jsonl|parquet] [--bloque PAGINAS]
+                            [--recursivo] [--perfil]
+
+Ejemplos:
+    python invoice_batch.py facturas/ -o facturas.csv -j 8
+    python invoice_batch.py "2025-09/*.pdf" --formato parquet --perfil
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import xlsxwriter
+
+from balance_batch import expand_inputs
+from exporters import OUTPUT_FORMATS, BaseExporter, format_for_extension, get_exporter, output_extension
+from instrumentation import Instrumentation
+from log_setup import setup_logging, setup_worker_logging
+from main import INVOICE_COLUMNS, extract_invoice_data_from_page
+
+logger = logging.getLogger(__name__)
+
+# Columnas del archivo combinado: el PDF de origen y luego las de main.py
+BATCH_COLUMNS = ['archivo'] + INVOICE_COLUMNS
+
+# Páginas por bloque: suficientes para amortizar el envío entre procesos
+DEFAULT_CHUNK_PAGES = 16
+
+# Documento abierto y medición del proceso actual (uno por proceso del pool)
+_worker_doc: Dict[str, Any] = {'path': None, 'doc': None}
+_worker_instrumentation = Instrumentation(enabled=False)
+
+
+def _init_profile(profile: bool = False):
+    """Medición opcional de extract_page_chunk en el proceso actual"""
+    global _worker_instrumentation
+    _worker_instrumentation = Instrumentation(enabled=profile)
+
+
+def _init_worker(log_level: int = logging.WARNING, profile: bool = False):
+    """Inicializador del pool: logging del proceso y medición opcional"""
+    setup_worker_logging(log_level)
+    _init_profile(profile)
+
+
+def _worker_document(pdf_path: str):
+    """
+    Documento PyMuPDF del proceso para pdf_path; se reutiliza entre bloques
+    del mismo archivo y se cierra al pasar a otro
+    """
+    if _worker_doc['path'] != pdf_path:
+        if _worker_doc['doc'] is not None:
+            _worker_doc['doc'].close()
+            _worker_doc['path'] = _worker_doc['doc'] = None
+        with _worker_instrumentation.span('pdf_open'):
+            _worker_doc['doc'] = fitz.open(pdf_path)
+        _worker_doc['path'] = pdf_path
+    return _worker_doc['doc']
+
+
+def extract_page_chunk(pdf_path: str, start: int, end: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Trabajo de un proceso del pool: facturas de las páginas [start, end)
+
+    Devuelve las facturas (con 'archivo' y 'pagina' desde 1) y el resumen del
+    bloque: páginas leídas, páginas sin datos y la medición del proceso.
+    """
+    instrumentation = _worker_instrumentation
+    instrumentation.reset()
+    doc = _worker_document(pdf_path)
+    invoices = []
+    empty_pages = 0
+
+    for page_num in range(start, end):
+        with instrumentation.span('extract_text'):
+            text = doc.load_page(page_num).get_text()
+        with instrumentation.span('parse_page'):
+            data = extract_invoice_data_from_page(text)
+        # Mismo criterio que process_pdf_invoices: al menos RUC o razón social
+        if data.get('ruc') or data.get('razon_social'):
+            data['archivo'] = pdf_path
+            data['pagina'] = page_num + 1
+            invoices.append(data)
+        else:
+            empty_pages += 1
+
+    instrumentation.count('pages', end - start)
+    summary = {'pages': end - start, 'empty_pages': empty_pages,
+               'snapshot': instrumentation.snapshot() if instrumentation.enabled else None}
+    return invoices, summary
+
+
+def plan_chunks(pdf_paths: List[str], chunk_pages: int,
+                file_stats: List[Dict[str, Any]]) -> Iterator[Tuple[int, str, int, int]]:
+    """
+    Bloques (índice de archivo, ruta, inicio, fin) en el orden de los PDFs
+
+    Abre cada PDF solo para contar sus páginas; los que no se pueden abrir
+    quedan con su error en file_stats y no generan bloques.
+    """
+    for index, pdf_path in enumerate(pdf_paths):
+        stats = file_stats[index]
+        try:
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
+        except Exception as e:
+            stats['error'] = f"{type(e).__name__}: {e}"
+            continue
+        stats['pages'] = page_count
+        stats['chunks'] = (page_count + chunk_pages - 1) // chunk_pages
+        for start in range(0, page_count, chunk_pages):
+            yield index, pdf_path, start, min(start + chunk_pages, page_count)
+
+
+class XlsxInvoiceExporter(BaseExporter):
+    """Hoja 'Facturas' escrita fila a fila con xlsxwriter en modo constant_memory"""
+
+    extension = '.xlsx'
+
+    def __init__(self, output_path: str, columns: List[str], **kwargs):
+        super().__init__(output_path, columns, **kwargs)
+        self._workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+        self._worksheet = self._workbook.add_worksheet('Facturas')
+        header_format = self._workbook.add_format({'bold': True})
+        for col_num, column in enumerate(self.columns):
+            self._worksheet.write_string(0, col_num, column, header_format)
+
+    def _write(self, row: Dict[str, Any]):
+        row_num = self.rows_written + 1
+        for col_num, column in enumerate(self.columns):
+            value = row.get(column)
+            if column in self.integer_columns and value is not None:
+                self._worksheet.write_number(row_num, col_num, int(value))
+            else:
+                self._worksheet.write_string(row_num, col_num, '' if value is None else str(value))
+
+    def close(self):
+        self._workbook.close()
+
+
+def open_invoice_exporter(fmt: str, output_path: str) -> BaseExporter:
+    """Exportador fila a fila para el formato elegido, incluido 'xlsx'"""
+    if fmt == 'xlsx':
+        return XlsxInvoiceExporter(output_path, BATCH_COLUMNS, integer_columns=['pagina'])
+    return get_exporter(fmt, output_path, BATCH_COLUMNS, integer_columns=['pagina'])
+
+
+def run_invoice_batch(pdf_paths: List[str], output_path: str, fmt: str = 'xlsx', jobs: int = 1,
+                      chunk_pages: int = DEFAULT_CHUNK_PAGES,
+                      instrumentation: Optional[Instrumentation] = None) -> List[Dict[str, Any]]:
+    """
+    Extrae las facturas de todos los PDFs con hasta `jobs` procesos y las
+    escribe en output_path a medida que terminan los bloques
+
+    El archivo queda en el orden de pdf_paths y de las páginas sin importar
+    qué proceso termine primero: los bloques adelantados esperan en memoria
+    solo hasta que llegan los anteriores. Devuelve un resumen por archivo.
+    
+    Si falla un bloque, las facturas de los demás bloques de ese PDF igual
+    quedan en la salida (ya escritas o por escribir): el resumen lo marca con
+    error, las páginas que faltan en 'failed_pages' y cuántas facturas suyas
+    sí se escribieron en 'invoices'.
+    """
+    profile = instrumentation is not None and instrumentation.enabled
+    file_stats = [{'pdf_path': path, 'pages': 0, 'invoices': 0, 'empty_pages': 0,
+                   'chunks': 0, 'done_chunks': 0, 'error': None, 'failed_pages': []}
+                  for path in pdf_paths]
+    chunks = plan_chunks(pdf_paths, chunk_pages, file_stats)
+    start_time = time.perf_counter()
+    total_invoices = 0
+
+    def finish(sequence_item, invoices, summary, exporter):
+        nonlocal total_invoices
+        index = sequence_item[0]
+        stats = file_stats[index]
+        for data in invoices:
+            exporter.write_row(data)
+        total_invoices += len(invoices)
+        stats['invoices'] += len(invoices)
+        stats['empty_pages'] += summary['empty_pages']
+        stats['done_chunks'] += 1
+        if instrumentation is not None:
+            instrumentation.merge(summary['snapshot'])
+        if stats['done_chunks'] == stats['chunks']:
+            elapsed = time.perf_counter() - start_time
+            rate = total_invoices / elapsed if elapsed > 0 else 0.0
+            print(f"✅ {stats['pdf_path']}: {stats['invoices']} facturas de {stats['pages']} páginas "
+                  f"({rate:.1f} facturas/s acumulado)")
+
+    def fail(sequence_item, error):
+        index, pdf_path, start, end = sequence_item
+        stats = file_stats[index]
+        stats['failed_pages'].append((start + 1, end))
+        if stats['error'] is None:
+            stats['error'] = error
+        print(f"❌ {pdf_path} (págs. {start + 1}-{end}): {error}")
+
+    with open_invoice_exporter(fmt, output_path) as exporter:
+        if jobs <= 1:
+            # En el proceso principal el log sigue pasando por la cola de setup_logging
+            _init_profile(profile)
+            for item in chunks:
+                try:
+                    invoices, summary = extract_page_chunk(*item[1:])
+                except Exception as e:
+                    fail(item, f"{type(e).__name__}: {e}")
+                    continue
+                finish(item, invoices, summary, exporter)
+        else:
+            _run_pool(chunks, jobs, profile, finish, fail, exporter)
+
+    for stats in file_stats:
+        stats.pop('done_chunks')
+        if stats['error'] is not None:
+            logger.warning(f"{stats['pdf_path']}: {stats['error']}")
+    return file_stats
+
+
+def _run_pool(chunks, jobs, profile, finish, fail, exporter):
+    """
+    Reparte los bloques en el pool con un máximo de bloques en vuelo y
+    escribe los resultados en orden de secuencia
+    """
+    max_in_flight = jobs * 4
+    pending = {}  # future -> (secuencia, bloque)
+    ready = {}  # secuencia -> (bloque, resultado o error)
+    next_sequence = 0
+    submitted = 0
+    chunks = iter(chunks)
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(logging.getLogger().getEffectiveLevel(), profile)) as executor:
+        while True:
+            while len(pending) + len(ready) < max_in_flight:
+                item = next(chunks, None)
+                if item is None:
+                    break
+                pending[executor.submit(extract_page_chunk, *item[1:])] = (submitted, item)
+                submitted += 1
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sequence, item = pending.pop(future)
+                try:
+                    ready[sequence] = (item, future.result(), None)
+                except Exception as e:
+                    ready[sequence] = (item, None, f"{type(e).__name__}: {e}")
+
+            while next_sequence in ready:
+                item, result, error = ready.pop(next_sequence)
+                if error is None:
+                    finish(item, *result, exporter)
+                else:
+                    fail(item, error)
+                next_sequence += 1
+
+
+def print_summary(file_stats: List[Dict[str, Any]], output_path: str, wall_seconds: float, jobs: int):
+    """Facturas por archivo y rendimiento del lote"""
+    print("\n📊 RESUMEN DEL LOTE DE FACTURAS")
+    print("=" * 80)
+    print(f"{'Archivo':<45} {'Págs':>6} {'Facturas':>9} {'Sin datos':>10}")
+    print("-" * 80)
+    for stats in file_stats:
+        name = os.path.basename(stats['pdf_path'])
+        if len(name) > 45:
+            name = name[:42] + '...'
+        if stats['error'] is not None:
+            print(f"{name:<45} ❌ {stats['error']}")
+            if stats['failed_pages'] and stats['invoices']:
+                failed = ', '.join(f"{first}-{last}" for first, last in stats['failed_pages'])
+                print(f"{'':<3}⚠️ Salida PARCIAL: {stats['invoices']} facturas de las demás páginas sí se "
+                      f"escribieron; faltan las págs. {failed}")
+            continue
+        print(f"{name:<45} {stats['pages']:>6} {stats['invoices']:>9} {stats['empty_pages']:>10}")
+    print("-" * 80)
+
+    total_pages = sum(s['pages'] for s in file_stats if s['error'] is None)
+    total_invoices = sum(s['invoices'] for s in file_stats)
+    errors = sum(s['error'] is not None for s in file_stats)
+    print(f"Archivos: {len(file_stats) - errors} correctos, {errors} con error, {jobs} procesos")
+    print(f"Total: {total_invoices} facturas de {total_pages} páginas en {wall_seconds:.2f} s → {output_path}")
+    if wall_seconds > 0:
+        print(f"⚡ {total_invoices / wall_seconds:.1f} facturas/s, {total_pages / wall_seconds:.1f} páginas/s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Extrae las facturas de varios PDFs en paralelo a un solo archivo")
+    parser.add_argument('entradas', nargs='+', metavar='ENTRADA',
+                        help="archivos PDF, patrones glob o carpetas")
+    parser.add_argument('-o', '--salida', default='Facturas_lote.xlsx',
+                        help="archivo de salida; sin --formato, el formato sale de su extensión "
+                             "(por defecto Facturas_lote.xlsx)")
+    parser.add_argument('-j', '--procesos', type=int, default=os.cpu_count() or 1,
+                        help="procesos del pool (por defecto, núcleos disponibles)")
+    parser.add_argument('-f', '--formato', choices=OUTPUT_FORMATS,
+                        help="formato de salida (por defecto, el de la extensión de --salida, o xlsx)")
+    parser.add_argument('--bloque', type=int, default=DEFAULT_CHUNK_PAGES,
+                        help=f"páginas por bloque de trabajo (por defecto {DEFAULT_CHUNK_PAGES})")
+    parser.add_argument('-r', '--recursivo', action='store_true',
+                        help="buscar PDFs también en las subcarpetas")
+    parser.add_argument('--perfil', action='store_true',
+                        help="mostrar al final los tiempos por etapa")
+    args = parser.parse_args(argv)
+
+    output_format = format_for_extension(args.salida)
+    if args.formato is None:
+        args.formato = output_format or 'xlsx'
+    elif output_format is not None and output_format != args.formato:
+        parser.error(f"--salida {args.salida} no corresponde al formato {args.formato}")
+
+    setup_logging(logging.WARNING)
+
+    pdf_paths = expand_inputs(args.entradas, recursive=args.recursivo)
+    if not pdf_paths:
+        print("⚠️  No se encontraron archivos PDF en las entradas indicadas")
+        return 1
+
+    output_path = str(Path(args.salida).with_suffix(output_extension(args.formato)))
+    jobs = max(1, args.procesos)
+    print(f"🧾 EXTRACTOR DE FACTURAS POR LOTES - {len(pdf_paths)} archivos, {jobs} procesos")
+    print("=" * 55)
+
+    instrumentation = Instrumentation() if args.perfil else None
+    start = time.perf_counter()
+    file_stats = run_invoice_batch(pdf_paths, output_path, fmt=args.formato, jobs=jobs,
+                                   chunk_pages=max(1, args.bloque), instrumentation=instrumentation)
+    wall_seconds = time.perf_counter() - start
+    print_summary(file_stats, output_path, wall_seconds, jobs)
+
+    if instrumentation is not None:
+        print()
+        print(instrumentation.report(wall_seconds).format())
+
+    return 1 if any(s['error'] is not None for s in file_stats) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Configuración de logging para los scripts del extractor.
+
+Los módulos solo crean su logger; quien ejecuta (CLI, GUI, lote) llama a
+setup_logging() una vez. Los registros se encolan con un QueueHandler y un
+QueueListener los escribe desde su propio hilo, así que el formateo final y
+la escritura a consola o archivo no ocurren en el hilo que extrae.
+
+El detalle por línea del parser usa el nivel TRACE (por debajo de DEBUG) y
+solo se emite con setup_logging(trace=True) o EXTRACTOR_PDF_TRACE=1.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Iterable, Optional
+
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def trace_requested() -> bool:
+    """True si EXTRACTOR_PDF_TRACE pide el detalle por línea"""
+    return os.environ.get('EXTRACTOR_PDF_TRACE', '').lower() in ('1', 'true', 'si', 'sí', 'yes')
+
+
+def setup_logging(level: int = logging.INFO, trace: bool = False,
+                  handlers: Optional[Iterable[logging.Handler]] = None) -> logging.handlers.QueueListener:
+    """
+    Envía el logging raíz a una cola atendida por un QueueListener
+
+    handlers: destinos finales (por defecto, consola con LOG_FORMAT). Llamarla
+    de nuevo reemplaza la configuración anterior. El listener se detiene al
+    salir del programa, vaciando la cola.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    if handlers is None:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [console]
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(TRACE if trace or trace_requested() else level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def setup_worker_logging(level: int = logging.WARNING):
+    """
+    Inicializador para procesos del pool: consola directa con el nivel dado
+
+    Con fork, el proceso hijo hereda el QueueHandler pero no el hilo que
+    atiende la cola, así que se reemplaza por un StreamHandler propio.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(console)
+    root.setLevel(level)
+
+
+def stop_logging():
+    """Detiene el listener escribiendo lo que quede en la cola"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
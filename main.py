@@ -1,110 +1,317 @@
 import fitz  # PyMuPDF
 import pandas as pd
 import re
+from bisect import bisect_left
 from pathlib import Path
 import sys
 
-def extract_text_from_pdf(pdf_path):
+from exporters import OUTPUT_FORMATS, get_exporter, output_extension
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+
+# Columnas del reporte de facturas, en orden
+INVOICE_COLUMNS = ['pagina', 'numero_factura', 'ruc', 'razon_social', 'direccion']
+
+def iter_pages_text(pdf_path, instrumentation=NULL_INSTRUMENTATION):
+    """Genera el texto de cada página del PDF a medida que se extrae"""
+    with instrumentation.span('pdf_open'):
+        doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(len(doc)):
+            with instrumentation.span('extract_text'):
+                page = doc.load_page(page_num)
+                text = page.get_text()
+            instrumentation.count('pages')
+            yield text
+    finally:
+        doc.close()
+
+def extract_text_from_pdf(pdf_path, instrumentation=NULL_INSTRUMENTATION):
     """Extrae texto de todas las páginas del PDF"""
-    doc = fitz.open(pdf_path)
-    pages_text = []
+    return list(iter_pages_text(pdf_path, instrumentation))
+
+# Anclas de una factura, ubicadas en una sola pasada sobre el texto de la
+# página en mayúsculas. Las que empiezan con espacio corresponden a los
+# lookahead "\s+..." de los patrones; el texto ya viene con los espacios colapsados
+_ANCHOR_KINDS = {
+    'FACTURA ELECTRÓNICA': 'factura',
+    'RUC RAZÓN SOCIAL': 'ruc_razon',
+    'DIRECCIÓN': 'direccion',
+    ' Nº GUÍA': 'guia',
+    ' FORMA PAGO': 'forma_pago',
+    ' SOLES': 'fin_calle',
+    ' DÓLARES': 'fin_calle',
+    ' BANCO DE LA': 'fin_calle',
+    'DPTO': 'piso',
+    'PISO': 'piso',
+}
+_STREET_PREFIXES = ['AV.', 'AVENIDA', 'JR.', 'JIRON', 'CALLE', 'CAL.', 'MZA.', 'PSJ.', 'URB.']
+_ANCHOR_KINDS.update((prefix, 'calle') for prefix in _STREET_PREFIXES)
+
+# Sin IGNORECASE ni grupos, re recorre la alternancia mucho más rápido; la
+# fecha (" AAAA-MM-DD") es la única ancla que no está en _ANCHOR_KINDS
+_ANCHOR_PATTERN = '|'.join([re.escape(anchor) for anchor in _ANCHOR_KINDS] + [r' \d{4}-\d{2}-\d{2}'])
+_ANCHOR_RE = re.compile(_ANCHOR_PATTERN)
+# Para textos cuyo upper() cambia de largo (ß -> SS), donde no sirve el atajo
+_ANCHOR_ANY_CASE_RE = re.compile(_ANCHOR_PATTERN, re.IGNORECASE)
+
+_INVOICE_NUMBER_RE = re.compile(r'\s*F(\d{3}-\d{8})', re.IGNORECASE)
+_RUC_AFTER_ANCHOR_RE = re.compile(r'\s+(\d{11})\s+')
+_RUC_NUMBER_RE = re.compile(r'\b(\d{11})\b')
+_DIGIT_RE = re.compile(r'\d')
+# Caracteres que no pueden estar en una dirección ni en una razón social sin ancla
+_ADDRESS_BREAK_RE = re.compile(r'[^A-ZÁÉÍÓÚÑÜ0-9\s\.\-/,#]', re.IGNORECASE)
+_NAME_BREAK_RE = re.compile(r'[^A-ZÁÉÍÓÚÑÜ\s\-\.&/0-9,]', re.IGNORECASE)
+_NAME_START_RE = re.compile(r'[A-ZÁÉÍÓÚÑÜ]', re.IGNORECASE)
+_ADDRESS_TAIL_RE = re.compile(r'\s*(FECHA\s+EMISIÓN|MONEDA|FORMA\s+PAGO).*')
+
+# Calles que cierran la razón social (junto con DPTO, PISO, un dígito o Nº GUÍA)
+_NAME_END_STREETS = {'JR.', 'CALLE', 'CAL.', 'MZA.', 'PSJ.', 'URB.'}
+# Calles que, precedidas de un espacio, cierran la razón social buscada tras el RUC
+_FALLBACK_END_STREETS = {'AV.', 'JR.', 'CALLE', 'CAL.', 'MZA.', 'PSJ.'}
+
+# RUC del banco emisor, que aparece en todas las facturas
+ISSUER_RUC = '20100030595'
+
+
+class _PageAnchors:
+    """Posiciones de las anclas de una página, en orden, tras un único finditer"""
     
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        text = page.get_text()
-        pages_text.append(text)
+    def __init__(self, text):
+        self.text = text
+        self.facturas = []  # fin de cada FACTURA ELECTRÓNICA
+        self.ruc_razon = []  # fin de cada RUC RAZÓN SOCIAL
+        self.direcciones = []  # fin de cada DIRECCIÓN
+        self.calles = []  # (inicio, fin) de cada prefijo de calle
+        self.name_ends = []  # dónde puede terminar la razón social
+        self.fallback_ends = []  # espacio antes de una calle (razón social tras el RUC)
+        self.address_ends = []  # espacio antes de Nº GUÍA o FORMA PAGO
+        self.street_ends = []  # espacio antes de fecha, moneda o BANCO DE LA
+        
+        upper = text.upper()
+        if len(upper) == len(text):
+            matches = _ANCHOR_RE.finditer(upper)
+        else:
+            matches = _ANCHOR_ANY_CASE_RE.finditer(text)
+        
+        for match in matches:
+            anchor = match.group().upper()
+            kind = _ANCHOR_KINDS.get(anchor, 'fin_calle')
+            start, end = match.span()
+            if kind == 'calle':
+                self.calles.append((start, end))
+                preceded_by_space = start > 0 and text[start - 1] == ' '
+                if anchor == 'AV.' and preceded_by_space:
+                    self.name_ends.append(start - 1)
+                elif anchor in _NAME_END_STREETS:
+                    self.name_ends.append(start)
+                if anchor in _FALLBACK_END_STREETS and preceded_by_space:
+                    self.fallback_ends.append(start - 1)
+            elif kind == 'fin_calle':
+                self.street_ends.append(start)
+            elif kind in ('guia', 'piso'):
+                self.name_ends.append(start)
+                if kind == 'guia':
+                    self.address_ends.append(start)
+            elif kind == 'forma_pago':
+                self.address_ends.append(start)
+            elif kind == 'factura':
+                self.facturas.append(end)
+            elif kind == 'ruc_razon':
+                self.ruc_razon.append(end)
+            else:
+                self.direcciones.append(end)
+        
+        # El final del texto también cierra una dirección ($ en los patrones)
+        self.address_ends.append(len(text))
+        self.street_ends.append(len(text))
+
+
+class _ForwardSearch:
+    """
+    Primera coincidencia de un patrón desde posiciones crecientes
+    
+    Recuerda la última búsqueda, así que recorrer todas las anclas de una
+    página revisa cada carácter a lo sumo una vez.
+    """
+    
+    def __init__(self, regex, text):
+        self.regex = regex
+        self.text = text
+        self._searched_to = 0  # sin coincidencias en [inicio de la consulta, _searched_to)
+        self._found = None  # coincidencia en _searched_to, si la hubo
     
-    doc.close()
-    return pages_text
+    def first(self, pos, limit):
+        """Posición de la primera coincidencia en [pos, limit), o limit si no hay"""
+        if pos > self._searched_to or (pos == self._searched_to and self._found is None):
+            self._searched_to, self._found = pos, None
+        if self._found is None and self._searched_to < limit:
+            match = self.regex.search(self.text, self._searched_to, limit)
+            if match:
+                self._searched_to, self._found = match.start(), match.start()
+            else:
+                self._searched_to = limit
+        if self._found is not None and self._found < limit:
+            return self._found
+        return limit
+
+
+def _first_at_or_after(positions, pos):
+    """Primera posición >= pos de una lista ordenada, o None"""
+    index = bisect_left(positions, pos)
+    return positions[index] if index < len(positions) else None
+
+
+def _scan_invoice_number(anchors):
+    for end in anchors.facturas:
+        match = _INVOICE_NUMBER_RE.match(anchors.text, end)
+        if match:
+            return match.group(1)
+    return 'Sin número'
+
+
+def _scan_ruc_razon(anchors):
+    """RUC y razón social que siguen a 'RUC RAZÓN SOCIAL', o None"""
+    text = anchors.text
+    digits = _ForwardSearch(_DIGIT_RE, text)
+    for end in anchors.ruc_razon:
+        match = _RUC_AFTER_ANCHOR_RE.match(text, end)
+        if not match:
+            continue
+        name_start = match.end()
+        # La razón social termina en la primera ancla o el primer dígito
+        stop = _first_at_or_after(anchors.name_ends, name_start + 1)
+        digit = digits.first(name_start, len(text) if stop is None else stop)
+        if digit == name_start:
+            continue
+        if digit < len(text) and (stop is None or digit < stop):
+            stop = digit
+        if stop is None:
+            continue
+        return match.group(1), text[name_start:stop]
+    return None
+
+
+def _scan_fallback_ruc(text):
+    """Primer RUC de 11 dígitos que no sea repetitivo ni el del banco emisor"""
+    for match in _RUC_NUMBER_RE.finditer(text):
+        ruc = match.group(1)
+        if len(set(ruc)) > 4 and ruc != ISSUER_RUC:
+            return ruc
+    return ''
+
+
+def _scan_fallback_name(anchors, start):
+    """
+    Razón social después del RUC: desde la primera letra hasta el espacio que
+    precede a una calle, sin cruzar caracteres ajenos a un nombre
+    """
+    text = anchors.text
+    run_start = checked = scanned = start
+    index = bisect_left(anchors.fallback_ends, start + 2)
+    for stop in anchors.fallback_ends[index:]:
+        # El tramo válido que llega a stop empieza después del último corte
+        brk = _NAME_BREAK_RE.search(text, scanned, stop)
+        while brk:
+            run_start = brk.start() + 1
+            brk = _NAME_BREAK_RE.search(text, run_start, stop)
+        scanned = stop
+        letter = _NAME_START_RE.search(text, max(run_start, checked), stop - 1)
+        if letter:
+            return text[letter.start():stop]
+        checked = max(checked, stop - 1)
+    return None
+
+
+def _scan_address(anchors):
+    """
+    Dirección después de 'DIRECCIÓN' o, si no la hay, desde el primer
+    prefijo de calle hasta la fecha, la moneda o 'BANCO DE LA'
+    """
+    text = anchors.text
+    breaks = _ForwardSearch(_ADDRESS_BREAK_RE, text)
+    for end in anchors.direcciones:
+        if end >= len(text) or text[end] != ' ':
+            continue
+        start = end + 1
+        stop = _first_at_or_after(anchors.address_ends, start + 1)
+        if stop is not None and breaks.first(start, stop) == stop:
+            return text[start:stop]
+    
+    breaks = _ForwardSearch(_ADDRESS_BREAK_RE, text)
+    for start, end in anchors.calles:
+        stop = _first_at_or_after(anchors.street_ends, end + 1)
+        if stop is not None and breaks.first(end, stop) == stop:
+            return text[start:stop]
+    return None
+
 
 def extract_invoice_data_from_page(page_text):
-    """Extrae RUC, RAZÓN SOCIAL y DIRECCIÓN de una página individual"""
+    """Extrae RUC, RAZÓN SOCIAL y DIRECCIÓN de una página individual
+    
+    Las anclas (FACTURA ELECTRÓNICA, RUC RAZÓN SOCIAL, DIRECCIÓN, Nº GUÍA,
+    FORMA PAGO, prefijos de calle, fechas, moneda...) se ubican en una sola
+    pasada y cada campo se corta entre las posiciones de sus anclas, así
+    que el costo por página es lineal en el largo del texto.
+    """
     
     # Limpiar el texto para mejorar la extracción
     text = re.sub(r'\s+', ' ', page_text).strip()
+    anchors = _PageAnchors(text)
     
     data = {'ruc': '', 'razon_social': '', 'direccion': ''}
+    data['numero_factura'] = _scan_invoice_number(anchors)
     
-    # Buscar el número de factura
-    factura_match = re.search(r'FACTURA ELECTRÓNICA\s*F(\d{3}-\d{8})', text, re.IGNORECASE)
-    if factura_match:
-        data['numero_factura'] = factura_match.group(1)
-    else:
-        data['numero_factura'] = 'Sin número'
-    
-    # Patrón para RUC y RAZÓN SOCIAL (están en secuencia específica)
-    # Buscar la sección que contiene RUC RAZÓN SOCIAL seguido de número y nombre
-    ruc_razon_pattern = r'RUC\s+RAZÓN SOCIAL\s+(\d{11})\s+([^0-9]+?)(?=\s+AV\.|JR\.|CALLE|CAL\.|MZA\.|PSJ\.|URB\.|DPTO|PISO|\d|\s+Nº\s+GUÍA)'
+    # RUC y RAZÓN SOCIAL están en secuencia después de su encabezado
+    ruc_razon = _scan_ruc_razon(anchors)
+    if ruc_razon:
+        data['ruc'] = ruc_razon[0].strip()
+        data['razon_social'] = re.sub(r'\s+', ' ', ruc_razon[1]).strip()
     
-    match = re.search(ruc_razon_pattern, text, re.IGNORECASE | re.DOTALL)
-    if match:
-        data['ruc'] = match.group(1).strip()
-        razon_social = match.group(2).strip()
-        # Limpiar la razón social
-        razon_social = re.sub(r'\s+', ' ', razon_social).strip()
-        data['razon_social'] = razon_social
-    
-    # Si no encontramos con el patrón anterior, intentar otro método
+    # Si no, el primer RUC de 11 dígitos que no sea repetitivo ni el del banco emisor
     if not data['ruc']:
-        # Buscar RUC de 11 dígitos que no sea repetitivo
-        ruc_matches = re.findall(r'\b(\d{11})\b', text)
-        for ruc in ruc_matches:
-            # Verificar que no sea repetitivo (como 20100030595 que es del banco emisor)
-            if len(set(ruc)) > 4 and ruc != '20100030595':  # Filtrar el RUC del banco emisor
-                data['ruc'] = ruc
-                break
-    
-    # Buscar razón social si no la encontramos antes
+        data['ruc'] = _scan_fallback_ruc(text)
+    
+    # Buscar razón social después del RUC si no la encontramos antes
     if not data['razon_social'] and data['ruc']:
-        # Buscar texto después del RUC
         ruc_pos = text.find(data['ruc'])
         if ruc_pos != -1:
-            text_after_ruc = text[ruc_pos + 11:]  # Después del RUC
-            # Buscar la primera línea que parece ser un nombre de empresa
-            razon_match = re.search(r'([A-ZÁÉÍÓÚÑÜ][A-ZÁÉÍÓÚÑÜ\s\-\.&/0-9,]+?)(?=\s+(?:AV\.|JR\.|CALLE|CAL\.|MZA\.|PSJ\.))', text_after_ruc, re.IGNORECASE)
-            if razon_match:
-                razon_social = razon_match.group(1).strip()
-                # Limpiar caracteres extraños al final
+            razon_social = _scan_fallback_name(anchors, ruc_pos + 11)
+            if razon_social:
                 razon_social = re.sub(r'\s+', ' ', razon_social).strip()
                 if len(razon_social) > 5:
                     data['razon_social'] = razon_social
     
-    # Buscar DIRECCIÓN (incluyendo la parte inicial como AV., JR., etc.)
-    direccion_patterns = [
-        r'((?:AV\.|AVENIDA|JR\.|JIRON|CALLE|CAL\.|MZA\.|PSJ\.|URB\.)\s*[A-ZÁÉÍÓÚÑÜ0-9\s\.\-/,#]+?)(?=\s+\d{4}-\d{2}-\d{2}|\s+SOLES|\s+DÓLARES|\s+BANCO\s+DE\s+LA|$)',
-        r'DIRECCIÓN\s+((?:AV\.|AVENIDA|JR\.|JIRON|CALLE|CAL\.|MZA\.|PSJ\.|URB\.)\s*[A-ZÁÉÍÓÚÑÜ0-9\s\.\-/,#]+?)(?=\s+Nº\s+GUÍA|\s+FORMA\s+PAGO|$)',
-        r'DIRECCIÓN\s+([A-ZÁÉÍÓÚÑÜ0-9\s\.\-/,#]+?)(?=\s+Nº\s+GUÍA|\s+FORMA\s+PAGO|$)',
-    ]
-    
-    for pattern in direccion_patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            direccion = match.group(1).strip()
-            # Limpiar la dirección
-            direccion = re.sub(r'\s+', ' ', direccion).strip()
-            # Remover texto que no corresponde a dirección
-            direccion = re.sub(r'\s*(FECHA\s+EMISIÓN|MONEDA|FORMA\s+PAGO).*', '', direccion)
-            data['direccion'] = direccion
+    # DIRECCIÓN (incluyendo la parte inicial como AV., JR., etc.)
+    direccion = _scan_address(anchors)
+    if direccion is not None:
+        direccion = re.sub(r'\s+', ' ', direccion).strip()
+        # Remover texto que no corresponde a dirección
+        data['direccion'] = _ADDRESS_TAIL_RE.sub('', direccion)
 
     return data
 
-def process_pdf_invoices(pdf_path, output_excel="PRUEBA_BD.xlsx"):
-    """Procesa el PDF página por página y extrae datos de cada factura"""
-    
-    print(f"Procesando archivo: {pdf_path}")
+def process_pdf_invoices(pdf_path, output_excel="PRUEBA_BD.xlsx", formato="xlsx", instrumentation=None):
+    """Procesa el PDF página por página y extrae datos de cada factura
     
-    # Extraer texto de cada página
-    pages_text = extract_text_from_pdf(pdf_path)
+    formato: 'xlsx' (por defecto), 'csv', 'jsonl' o 'parquet'; la extensión
+    del archivo de salida se ajusta al formato elegido
+    instrumentation: Instrumentation opcional para medir tiempos por etapa
+    """
+    instrumentation = instrumentation or NULL_INSTRUMENTATION
     
-    print(f"Se encontraron {len(pages_text)} páginas en el PDF")
+    output_excel = str(Path(output_excel).with_suffix(output_extension(formato)))
+    print(f"Procesando archivo: {pdf_path}")
     
-    # Extraer datos de cada página
+    # Cada página se analiza en cuanto se extrae su texto
     extracted_data = []
+    pages = 0
     
-    for i, page_text in enumerate(pages_text):
+    for i, page_text in enumerate(iter_pages_text(pdf_path, instrumentation)):
+        pages += 1
         print(f"Procesando página {i + 1}...")
         
-        data = extract_invoice_data_from_page(page_text)
+        with instrumentation.span('parse_page'):
+            data = extract_invoice_data_from_page(page_text)
         
         # Solo agregar si encontramos al menos RUC o razón social
         if data.get('ruc') or data.get('razon_social'):
@@ -115,22 +322,34 @@ def process_pdf_invoices(pdf_path, output_excel="PRUEBA_BD.xlsx"):
         else:
             print(f"  ✗ No se pudieron extraer datos de la página {i + 1}")
     
+    print(f"Se procesaron {pages} páginas del PDF")
+    instrumentation.count('invoices', len(extracted_data))
+    
     # Crear DataFrame
     if extracted_data:
-        df = pd.DataFrame(extracted_data)
+        with instrumentation.span('build_dataframe'):
+            df = pd.DataFrame(extracted_data)
         
         # Reordenar columnas
-        columns_order = ['pagina', 'numero_factura', 'ruc', 'razon_social', 'direccion']
+        columns_order = INVOICE_COLUMNS
         for col in columns_order:
             if col not in df.columns:
                 df[col] = ''
         
         df = df[columns_order]
         
-        # Guardar en Excel
-        df.to_excel(output_excel, index=False, sheet_name='Facturas')
+        # Guardar en el formato elegido
+        with instrumentation.span(f'write_{formato}'):
+            if formato == 'xlsx':
+                df.to_excel(output_excel, index=False, sheet_name='Facturas')
+            else:
+                with get_exporter(formato, output_excel, columns_order, integer_columns=['pagina']) as exporter:
+                    for record in df.to_dict('records'):
+                        exporter.write_row(record)
+        instrumentation.count('rows_written', len(df))
+        instrumentation.count('bytes_written', Path(output_excel).stat().st_size)
         
-        print(f"\n✅ Archivo Excel creado: {output_excel}")
+        print(f"\n✅ Archivo {formato} creado: {output_excel}")
         print(f"📊 Total de registros extraídos: {len(df)}")
         print("\n📋 Vista previa de los primeros 5 registros:")
         pd.set_option('display.max_columns', None)
@@ -146,27 +365,43 @@ def process_pdf_invoices(pdf_path, output_excel="PRUEBA_BD.xlsx"):
 def main():
     """Función principal"""
     
+    # --perfil muestra al final los tiempos por etapa
+    perfil = '--perfil' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--perfil']
+    
     # Verificar si se proporcionó la ruta del PDF
-    if len(sys.argv) > 1:
-        pdf_path = sys.argv[1]
+    if len(args) > 0:
+        pdf_path = args[0]
     else:
         # Solicitar la ruta del archivo
         pdf_path = input("Ingresa la ruta completa del archivo PDF: ").strip().strip('"')
     
+    # Formato de salida opcional como segundo argumento
+    formato = args[1].lower() if len(args) > 1 else "xlsx"
+    if formato not in OUTPUT_FORMATS:
+        print(f"❌ Error: formato '{formato}' no soportado (opciones: {', '.join(OUTPUT_FORMATS)})")
+        return
+    output_path = str(Path("PRUEBA_BD.xlsx").with_suffix(output_extension(formato)))
+    
     # Verificar que el archivo existe
     if not Path(pdf_path).exists():
         print(f"❌ Error: El archivo {pdf_path} no existe")
         return
     
     # Procesar el PDF
+    instrumentation = Instrumentation() if perfil else None
     try:
-        result = process_pdf_invoices(pdf_path)
+        result = process_pdf_invoices(pdf_path, output_path, formato, instrumentation)
         if result is not None:
             print(f"\n🎉 Proceso completado exitosamente!")
-            print(f"📁 Archivo guardado como: PRUEBA_BD.xlsx")
+            print(f"📁 Archivo guardado como: {output_path}")
             print(f"📄 Se procesaron {len(result)} facturas de 28 páginas del PDF")
         else:
             print("\n⚠️  No se pudieron extraer datos. Verifica el formato del PDF.")
+        
+        if instrumentation is not None:
+            print()
+            print(instrumentation.report().format())
             
     except Exception as e:
         print(f"❌ Error durante el procesamiento: {str(e)}")
@@ -180,5 +415,7 @@ if __name__ == "__main__":
 # pip install PyMuPDF pandas openpyxl
 
 # INSTRUCCIONES DE USO:
-# python extractor_facturas.py "ruta/a/tu/archivo.pdf"
-# o simplemente ejecutar: python extractor_facturas.py
\ No newline at end of file
+# python extractor_facturas.py "ruta/a/tu/archivo.pdf" [xlsx|csv|jsonl|parquet] [--perfil]
+# o simplemente ejecutar: python extractor_facturas.py
+# Para muchos PDFs a la vez (en paralelo, un solo archivo de salida):
+# python invoice_batch.py carpeta/ -o facturas.csv -j 8
\ No newline at end of file
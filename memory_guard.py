@@ -0,0 +1,153 @@
+"""
+Memoria residente (RSS) del proceso y límite opcional durante la extracción.
+
+    guard = MemoryGuard(max_rss_mb=1024)
+    for page_index in range(total_pages):
+        ...
+        guard.check(release=liberar_caches)
+
+check() lee la RSS actual; si supera el límite llama a release(), recoge
+basura y vuelve a medir, y solo si sigue por encima lanza
+MemoryLimitExceeded. Así un documento enorme falla con un mensaje claro en
+lugar de llevar la máquina al swap. Sin límite, check() no hace nada.
+
+peak_rss_mb() es el pico de RSS del proceso según el sistema operativo (no
+se reinicia entre documentos de un mismo proceso).
+
+La RSS se lee de /proc en Linux, con task_info en macOS (o `ps` si falla) y
+con GetProcessMemoryInfo en Windows. Si el sistema no la expone, el límite no
+se puede aplicar y MemoryGuard lo avisa en el log al crearse.
+"""
+
+import gc
+import logging
+import os
+import subprocess
+import sys
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+# task_info(): flavor MACH_TASK_BASIC_INFO de <mach/task_info.h>
+_MACH_TASK_BASIC_INFO = 20
+
+
+class MemoryLimitExceeded(MemoryError):
+    """La RSS del proceso superó max_rss_mb aun después de liberar cachés"""
+
+
+def _windows_memory_counters():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters
+
+
+def _macos_resident_bytes() -> Optional[int]:
+    """RSS en bytes según task_info(mach_task_self(), MACH_TASK_BASIC_INFO)"""
+    import ctypes
+
+    class time_value_t(ctypes.Structure):
+        _fields_ = [('seconds', ctypes.c_int), ('microseconds', ctypes.c_int)]
+
+    class mach_task_basic_info(ctypes.Structure):
+        _pack_ = 4
+        _fields_ = [('virtual_size', ctypes.c_uint64), ('resident_size', ctypes.c_uint64),
+                    ('resident_size_max', ctypes.c_uint64), ('user_time', time_value_t),
+                    ('system_time', time_value_t), ('policy', ctypes.c_int), ('suspend_count', ctypes.c_int)]
+
+    try:
+        libsystem = ctypes.CDLL('/usr/lib/libSystem.B.dylib')
+        task = ctypes.c_uint.in_dll(libsystem, 'mach_task_self_')
+    except (OSError, ValueError):
+        return None
+    info = mach_task_basic_info()
+    # El tamaño se pasa en unidades de natural_t (32 bits)
+    count = ctypes.c_uint(ctypes.sizeof(info) // 4)
+    libsystem.task_info.argtypes = [ctypes.c_uint, ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint)]
+    if libsystem.task_info(task, _MACH_TASK_BASIC_INFO, ctypes.byref(info), ctypes.byref(count)) != 0:
+        return None
+    return info.resident_size
+
+
+def _ps_resident_bytes() -> Optional[int]:
+    """RSS en bytes según `ps -o rss=` (en KB), para cuando task_info no está disponible"""
+    try:
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(os.getpid())],
+                                capture_output=True, text=True, check=True).stdout
+        return int(output.strip()) * 1024
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS actual del proceso en MB, o None si el sistema no la expone"""
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize / _MB if counters else None
+    if sys.platform == 'darwin':
+        resident = _macos_resident_bytes()
+        if resident is None:
+            resident = _ps_resident_bytes()
+        return resident / _MB if resident is not None else None
+    try:
+        # Linux: segundo campo de statm, en páginas
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / _MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS del proceso en MB, o None si el sistema no lo expone"""
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize / _MB if counters else None
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return peak / _MB if sys.platform == 'darwin' else peak / 1024
+
+
+class MemoryGuard:
+    """Límite de RSS consultado entre páginas; con max_rss_mb=None no hace nada"""
+
+    def __init__(self, max_rss_mb: Optional[float] = None):
+        self.max_rss_mb = max_rss_mb
+        # Veces que hubo que liberar cachés para volver bajo el límite
+        self.releases = 0
+        if max_rss_mb is not None and current_rss_mb() is None:
+            logger.warning(f"No se puede medir la memoria del proceso en {sys.platform}: "
+                           f"el límite de {max_rss_mb:.0f} MB no se aplicará")
+
+    def check(self, release: Optional[Callable[[], None]] = None):
+        if self.max_rss_mb is None:
+            return
+        rss = current_rss_mb()
+        if rss is None or rss <= self.max_rss_mb:
+            return
+
+        self.releases += 1
+        if release is not None:
+            release()
+        gc.collect()
+        rss = current_rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            raise MemoryLimitExceeded(f"Memoria del proceso {rss:.0f} MB, por encima del límite de "
+                                      f"{self.max_rss_mb:.0f} MB")
@@ -0,0 +1,212 @@
+"""
+Caché en disco de resultados de extracción, direccionada por contenido.
+
+La clave es el SHA-256 de los bytes del PDF más la versión del parser (y el
+motor de texto), así que renombrar o copiar el PDF sigue acertando y cambiar
+el parser invalida las entradas viejas. Cada entrada es un archivo JSON Lines:
+la primera línea lleva la fecha del reporte y las siguientes una fila cada una,
+de modo que se escribe y se lee en streaming. Al superar el tamaño máximo se
+eliminan las entradas usadas hace más tiempo (LRU por fecha de modificación).
+
+PageCheckpointStore guarda además las filas de cada página apenas se
+parsean, con clave en el hash del contenido de la página y de sus recursos
+(fuentes con sus mapas ToUnicode, formularios): una extracción
+interrumpida retoma desde las páginas que faltan, y en un documento con
+cambios parciales solo se vuelven a parsear las páginas modificadas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CHECKPOINT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = '.jsonl'
+CHECKPOINT_SUFFIX = '.json'
+
+
+def default_cache_dir() -> str:
+    """Directorio de caché: EXTRACTOR_PDF_CACHE o ~/.cache/extractor_pdf"""
+    return os.environ.get('EXTRACTOR_PDF_CACHE') or str(Path.home() / '.cache' / 'extractor_pdf')
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 de los bytes de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def evict_lru(directory: str, suffix: str, max_bytes: int):
+    """Elimina los archivos usados hace más tiempo hasta quedar bajo max_bytes"""
+    entries = []
+    total = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffix) and entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            logger.debug(f"Entrada de caché eliminada: {path}")
+        except OSError:
+            continue
+
+
+def _touch(path: str):
+    """Marca un archivo como usado recientemente para el desalojo LRU"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class _EntryWriter:
+    """Escribe una entrada en un temporal y la publica solo al confirmar"""
+
+    def __init__(self, cache: 'ResultCache', key: str, report_date: Optional[str]):
+        self._cache = cache
+        self._key = key
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix='.tmp')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        self._file.write(json.dumps({'date': report_date}) + '\n')
+
+    def write_row(self, row: Dict[str, Any]):
+        self._file.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self._cache.entry_path(self._key))
+        self._cache.evict()
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class ResultCache:
+    """Caché de filas y fecha extraídas por documento, con desalojo LRU por tamaño"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = str(cache_dir or default_cache_dir())
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Hash de cada archivo ya leído en este proceso, por (ruta, mtime, tamaño)
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    def make_key(self, pdf_path: str, variant: str) -> str:
+        """Clave de la entrada: contenido del PDF + versión del parser/motor"""
+        stat = os.stat(pdf_path)
+        source = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        if source not in self._digests:
+            self._digests[source] = file_sha256(pdf_path)
+        return hashlib.sha256(f"{self._digests[source]}:{variant}".encode()).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get_date(self, key: str) -> Tuple[bool, Optional[str]]:
+        """(acierto, fecha) leyendo solo la cabecera de la entrada"""
+        try:
+            with open(self.entry_path(key), encoding='utf-8') as f:
+                return True, json.loads(f.readline())['date']
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+    def open_entry(self, key: str) -> Optional[Tuple[Optional[str], Iterator[Dict[str, Any]]]]:
+        """
+        (fecha, iterador de filas) de una entrada, o None si no está en caché
+        """
+        path = self.entry_path(key)
+        hit, report_date = self.get_date(key)
+        if not hit:
+            return None
+        _touch(path)
+
+        def rows():
+            with open(path, encoding='utf-8') as f:
+                f.readline()  # cabecera con la fecha
+                for line in f:
+                    yield json.loads(line)
+
+        return report_date, rows()
+
+    def writer(self, key: str, report_date: Optional[str]) -> _EntryWriter:
+        return _EntryWriter(self, key, report_date)
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo max_bytes"""
+        evict_lru(self.cache_dir, ENTRY_SUFFIX, self.max_bytes)
+
+
+class PageCheckpointStore:
+    """Filas parseadas por página, guardadas a medida que termina cada página"""
+
+    def __init__(self, checkpoint_dir: str, max_bytes: int = DEFAULT_CHECKPOINT_MAX_BYTES):
+        self.checkpoint_dir = str(checkpoint_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        # Se recorta al escribir mucho; además el extractor llama a evict() una
+        # vez al terminar cada documento, porque cada documento (y cada tramo
+        # de páginas de un proceso) crea su propio almacén
+        self._bytes_since_evict = 0
+
+    def make_key(self, page_content_hash: str, variant: str) -> str:
+        """Clave de la página: hash de su contenido + versión del parser/motor"""
+        return hashlib.sha256(f"{page_content_hash}:{variant}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.checkpoint_dir, key + CHECKPOINT_SUFFIX)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Filas guardadas de la página, o None si todavía no se procesó"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return None
+        _touch(path)
+        return rows
+
+    def put(self, key: str, rows: List[Dict[str, Any]]):
+        """Guarda las filas de una página (escritura atómica)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.checkpoint_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False, separators=(',', ':'))
+                size = f.tell()
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        # Revisar el tamaño cada tanto, no en cada página: cuando lo escrito
+        # desde la última revisión llega a una fracción del límite
+        self._bytes_since_evict += size
+        if self._bytes_since_evict >= self.max_bytes // 20:
+            self.evict()
+    
+    def evict(self):
+        """Elimina los checkpoints menos usados hasta quedar bajo max_bytes"""
+        self._bytes_since_evict = 0
+        evict_lru(self.checkpoint_dir, CHECKPOINT_SUFFIX, self.max_bytes)
@@ -0,0 +1,235 @@
+"""
+Generador de PDFs sintéticos de "BALANCE DE COMPROBACION DIARIO" para pruebas
+de rendimiento.
+
+Escribe el PDF directamente (sin dependencias): fuente Helvetica de 7 puntos,
+cabecera con la fecha en cada página y líneas de cuentas con el mismo trazado
+que el reporte del banco (código, nombre y montos alineados a la derecha en
+las cuatro columnas, separador de miles con espacio y sufijo CR). Se generan
+cuentas con 1, 2, 3 y 4 montos, saldos acreedores (CR) y cuentas sin nombre.
+Las páginas se escriben una a una, así que 10 000 páginas no ocupan memoria.
+
+Uso:
+    python synthetic_pdf.py salida.pdf [paginas] [semilla]
+"""
+
+import random
+import sys
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 7
+LINE_HEIGHT = 9.05
+FIRST_LINE_TOP = 102.6
+LINES_PER_PAGE = 64
+
+CODE_X = 33.4
+NAME_X = 96.6
+# Borde derecho de las columnas SALDO ANTERIOR, CARGOS, ABONOS y SALDO ACTUAL
+AMOUNT_RIGHT_X = [303.5, 384.6, 474.5, 560.0]
+
+# Anchos de Helvetica (milésimas del cuerpo) para alinear los montos a la derecha
+_HELVETICA_WIDTHS = {' ': 278, '.': 278, 'C': 722, 'R': 722}
+_DIGIT_WIDTH = 556
+
+_NAME_WORDS = [
+    'CAJA', 'BOVEDA', 'AGENCIAS', 'FONDOS', 'CUENTA', 'ORDINARIA', 'DEPOSITOS',
+    'AHORROS', 'CREDITOS', 'VIGENTES', 'VENCIDOS', 'PROVISIONES', 'INTERESES',
+    'COMISIONES', 'TRANSFERENCIAS', 'EFECTIVO', 'TRANSITO', 'SUCURSALES', 'LIMA',
+    'PROVINCIAS', 'MULTIRED', 'CAJEROS', 'FIDEICOMISO', 'MUNIC.PROV.', 'GOBIERNO',
+    'REGIONAL', 'TESORO', 'PUBLICO', 'OBLIGACIONES', 'CUENTAS', 'POR', 'COBRAR',
+    'PAGAR', 'DIVERSAS', 'OTROS', 'BCRP', '-', 'E.T', 'S.A.', 'Y', 'DE', 'EN',
+]
+
+# Proporción de cada tipo de línea: cantidad de montos -> peso
+AMOUNT_COUNT_WEIGHTS = {4: 45, 3: 15, 2: 35, 1: 5}
+CR_PROBABILITY = 0.15
+MISSING_NAME_PROBABILITY = 0.05
+
+
+def format_pdf_amount(cents: int) -> str:
+    """Céntimos con signo al formato del reporte: -1362400000 -> '13 624 000.00CR'"""
+    soles, centimos = divmod(abs(cents), 100)
+    text = f"{soles:,}".replace(',', ' ') + f".{centimos:02d}"
+    return text + 'CR' if cents < 0 else text
+
+
+def _text_width(text: str) -> float:
+    return sum(_HELVETICA_WIDTHS.get(ch, _DIGIT_WIDTH) for ch in text) * FONT_SIZE / 1000
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class _AccountGenerator:
+    """Códigos jerárquicos crecientes (4, 6, 8 y 10 dígitos) con montos consistentes"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.prefix = [1110, 0, 0, 0]
+        # La primera cuenta es siempre de nivel 0 (cuatro dígitos)
+        self.level = -1
+
+    def next_code(self) -> str:
+        rng = self.rng
+        # Bajar un nivel, quedarse o subir, como en el plan de cuentas
+        self.level = max(0, min(3, self.level + rng.choice([-1, 0, 1, 1])))
+        # Cada nivel agrega dos dígitos (01-99); si se agotan se sube de nivel
+        while self.level > 0 and self.prefix[self.level] + 4 > 99:
+            self.level -= 1
+        self.prefix[self.level] += rng.randint(1, 4) if self.level else 1
+        for deeper in range(self.level + 1, 4):
+            self.prefix[deeper] = 0
+        return str(self.prefix[0]) + ''.join(f"{part:02d}" for part in self.prefix[1:self.level + 1])
+
+    def next_line(self) -> Tuple[str, str, List[Optional[int]]]:
+        """(código, nombre, [saldo anterior, cargos, abonos, saldo actual]) con None en las columnas vacías"""
+        rng = self.rng
+        codigo = self.next_code()
+        nombre = '' if rng.random() < MISSING_NAME_PROBABILITY else ' '.join(
+            rng.choice(_NAME_WORDS) for _ in range(rng.randint(1, 4)))[:34]
+
+        count = rng.choices(list(AMOUNT_COUNT_WEIGHTS), weights=list(AMOUNT_COUNT_WEIGHTS.values()))[0]
+        sign = -1 if rng.random() < CR_PROBABILITY else 1
+        # Montos entre 1 000.00 y 10 000 000 000.00, como en el reporte real
+        saldo_anterior = sign * rng.randint(100000, 10 ** rng.randint(6, 12))
+        cargos = rng.randint(100000, 10 ** rng.randint(6, 11))
+        abonos = rng.randint(100000, 10 ** rng.randint(6, 11))
+
+        if count == 4:
+            columns = [saldo_anterior, cargos, abonos, saldo_anterior + cargos - abonos]
+        elif count == 3:
+            if rng.random() < 0.5:
+                columns = [saldo_anterior, cargos, None, saldo_anterior + cargos]
+            else:
+                columns = [saldo_anterior, None, abonos, saldo_anterior - abonos]
+        elif count == 2:
+            # Sin movimientos, o cuenta nueva con un solo movimiento
+            if rng.random() < 0.7:
+                columns = [saldo_anterior, None, None, saldo_anterior]
+            else:
+                columns = [None, cargos, None, cargos]
+        else:
+            columns = [None, None, None, saldo_anterior]
+        return codigo, nombre, columns
+
+
+def _page_content(page_num: int, report_date: str, lines: List[Tuple[str, str, List[Optional[int]]]]) -> bytes:
+    """Flujo de contenido de una página: cabecera y líneas de cuentas"""
+    ops = ['BT', f'/F1 {FONT_SIZE} Tf']
+
+    def show(x, top, text):
+        baseline = PAGE_HEIGHT - top - FONT_SIZE * 0.8
+        ops.append(f'1 0 0 1 {x:.1f} {baseline:.1f} Tm ({_escape(text)}) Tj')
+
+    show(42.6, 17.2, 'BANCO DE LA NACION')
+    show(414.6, 17.2, f'FECHA EMISION : {report_date} 10:18 AM')
+    show(442.5, 26.1, f'PAGINA : {page_num}')
+    show(42.6, 35.2, 'CGR 176')
+    show(146.0, 39.7, f'BALANCE DE COMPROBACION DIARIO EN MONEDA NACIONAL AL DIA {report_date}')
+    show(42.6, 48.6, 'Lima')
+    show(456.6, 53.2, '**PROCESO DIARIO**')
+    for x, header in zip([38.0, 132.6, 242.7, 344.0, 420.6, 488.0],
+                         ['CODIGO', 'NOMBRE', 'SALDO ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO ACTUAL']):
+        show(x, 75.7, header)
+
+    for line_num, (codigo, nombre, columns) in enumerate(lines):
+        top = FIRST_LINE_TOP + line_num * LINE_HEIGHT
+        show(CODE_X, top, codigo)
+        if nombre:
+            show(NAME_X, top, nombre)
+        for right_x, cents in zip(AMOUNT_RIGHT_X, columns):
+            if cents is None:
+                continue
+            text = format_pdf_amount(cents)
+            # El sufijo CR sobresale a la derecha de la columna, como en el reporte
+            digits = text[:-2] if text.endswith('CR') else text
+            show(right_x - _text_width(digits), top, text)
+
+    ops.append('ET')
+    return '\n'.join(ops).encode('latin-1')
+
+
+def write_balance_pdf(output_path: str, pages: int, report_date: str = '03/09/2025',
+                      seed: int = 0, lines_per_page: int = LINES_PER_PAGE,
+                      expected_rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Escribe un balance sintético de `pages` páginas y devuelve sus estadísticas
+
+    Mismo seed y mismos parámetros producen el mismo PDF byte a byte. Si se
+    pasa expected_rows, se le agregan las filas reales de cada línea (montos
+    en céntimos, 0 en las columnas vacías) para medir la exactitud del parser.
+    """
+    rng = random.Random(seed)
+    accounts = _AccountGenerator(rng)
+    stats = {'pages': pages, 'lines': 0, 'lines_by_amounts': {n: 0 for n in sorted(AMOUNT_COUNT_WEIGHTS)},
+             'cr_amounts': 0, 'missing_names': 0, 'report_date': report_date, 'seed': seed}
+
+    # Objetos: 1 catálogo, 2 árbol de páginas, 3 fuente, luego página y contenido por cada página
+    offsets: Dict[int, int] = {}
+    with open(output_path, 'wb') as f:
+        def write_object(number: int, body: bytes):
+            offsets[number] = f.tell()
+            f.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+
+        f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+        page_numbers = []
+        for page_index in range(pages):
+            lines = [accounts.next_line() for _ in range(lines_per_page)]
+            for codigo, nombre, columns in lines:
+                present = [c for c in columns if c is not None]
+                if expected_rows is not None:
+                    expected_rows.append({
+                        'CODIGO': codigo,
+                        'NOMBRE': nombre,
+                        'SALDO_ANTERIOR': columns[0] or 0,
+                        'CARGOS': columns[1] or 0,
+                        'ABONOS': columns[2] or 0,
+                        'SALDO_ACTUAL': columns[3] or 0,
+                        'MONTOS': len(present),
+                    })
+                stats['lines'] += 1
+                stats['lines_by_amounts'][len(present)] += 1
+                stats['cr_amounts'] += sum(1 for c in present if c < 0)
+                stats['missing_names'] += not nombre
+
+            page_obj = 4 + 2 * page_index
+            # Flujos comprimidos con Flate, como los del reporte del banco
+            content = zlib.compress(_page_content(page_index + 1, report_date, lines))
+            write_object(page_obj, (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                                    f'/Resources << /Font << /F1 3 0 R >> >> /Contents {page_obj + 1} 0 R >>').encode())
+            write_object(page_obj + 1, f'<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n'.encode() + content + b'\nendstream')
+            page_numbers.append(page_obj)
+
+        kids = ' '.join(f'{n} 0 R' for n in page_numbers)
+        write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {pages} >>'.encode())
+        write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        object_count = max(offsets) + 1
+        xref_offset = f.tell()
+        f.write(f'xref\n0 {object_count}\n0000000000 65535 f \n'.encode())
+        for number in range(1, object_count):
+            f.write(f'{offsets[number]:010d} 00000 n \n'.encode())
+        f.write(f'trailer\n<< /Size {object_count} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
+
+    return stats
+
+
+def main():
+    output_path = sys.argv[1] if len(sys.argv) > 1 else "sintetico.pdf"
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    stats = write_balance_pdf(output_path, pages, seed=seed)
+    print(f"📄 {output_path}: {stats['pages']} páginas, {stats['lines']} líneas de cuentas")
+    print(f"   Montos por línea: {stats['lines_by_amounts']}, {stats['cr_amounts']} montos CR, "
+          f"{stats['missing_names']} cuentas sin nombre")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,336 @@
-import pdfplumber
-import pandas as pd
 import re
 import traceback
 from typing import List, Dict, Any, Optional
+import itertools
 import logging
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
-# Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+from account_tree import AccountTree, RollupChecker
+from exporters import get_exporter, output_extension, report_date_iso
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from log_setup import TRACE, setup_logging, setup_worker_logging
+from memory_guard import MemoryGuard, peak_rss_mb
+from result_cache import PageCheckpointStore, ResultCache
+from text_backends import BACKENDS, LINE_TOLERANCE, fastest_backend, open_document
+
+# pandas, numpy y xlsxwriter se importan al usarlos (DataFrame, hoja Excel):
+# importar este módulo no los carga, así la ventana de app.py aparece antes
+# y la extracción en modo texto no los necesita. Ver warm_up_dependencies()
+if TYPE_CHECKING:
+    import pandas as pd
+
+# El logging lo configura quien ejecuta (ver log_setup.setup_logging)
 logger = logging.getLogger(__name__)
 
-class BalanceExtractorEnhanced:
+# Patrones del tokenizador de líneas, compilados una sola vez
+_CODE_RE = re.compile(r'\d+')
+_AMOUNT_RE = re.compile(r'\d{1,3}(?:\s\d{3})*\s\d{3}\.\d{2}(?:\s*CR)?')
+_LOOSE_AMOUNT_RE = re.compile(r'\d{1,3}(?:\s?\d{3})*\s?\d{3}\.\d{2}(?:\s*CR)?')
+_NAME_CLEAN_RE = re.compile(r'[^\w\s\-\.\(\)\/]')
+# Modo por columnas: último grupo de un monto ("850.04", "000.00CR") y grupos de miles
+_CENTS_TOKEN_RE = re.compile(r'(\d+)\.\d{2}(?:CR)?')
+_THOUSANDS_TOKEN_RE = re.compile(r'\d{1,3}')
+
+# Modos de extracción: 'text' parsea el texto plano de cada página con
+# expresiones regulares; 'words' ubica cada monto en su columna según la
+# posición de las palabras bajo la cabecera de la tabla
+LAYOUTS = ('text', 'words')
+# Fracción superior de la página donde se busca la cabecera de la tabla
+HEADER_BAND = 0.25
+
+# Fracción superior de la primera página donde está el título del reporte
+# ("BALANCE DE COMPROBACION ... AL DIA dd/mm/yyyy"), usada por probe_report_date
+TITLE_BAND = 0.25
+
+# Patrones del título del balance con la fecha del reporte, en orden de prioridad
+_TITLE_DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    # Patrón principal: "BALANCE DE COMPROBACION DIARIO EN MONEDA NACIONAL AL DIA DD/MM/YYYY"
+    r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
+    r'BALANCE\s+DE\s+COMPROBACION\s+.*?AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
+    r'BALANCE\s+DE\s+COMPROBACION\s+.*?AL\s+(\d{1,2})/(\d{1,2})/(\d{4})',
+    # Variaciones del patrón
+    r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
+    r'BALANCE.*?COMPROBACION.*?AL\s+(\d{1,2})/(\d{1,2})/(\d{4})',
+    # Patrones alternativos con formato de fecha con puntos o guiones
+    r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})\.(\d{1,2})\.(\d{4})',
+    r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})-(\d{1,2})-(\d{4})',
+    r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})\.(\d{1,2})\.(\d{4})',
+    r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})-(\d{1,2})-(\d{4})',
+)]
+
+# Versión del parser: incrementarla cuando un cambio altere las filas extraídas,
+# así se invalidan los resultados guardados en la caché
+PARSER_VERSION = "1"
+
+AMOUNT_COLUMNS = ['SALDO_ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO_ACTUAL']
+# Esquema común de los exportadores CSV / JSON Lines / Parquet
+BALANCE_EXPORT_COLUMNS = ['CODIGO', 'NOMBRE'] + AMOUNT_COLUMNS + ['FECHA_REPORTE']
+
+
+def amount_to_cents(amount: str) -> int:
+    """
+    Convierte un monto del PDF ("19 380 727 198.64" o "380 727 198.64 CR") a
+    céntimos enteros con signo; los montos CR (crédito) son negativos
+    """
+    cents = int(amount.replace('CR', '').replace(' ', '').replace('.', ''))
+    return -cents if 'CR' in amount else cents
+
+
+def format_cents(cents: int, cr_suffix: bool = True) -> str:
+    """
+    Formatea céntimos como "1,234.56"; los negativos como "1,234.56 CR"
+    (o "-1,234.56" con cr_suffix=False, para totales)
+    """
+    soles, centimos = divmod(abs(int(cents)), 100)
+    text = f"{soles:,}.{centimos:02d}"
+    if cents < 0:
+        return f"{text} CR" if cr_suffix else f"-{text}"
+    return text
+
+
+class _RunningAggregates:
+    """
+    Versión incremental de BalanceExtractorEnhanced._compute_aggregates para la
+    exportación en streaming: acumula fila a fila sin guardar las filas (la
+    jerarquía de cuentas se valida con RollupChecker, que solo guarda la rama
+    en curso)
+    """
+    
     def __init__(self):
+        self.total_cuentas = 0
+        self.totals = [0, 0, 0, 0]
+        self.errores_balance = 0
+        self.cuentas_en_cero = 0
+        self.cuentas_saldo_mayor_1m = 0
+        self.cuentas_con_movimientos = 0
+        self.duplicados = 0
+        self.rollup = RollupChecker()
+    
+    def add(self, codigo: str, saldo_anterior: int, cargos: int, abonos: int, saldo_actual: int):
+        self.total_cuentas += 1
+        self.rollup.add(codigo, (saldo_anterior, cargos, abonos, saldo_actual))
+        for i, value in enumerate((saldo_anterior, cargos, abonos, saldo_actual)):
+            self.totals[i] += value
+        if saldo_anterior + cargos - abonos != saldo_actual:
+            self.errores_balance += 1
+        if not (saldo_anterior or cargos or abonos or saldo_actual):
+            self.cuentas_en_cero += 1
+        if abs(saldo_actual) > 1000000 * 100:
+            self.cuentas_saldo_mayor_1m += 1
+        if cargos or abonos:
+            self.cuentas_con_movimientos += 1
+    
+    def result(self) -> Dict[str, Any]:
+        suma_sa, suma_cargos, suma_abonos, suma_sact = self.totals
+        descuadres = self.rollup.finish()
+        return {
+            'total_cuentas': self.total_cuentas,
+            'suma_saldo_anterior': suma_sa,
+            'suma_cargos': suma_cargos,
+            'suma_abonos': suma_abonos,
+            'suma_saldo_actual': suma_sact,
+            'diferencia': suma_sact - suma_sa,
+            'balance_ok': abs((suma_sa + suma_cargos - suma_abonos) - suma_sact) < 100,
+            'errores_balance': self.errores_balance,
+            'cuentas_en_cero': self.cuentas_en_cero,
+            'cuentas_saldo_mayor_1m': self.cuentas_saldo_mayor_1m,
+            'cuentas_con_movimientos': self.cuentas_con_movimientos,
+            'errores_jerarquia': len(descuadres),
+            'cuentas_jerarquia_descuadre': descuadres,
+        }
+
+def _match_title_date(clean_text: str) -> Optional[Tuple[str, int, 're.Match']]:
+    """
+    Busca la fecha del título en texto normalizado (mayúsculas, espacios
+    simples); devuelve (dd/mm/yyyy, índice del patrón, match) o None
+    """
+    for i, pattern in enumerate(_TITLE_DATE_PATTERNS):
+        match = pattern.search(clean_text)
+        if match is not None:
+            day, month, year = match.groups()
+            return f"{day.zfill(2)}/{month.zfill(2)}/{year}", i, match
+    return None
+
+
+def probe_report_date(pdf_path: str, backend: Optional[str] = None) -> Optional[str]:
+    """
+    Sondeo rápido de la fecha del reporte: solo mira las palabras de la franja
+    superior (TITLE_BAND) de la primera página, donde está el título
+    
+    A diferencia de extract_date no revisa otras páginas ni usa patrones
+    genéricos ni la fecha actual: si el título no está ahí devuelve None y la
+    fecha definitiva queda para la extracción completa.
+    
+    backend: motor de texto; por defecto el más rápido instalado. Con
+    pdfplumber el recorte no ahorra mucho (pdfminer interpreta la página
+    entera), pero sigue siendo una sola página.
+    """
+    with open_document(pdf_path, backend or fastest_backend()) as pdf:
+        if not pdf.page_count:
+            return None
+        width, height = pdf.page_size(0)
+        words = pdf.page_words(0, (0, 0, width, height * TITLE_BAND))
+    
+    lines = [' '.join(word[4] for word in line) for line in _group_word_lines(words)]
+    title_date = _match_title_date(' '.join(' '.join(lines).upper().split()))
+    return title_date[0] if title_date is not None else None
+
+
+def warm_up_dependencies():
+    """
+    Importa las dependencias pesadas (pandas, numpy, xlsxwriter, pdfplumber y
+    PyMuPDF si está instalado) para que el primer uso no pague la importación
+    
+    Pensada para un hilo en segundo plano una vez visible la ventana; importar
+    desde dos hilos a la vez es seguro (cada módulo tiene su propio lock).
+    """
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import pdfplumber  # noqa: F401
+    import xlsxwriter  # noqa: F401
+    if fastest_backend() == 'pymupdf':
+        import fitz  # noqa: F401  (PyMuPDF)
+
+
+def report_filename(report_date: Optional[str], fmt: str = 'xlsx') -> str:
+    """
+    Nombre de salida para una fecha dd/mm/yyyy, como get_output_filename
+    """
+    extractor = BalanceExtractorEnhanced()
+    extractor.extracted_date = report_date
+    return extractor.get_output_filename(fmt)
+
+
+class ExtractionCancelled(Exception):
+    """La extracción se detuvo entre páginas porque se activó cancel_event"""
+
+
+def _new_page_counters() -> Dict[str, int]:
+    return {'pages': 0, 'pages_from_checkpoint': 0, 'pages_without_text': 0,
+            'lines_scanned': 0, 'lines_accepted': 0}
+
+
+def _group_word_lines(words: Iterable[Tuple[float, float, float, float, str]]) -> List[list]:
+    """
+    Agrupa palabras (x0, x1, top, bottom, texto) en líneas por su posición
+    vertical, cada una ordenada de izquierda a derecha
+    """
+    lines = []
+    line_top = None
+    for word in sorted(words, key=lambda w: (w[2], w[0])):
+        if line_top is None or word[2] - line_top > LINE_TOLERANCE:
+            lines.append([])
+            line_top = word[2]
+        lines[-1].append(word)
+    for line in lines:
+        line.sort(key=lambda w: w[0])
+    return lines
+
+
+class BalanceExtractorEnhanced:
+    def __init__(self, backend: str = 'pdfplumber', cache_dir: Optional[str] = None,
+                 instrumentation: Optional[Instrumentation] = None, layout: str = 'text',
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None, max_rss_mb: Optional[float] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Motor de texto desconocido: {backend!r} (opciones: {', '.join(BACKENDS)})")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Modo de extracción desconocido: {layout!r} (opciones: {', '.join(LAYOUTS)})")
+        # Motor de texto: 'pdfplumber' (por defecto) o 'pymupdf'
+        self.backend = backend
+        # Modo de extracción: 'text' (por defecto) o 'words' (montos por columna)
+        self.layout = layout
+        # Caché de resultados en disco (desactivada si no se indica directorio)
+        # y, dentro de ella, los checkpoints por página para retomar extracciones
+        self.cache_dir = cache_dir
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.checkpoints = PageCheckpointStore(os.path.join(cache_dir, 'pages')) if cache_dir else None
+        # Tiempos por etapa y contadores (sin costo si no se pasa instrumentación)
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # Avance de la extracción: progress_callback(páginas_hechas, total_páginas),
+        # llamado desde el hilo que consume las filas (ver _report_progress)
+        self.progress_callback = progress_callback
+        # Cancelación: cualquier objeto con is_set() (threading.Event o el de un
+        # Manager de multiprocessing); se consulta entre páginas
+        self.cancel_event = cancel_event
+        # Límite de memoria residente (MB), consultado entre páginas; al
+        # superarlo se liberan cachés y, si no alcanza, MemoryLimitExceeded
+        self.memory_guard = MemoryGuard(max_rss_mb)
+        # Pico de RSS (MB) de la última extracción, incluidos los procesos del pool
+        self.peak_rss_mb: Optional[float] = None
         self.columns = ['CODIGO', 'NOMBRE', 'SALDO ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO ACTUAL']
         self.extracted_date = None
+        # Totales y validaciones de la última exportación (ver _compute_aggregates)
+        self.last_aggregates: Optional[Dict[str, Any]] = None
+        # Caché de texto por página del documento actual: cada página pasa por
+        # pdfminer una sola vez aunque la lean la detección de fecha y el parseo
+        self._page_text_cache: Dict[int, Optional[str]] = {}
+        self._page_text_source = None
+        # Contadores por página del último documento, en lugar de un log por línea
+        self.page_counters = _new_page_counters()
+        # Detalle por línea (nivel TRACE); se consulta una vez por página
+        self._trace = False
     
-    def _extract_date_from_pdf(self, pdf) -> str:
-        # Patrón específico para el título del balance
-        
-        title_date_patterns = [
-            # Patrón principal: "BALANCE DE COMPROBACION DIARIO EN MONEDA NACIONAL AL DIA DD/MM/YYYY"
-            r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'BALANCE\s+DE\s+COMPROBACION\s+.*?AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'BALANCE\s+DE\s+COMPROBACION\s+.*?AL\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            # Variaciones del patrón
-            r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'BALANCE.*?COMPROBACION.*?AL\s+(\d{1,2})/(\d{1,2})/(\d{4})',
-        ]
-        
-        
-        # Patrones alternativos con formato de fecha con puntos o guiones
-        alternative_patterns = [
-            r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})\.(\d{1,2})\.(\d{4})',
-            r'BALANCE\s+DE\s+COMPROBACION\s+DIARIO\s+EN\s+MONEDA\s+NACIONAL\s+AL\s+DIA\s+(\d{1,2})-(\d{1,2})-(\d{4})',
-            r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})\.(\d{1,2})\.(\d{4})',
-            r'BALANCE.*?COMPROBACION.*?AL\s+DIA\s+(\d{1,2})-(\d{1,2})-(\d{4})',
-        ]
+    def _bind_page_text_cache(self, pdf_path: str):
+        """
+        Asocia la caché de texto al PDF indicado, vaciándola si es otro documento
+        """
+        stat = os.stat(pdf_path)
+        source = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        if source != self._page_text_source:
+            self._page_text_cache = {}
+            self._page_text_source = source
+    
+    def _get_page_text(self, pdf, page_index: int) -> Optional[str]:
+        """
+        Devuelve el texto de una página, extrayéndolo solo la primera vez
+        """
+        if page_index not in self._page_text_cache:
+            with self.instrumentation.span('extract_text'):
+                self._page_text_cache[page_index] = pdf.page_text(page_index)
+        return self._page_text_cache[page_index]
+    
+    def _pop_page_text(self, pdf, page_index: int) -> Optional[str]:
+        """
+        Devuelve el texto de una página y lo saca de la caché (ya no se volverá a leer)
+        """
+        if page_index in self._page_text_cache:
+            return self._page_text_cache.pop(page_index)
+        with self.instrumentation.span('extract_text'):
+            return pdf.page_text(page_index)
+    
+    def extract_date(self, pdf_path: str) -> str:
+        """
+        Detecta la fecha del reporte dejando en caché el texto de las páginas leídas
         
-        # Combinar todos los patrones
-        all_patterns = title_date_patterns + alternative_patterns
+        Si el documento ya está en la caché de resultados, no se abre el PDF
+        """
+        if self.cache is not None:
+            hit, cached_date = self.cache.get_date(self._cache_key(pdf_path))
+            if hit:
+                self.extracted_date = cached_date
+                return self.extracted_date
         
+        self._bind_page_text_cache(pdf_path)
+        with self._open_document(pdf_path) as pdf:
+            with self.instrumentation.span('detect_date'):
+                self.extracted_date = self._extract_date_from_pdf(pdf)
+        return self.extracted_date
+    
+    def _open_document(self, pdf_path: str):
+        """
+        Abre el PDF con el motor configurado, midiendo la apertura
+        """
+        with self.instrumentation.span('pdf_open'):
+            return open_document(pdf_path, self.backend)
+    
+    def _extract_date_from_pdf(self, pdf) -> str:
         # Buscar en las primeras 3 páginas (principalmente la primera)
-        for page_num in range(min(3, len(pdf.pages))):
-            page = pdf.pages[page_num]
-            text = page.extract_text()
+        for page_num in range(min(3, pdf.page_count)):
+            text = self._get_page_text(pdf, page_num)
             
             if not text:
                 continue
@@ -54,26 +341,12 @@ class BalanceExtractorEnhanced:
             logger.debug(f"Texto limpio: {clean_text[:300]}...")
             
             # Buscar el patrón específico del título
-            for i, pattern in enumerate(all_patterns):
-                matches = re.finditer(pattern, clean_text, re.IGNORECASE)
-                
-                for match in matches:
-                    try:
-                        groups = match.groups()
-                        
-                        if len(groups) == 3:
-                            day = groups[0].zfill(2)
-                            month = groups[1].zfill(2)
-                            year = groups[2]
-                            formatted_date = f"{day}/{month}/{year}"
-                            
-                            logger.info(f"Fecha encontrada en el título (patrón {i+1}): {formatted_date}")
-                            logger.info(f"Texto completo del match: {match.group(0)}")
-                            return formatted_date
-                    
-                    except Exception as e:
-                        logger.debug(f"Error procesando match de fecha: {e}")
-                        continue
+            title_date = _match_title_date(clean_text)
+            if title_date is not None:
+                formatted_date, i, match = title_date
+                logger.info(f"Fecha encontrada en el título (patrón {i+1}): {formatted_date}")
+                logger.info(f"Texto completo del match: {match.group(0)}")
+                return formatted_date
         # Si no encuentra la fecha en el título principal, buscar patrones más genéricos pero priorizando fechas con formato DD/MM/YYYY
         logger.warning("No se encontró la fecha en el título principal, buscando patrones alternativos...")
         
@@ -84,9 +357,8 @@ class BalanceExtractorEnhanced:
             r'(\d{1,2})-(\d{1,2})-(\d{4})',
         ]
         
-        for page_num in range(min(3, len(pdf.pages))):
-            page = pdf.pages[page_num]
-            text = page.extract_text()
+        for page_num in range(min(3, pdf.page_count)):
+            text = self._get_page_text(pdf, page_num)
             
             if not text:
                 continue
@@ -137,41 +409,372 @@ class BalanceExtractorEnhanced:
         
         # Fallback si no hay fecha extraída
         return f"Balance_Comprobacion_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+    
+    def get_output_filename(self, fmt: str = 'xlsx') -> str:
+        """
+        Como get_excel_filename, con la extensión del formato de salida
+        """
+        return os.path.splitext(self.get_excel_filename())[0] + output_extension(fmt)
         
-    def extract_balance_data(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def extract_balance_data(self, pdf_path: str, workers: int = 1) -> List[Dict[str, Any]]:
         """
         Extrae datos del balance de comprobación desde un PDF
+
+        Con workers > 1 las páginas se reparten en rangos entre un pool de
+        procesos; cada proceso abre su propio PDF y las filas se unen en el
+        orden de las páginas, igual que en el modo secuencial.
+        """
+        return list(self.iter_balance_rows(pdf_path, workers=workers))
+    
+    def iter_balance_rows(self, pdf_path: str, workers: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Genera las filas del balance página por página, a medida que se extraen
+        
+        Permite escribir, validar o reenviar filas mientras continúa la extracción
+        sin acumular el documento completo en memoria. extracted_date queda
+        disponible antes de la primera fila.
+        
+        Con caché de resultados, un documento ya procesado (mismo contenido y
+        versión del parser) se devuelve sin abrir el PDF.
         """
-        all_data = []
+        if self.cache is None:
+            yield from self._iter_extracted_rows(pdf_path, workers)
+            return
+        
+        cache_key = self._cache_key(pdf_path)
+        cached = self.cache.open_entry(cache_key)
+        if cached is not None:
+            self.extracted_date, rows = cached
+            self.page_counters = _new_page_counters()
+            logger.info(f"Resultado recuperado de la caché para {pdf_path}")
+            yield from rows
+            return
         
+        # Las filas se guardan en la caché a medida que se generan; la entrada
+        # solo se publica si la extracción termina completa
+        entry = None
+        completed = False
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                logger.info(f"Procesando PDF con {len(pdf.pages)} páginas")
-                self.extracted_date = self._extract_date_from_pdf(pdf)
+            for row in self._iter_extracted_rows(pdf_path, workers):
+                if entry is None:
+                    entry = self.cache.writer(cache_key, self.extracted_date)
+                entry.write_row(row)
+                yield row
+            if entry is None:
+                entry = self.cache.writer(cache_key, self.extracted_date)
+            completed = True
+        finally:
+            if entry is not None:
+                if completed:
+                    entry.commit()
+                else:
+                    entry.discard()
+    
+    def _cache_key(self, pdf_path: str) -> str:
+        return self.cache.make_key(pdf_path, self._parser_variant())
+    
+    def _parser_variant(self) -> str:
+        """Versión del parser, motor y modo para las claves de caché y checkpoints"""
+        variant = f"{PARSER_VERSION}:{self.backend}"
+        return variant if self.layout == 'text' else f"{variant}:{self.layout}"
+    
+    def _iter_extracted_rows(self, pdf_path: str, workers: int) -> Iterator[Dict[str, Any]]:
+        """
+        Extrae las filas del PDF (sin caché de resultados)
+        """
+        total_rows = 0
+        self.page_counters = _new_page_counters()
+        
+        try:
+            self._bind_page_text_cache(pdf_path)
+            with self._open_document(pdf_path) as pdf:
+                total_pages = pdf.page_count
+                logger.info(f"Procesando PDF con {total_pages} páginas")
+                with self.instrumentation.span('detect_date'):
+                    self.extracted_date = self._extract_date_from_pdf(pdf)
                 logger.info(f"Fecha extraída del PDF: {self.extracted_date}")
+                self._report_progress(0, total_pages)
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    logger.info(f"Procesando página {page_num}")
-                    
-                    
-                    # Extraer texto de la página
-                    text = page.extract_text()
-                    if not text:
-                        logger.warning(f"No se pudo extraer texto de la página {page_num}")
-                        continue
-                    
-                    # Procesar los datos de esta página
-                    page_data = self._parse_page_data(text)
-                    all_data.extend(page_data)
-                    
-                    logger.info(f"Extraídas {len(page_data)} filas de la página {page_num}")
+                if workers <= 1 or total_pages < 2:
+                    for page_index in range(total_pages):
+                        self._check_cancelled()
+                        page_rows = self._page_rows(pdf, page_index)
+                        self.memory_guard.check(lambda: self._release_caches(pdf))
+                        total_rows += len(page_rows)
+                        self._report_progress(page_index + 1, total_pages)
+                        yield from page_rows
+            
+            self.peak_rss_mb = peak_rss_mb()
+            if workers > 1 and total_pages >= 2:
+                pages_done = 0
+                for range_pages, page_rows in self._iter_pages_parallel(pdf_path, total_pages, workers):
+                    total_rows += len(page_rows)
+                    pages_done += range_pages
+                    self._report_progress(pages_done, total_pages)
+                    yield from page_rows
                     
+        except ExtractionCancelled:
+            logger.info(f"Extracción cancelada tras {self.page_counters['pages']} páginas")
+            raise
         except Exception as e:
             logger.error(f"Error al procesar el PDF: {e}")
             raise
+        
+        # Una sola pasada de desalojo por documento, aquí y no en los procesos
+        if self.checkpoints is not None:
+            self.checkpoints.evict()
+        
+        counters = self.page_counters
+        for name, value in counters.items():
+            self.instrumentation.count(name, value)
+        logger.info(f"Total de filas extraídas: {total_rows} de {counters['pages']} páginas "
+                    f"({counters['lines_accepted']}/{counters['lines_scanned']} líneas aceptadas, "
+                    f"{counters['pages_from_checkpoint']} desde checkpoint, "
+                    f"{counters['pages_without_text']} sin texto)")
+        if self.peak_rss_mb is not None:
+            logger.info(f"Memoria máxima: {self.peak_rss_mb:.0f} MB")
+    
+    def _release_caches(self, pdf):
+        """Libera lo que se pueda volver a leer del PDF (ver MemoryGuard.check)"""
+        self._page_text_cache.clear()
+        pdf.release_caches()
+    
+    def _check_cancelled(self):
+        """Lanza ExtractionCancelled si se pidió cancelar"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExtractionCancelled()
+    
+    def _report_progress(self, pages_done: int, total_pages: int):
+        """Informa el avance al progress_callback, si hay uno"""
+        if self.progress_callback is not None:
+            self.progress_callback(pages_done, total_pages)
+    
+    def _page_rows(self, pdf, page_index: int) -> List[Dict[str, Any]]:
+        """
+        Filas de una página, usando el checkpoint de la página si ya se parseó
+        
+        Cada página se guarda en cuanto termina; la clave es el hash de su
+        contenido, así que una corrida interrumpida retoma desde las páginas que
+        faltan y en un documento modificado solo se reparsean las páginas cambiadas
+        """
+        page_num = page_index + 1
+        self.page_counters['pages'] += 1
+        checkpoint_key = None
+        if self.checkpoints is not None:
+            checkpoint_key = self.checkpoints.make_key(pdf.page_content_hash(page_index),
+                                                       self._parser_variant())
+            page_rows = self.checkpoints.get(checkpoint_key)
+            if page_rows is not None:
+                self.page_counters['pages_from_checkpoint'] += 1
+                self._page_text_cache.pop(page_index, None)
+                logger.debug(f"Página {page_num} recuperada del checkpoint ({len(page_rows)} filas)")
+                return page_rows
+        
+        if self.layout == 'words':
+            page_rows = self._collect_page_word_rows(pdf, page_index)
+        else:
+            # Extraer texto de la página (o reutilizar el de la detección de fecha)
+            text = self._pop_page_text(pdf, page_index)
+            page_rows = self._collect_page_rows(page_num, text)
+        # Los objetos de layout de la página ya no se usan: la memoria queda
+        # acotada por página en lugar de crecer con el documento
+        pdf.release_page(page_index)
+        
+        if checkpoint_key is not None:
+            self.checkpoints.put(checkpoint_key, page_rows)
+        return page_rows
+    
+    def _collect_page_rows(self, page_num: int, text: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Parsea el texto de una página y registra el resultado en el log
+        """
+        if not text:
+            self.page_counters['pages_without_text'] += 1
+            logger.warning(f"No se pudo extraer texto de la página {page_num}")
+            return []
+        
+        # Procesar los datos de esta página
+        with self.instrumentation.span('parse_page'):
+            page_data = self._parse_page_data(text)
+        logger.debug(f"Página {page_num}: {len(page_data)} filas extraídas")
+        return page_data
+    
+    def _collect_page_word_rows(self, pdf, page_index: int) -> List[Dict[str, Any]]:
+        """
+        Modo 'words': filas de una página a partir de las palabras bajo la cabecera
+        
+        Si la página no tiene la cabecera de la tabla se parsea su texto plano
+        """
+        page_num = page_index + 1
+        table = self._find_table_columns(pdf, page_index)
+        if table is None:
+            logger.debug(f"Página {page_num}: sin cabecera de tabla, se parsea el texto")
+            return self._collect_page_rows(page_num, self._pop_page_text(pdf, page_index))
+        
+        # El texto leído al detectar la fecha ya no hace falta
+        self._page_text_cache.pop(page_index, None)
+        table_top, bounds = table
+        width, height = pdf.page_size(page_index)
+        with self.instrumentation.span('extract_words'):
+            words = pdf.page_words(page_index, (0, table_top, width, height))
+        if not words:
+            self.page_counters['pages_without_text'] += 1
+            logger.warning(f"No se pudo extraer texto de la página {page_num}")
+            return []
+        
+        with self.instrumentation.span('parse_page'):
+            page_data = self._parse_page_words(words, bounds)
+        logger.debug(f"Página {page_num}: {len(page_data)} filas extraídas")
+        return page_data
+    
+    def _find_table_columns(self, pdf, page_index: int) -> Optional[Tuple[float, List[float]]]:
+        """
+        Ubica la cabecera "CODIGO NOMBRE SALDO ANTERIOR CARGOS ABONOS SALDO ACTUAL"
+        en la franja superior de la página
+        
+        Devuelve (borde inferior de la cabecera, límites entre las columnas de
+        montos) o None si no la encuentra. Los montos van alineados a la
+        derecha, así que cada límite es el borde izquierdo del título de la
+        columna siguiente: CARGOS, ABONOS y SALDO ACTUAL.
+        """
+        width, height = pdf.page_size(page_index)
+        with self.instrumentation.span('find_header'):
+            band = pdf.page_words(page_index, (0, 0, width, height * HEADER_BAND))
+        
+        for line in _group_word_lines(band):
+            texts = [word[4] for word in line]
+            if not ('CODIGO' in texts and 'CARGOS' in texts and 'ABONOS' in texts and 'ACTUAL' in texts):
+                continue
+            actual = texts.index('ACTUAL')
+            saldo_actual = line[actual - 1] if texts[actual - 1] == 'SALDO' else line[actual]
+            bounds = [line[texts.index('CARGOS')][0], line[texts.index('ABONOS')][0], saldo_actual[0]]
+            return max(word[3] for word in line), bounds
+        return None
+    
+    def _parse_page_words(self, words: List[Tuple[float, float, float, float, str]],
+                          bounds: List[float]) -> List[Dict[str, Any]]:
+        """
+        Parsea las palabras de la tabla, agrupadas en líneas por su posición vertical
+        """
+        data_rows = []
+        lines = _group_word_lines(words)
+        self._trace = logger.isEnabledFor(TRACE)
+        
+        for line in lines:
+            parsed_row = self._parse_word_line(line, bounds)
+            if parsed_row:
+                data_rows.append(parsed_row)
+        
+        self.page_counters['lines_scanned'] += len(lines)
+        self.page_counters['lines_accepted'] += len(data_rows)
+        return data_rows
+    
+    def _parse_word_line(self, line: List[Tuple[float, float, float, float, str]],
+                         bounds: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Parsea una línea de palabras: código, nombre y cada monto en la columna
+        donde termina (su borde derecho), sin adivinar por la cantidad de montos
+        """
+        codigo = line[0][4]
+        if not codigo.isdecimal() or len(line) < 2:
+            return None
+        
+        amounts = [None, None, None, None]
+        # Los montos se leen de derecha a izquierda; line[1:end] queda sin asignar
+        end = len(line)
+        while end > 1:
+            start = end - 1
+            if line[start][4] == 'CR' and start > 1:
+                start -= 1
+            cents_match = _CENTS_TOKEN_RE.fullmatch(line[start][4])
+            if not cents_match:
+                break
             
-        logger.info(f"Total de filas extraídas: {len(all_data)}")
-        return all_data
+            # Grupos de miles a la izquierda, separados solo por un espacio
+            if len(cents_match.group(1)) <= 3:
+                max_gap = (line[start][3] - line[start][2]) * 0.5
+                while start > 1:
+                    previous = line[start - 1]
+                    if (not _THOUSANDS_TOKEN_RE.fullmatch(previous[4])
+                            or line[start][0] - previous[1] > max_gap):
+                        break
+                    start -= 1
+                    if len(previous[4]) < 3:
+                        break
+            
+            column = bisect_right(bounds, line[end - 1][1])
+            if amounts[column] is not None:
+                # Dos montos en la misma columna: la posición no alcanza, se
+                # recurre al parser de texto para esta línea
+                return self._parse_data_line_enhanced(' '.join(word[4] for word in line))
+            amounts[column] = amount_to_cents(' '.join(word[4] for word in line[start:end]))
+            end = start
+        
+        if all(amount is None for amount in amounts):
+            return None
+        
+        nombre = ' '.join(_NAME_CLEAN_RE.sub(' ', ' '.join(word[4] for word in line[1:end])).split())
+        if len(nombre) < 2:
+            nombre = self._default_name(codigo)
+        
+        saldo_anterior, cargos, abonos, saldo_actual = (amount or 0 for amount in amounts)
+        if self._trace:
+            logger.log(TRACE, f"Línea procesada: {codigo} - {nombre} - SA:{format_cents(saldo_anterior)} "
+                              f"C:{format_cents(cargos)} A:{format_cents(abonos)} SAct:{format_cents(saldo_actual)}")
+        return {
+            'CODIGO': codigo,
+            'NOMBRE': nombre,
+            'SALDO_ANTERIOR': saldo_anterior,
+            'CARGOS': cargos,
+            'ABONOS': abonos,
+            'SALDO_ACTUAL': saldo_actual
+        }
+    
+    def _iter_pages_parallel(self, pdf_path: str, total_pages: int,
+                             workers: int) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Reparte rangos de páginas entre un pool de procesos y entrega, en orden,
+        la cantidad de páginas y las filas de cada rango
+        """
+        workers = min(workers, total_pages)
+        # Varios rangos por proceso para equilibrar páginas más pesadas que otras
+        chunk_size = max(1, -(-total_pages // (workers * 4)))
+        page_ranges = [(start, min(start + chunk_size, total_pages))
+                       for start in range(0, total_pages, chunk_size)]
+        logger.info(f"Extracción paralela: {len(page_ranges)} rangos en {workers} procesos")
+        
+        # Los textos ya leídos al detectar la fecha viajan con su rango
+        cached_texts = [{i: self._page_text_cache.pop(i) for i in range(start, end)
+                         if i in self._page_text_cache}
+                        for start, end in page_ranges]
+        
+        # Los procesos escriben su propio log al mismo nivel que este
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker_logging,
+                                 initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+            # map conserva el orden de los rangos, y cada rango el de sus páginas
+            results = executor.map(_extract_page_range,
+                                   [pdf_path] * len(page_ranges),
+                                   [self.backend] * len(page_ranges),
+                                   [start for start, _ in page_ranges],
+                                   [end for _, end in page_ranges],
+                                   cached_texts,
+                                   [self.cache_dir] * len(page_ranges),
+                                   [self.instrumentation.enabled] * len(page_ranges),
+                                   [self.layout] * len(page_ranges),
+                                   [self.memory_guard.max_rss_mb] * len(page_ranges))
+            try:
+                for (start, end), result in zip(page_ranges, results):
+                    range_rows, range_counters, snapshot, range_peak_mb = result
+                    for name, value in range_counters.items():
+                        self.page_counters[name] += value
+                    self.instrumentation.merge(snapshot)
+                    if range_peak_mb is not None:
+                        self.peak_rss_mb = max(self.peak_rss_mb or 0.0, range_peak_mb)
+                    self._check_cancelled()
+                    yield end - start, range_rows
+            finally:
+                # Al cancelar (o si se deja de consumir) no se esperan los rangos pendientes
+                executor.shutdown(cancel_futures=True)
     
     def _parse_page_data(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -179,159 +782,108 @@ class BalanceExtractorEnhanced:
         """
         data_rows = []
         lines = text.split('\n')
+        self._trace = logger.isEnabledFor(TRACE)
         
-        # Buscar líneas que contienen datos de cuentas
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Verificar si la línea contiene datos de cuenta
-            if self._is_data_line(line):
-                parsed_row = self._parse_data_line_enhanced(line)
-                if parsed_row:
-                    data_rows.append(parsed_row)
+        # Buscar líneas que contienen datos de cuentas; el tokenizador descarta
+        # las que no lo son (cabeceras, "PAGINA :", totales) en el primer carácter
+        for line in lines:
+            parsed_row = self._parse_data_line_enhanced(line)
+            if parsed_row:
+                data_rows.append(parsed_row)
         
+        # Contadores por página, no por línea
+        self.page_counters['lines_scanned'] += len(lines)
+        self.page_counters['lines_accepted'] += len(data_rows)
         return data_rows
     
-    def _is_data_line(self, line: str) -> bool:
+    def _tokenize_line(self, line: str) -> Optional[Tuple[str, str, List[str]]]:
         """
-        Determina si una línea contiene datos de cuenta
-        Versión mejorada para detectar líneas sin nombre
+        Clasifica una línea y la separa en código, nombre y montos en una sola pasada
+        
+        Devuelve None si la línea no es una línea de datos de cuenta
         """
         # Limpiar la línea de espacios extras
         clean_line = ' '.join(line.split())
         
-        # La línea debe empezar con dígitos (código de cuenta)
-        if not re.match(r'^\d+', clean_line):
-            return False
+        # La línea debe empezar con dígitos (código de cuenta) y tener una longitud mínima
+        if not clean_line or not clean_line[0].isdecimal() or len(clean_line) <= 20:
+            return None
         
-        # Buscar patrones de números decimales (montos) incluyendo los que terminan en CR
-        decimal_numbers = re.findall(r'\d{1,3}(?:\s?\d{3})*\s?\d{3}\.\d{2}(?:\s*CR)?', clean_line)
+        # Montos como 19 380 727 198.64 o 380 727 198.64 CR
+        amount_matches = list(_AMOUNT_RE.finditer(clean_line))
+        
+        # Debe tener al menos 2 montos (mínimo saldo anterior y saldo actual). Solo
+        # si el patrón estricto encuentra menos se cuentan también montos sin
+        # separador de miles, que antes bastaban para aceptar la línea
+        if len(amount_matches) < 2 and len(_LOOSE_AMOUNT_RE.findall(clean_line)) < 2:
+            return None
+        
+        if not amount_matches:
+            if self._trace:
+                logger.log(TRACE, f"No se encontraron números válidos en: {clean_line}")
+            return None
         
-        # Para que sea una línea válida debe tener:
-        # 1. Al menos 2 números decimales (mínimo saldo anterior y saldo actual)
-        # 2. Longitud mínima razonable
-        if len(decimal_numbers) >= 2 and len(clean_line) > 20:
-            logger.debug(f"Línea válida detectada: {clean_line[:50]}...")
-            return True
+        codigo = _CODE_RE.match(clean_line).group(0)
         
-        return False
+        # El nombre es el texto entre el código y el primer monto
+        nombre = ""
+        first_number_pos = amount_matches[0].start()
+        if first_number_pos > len(codigo):
+            nombre_section = clean_line[len(codigo):first_number_pos].strip()
+            # Limpiar caracteres extraños y normalizar espacios
+            nombre = ' '.join(_NAME_CLEAN_RE.sub(' ', nombre_section).split())
+        
+        return codigo, nombre, [m.group(0) for m in amount_matches]
     
     def _parse_data_line_enhanced(self, line: str) -> Optional[Dict[str, Any]]:
         """
         Parsea una línea de datos de cuenta con manejo robusto de casos sin nombre
         """
         try:
-            # Limpiar la línea
-            clean_line = ' '.join(line.split())
-            logger.debug(f"Procesando línea: {clean_line}")
-            
-            # Extraer código de cuenta (primeros dígitos)
-            codigo_match = re.match(r'^(\d+)', clean_line)
-            if not codigo_match:
+            tokens = self._tokenize_line(line)
+            if tokens is None:
                 return None
             
-            codigo = codigo_match.group(1)
-            
-            # Encontrar todos los números con formato de montos
-            # Buscar patrones como: 19 380 727 198.64 o 380 727 198.64 CR
-            number_pattern = r'(\d{1,3}(?:\s\d{3})*\s\d{3}\.\d{2}(?:\s*CR)?)'
-            numbers = re.findall(number_pattern, clean_line)
-            
-            if not numbers:
-                logger.debug(f"No se encontraron números válidos en: {clean_line}")
-                return None
+            codigo, nombre, numbers = tokens
             
-            # Convertir números a formato string con comas para miles preservando CR
-            formatted_numbers = []
-            numeric_values = []  # Para cálculos de lógica
-            
-            for num in numbers:
-                # Verificar si tiene CR al final
-                has_cr = 'CR' in num
-                
-                # Limpiar espacios internos y CR para obtener valor numérico
-                clean_num = num.replace(' ', '').replace('CR', '')
-                try:
-                    numeric_val = float(clean_num)
-                    # Si tiene CR, es un valor negativo para cálculos
-                    if has_cr:
-                        numeric_values.append(-numeric_val)
-                    else:
-                        numeric_values.append(numeric_val)
-                    
-                    # Formatear como string con comas para miles, preservando CR
-                    formatted_str = f"{numeric_val:,.2f}"
-                    if has_cr:
-                        formatted_str += " CR"
-                    formatted_numbers.append(formatted_str)
-                except ValueError:
-                    logger.debug(f"Error al convertir número: {num}")
-                    continue
-            
-            logger.debug(f"Números formateados: {formatted_numbers}")
-            
-            # Extraer el nombre (texto entre código y primer número)
-            nombre = ""
-            if len(formatted_numbers) > 0:
-                # Buscar el primer número en la línea original
-                first_number_str = numbers[0]
-                first_number_pos = clean_line.find(first_number_str)
-                
-                if first_number_pos > len(codigo):
-                    # Extraer texto entre código y primer número
-                    nombre_section = clean_line[len(codigo):first_number_pos].strip()
-                    # Limpiar caracteres extraños
-                    nombre = re.sub(r'[^\w\s\-\.\(\)\/]', ' ', nombre_section).strip()
-                    nombre = ' '.join(nombre.split())  # Normalizar espacios
+            # Montos en céntimos enteros con signo (CR = negativo); el formato
+            # "1,234.56 CR" se genera recién al exportar
+            amounts = [amount_to_cents(num) for num in numbers]
             
             # Si no hay nombre, usar uno descriptivo basado en el código
             if not nombre or len(nombre) < 2:
-                if codigo.startswith('1'):
-                    nombre = f"-"
-                elif codigo.startswith('2'):
-                    nombre = f"PASIVO_{codigo}"
-                elif codigo.startswith('3'):
-                    nombre = f"PATRIMONIO_{codigo}"
-                elif codigo.startswith('4'):
-                    nombre = f"GASTO_{codigo}"
-                elif codigo.startswith('5'):
-                    nombre = f"INGRESO_{codigo}"
-                else:
-                    nombre = f"CUENTA_{codigo}"
+                nombre = self._default_name(codigo)
             
-            # Asignar valores según la cantidad de números encontrados (usando strings formateados)
-            saldo_anterior = "0.00"
-            cargos = "0.00"
-            abonos = "0.00"
-            saldo_actual = "0.00"
+            # Asignar valores según la cantidad de números encontrados
+            saldo_anterior = 0
+            cargos = 0
+            abonos = 0
+            saldo_actual = 0
             
-            if len(formatted_numbers) == 1:
+            if len(amounts) == 1:
                 # Solo saldo actual
-                saldo_actual = formatted_numbers[0]
-            elif len(formatted_numbers) == 2:
+                saldo_actual = amounts[0]
+            elif len(amounts) == 2:
                 # Saldo anterior y saldo actual (sin movimientos)
-                saldo_anterior = formatted_numbers[0]
-                saldo_actual = formatted_numbers[1]
-            elif len(formatted_numbers) == 3:
+                saldo_anterior = amounts[0]
+                saldo_actual = amounts[1]
+            elif len(amounts) == 3:
                 # Saldo anterior, un movimiento (cargo o abono), y saldo actual
-                saldo_anterior = formatted_numbers[0]
-                # Determinar si es cargo o abono por la diferencia (usando valores numéricos para la lógica)
-                movimiento_str = formatted_numbers[1]
-                saldo_actual = formatted_numbers[2]
+                saldo_anterior = amounts[0]
+                movimiento = amounts[1]
+                saldo_actual = amounts[2]
                 
                 # Si saldo_actual > saldo_anterior, probablemente es un cargo
-                if numeric_values[2] > numeric_values[0]:
-                    cargos = movimiento_str
+                if saldo_actual > saldo_anterior:
+                    cargos = movimiento
                 else:
-                    abonos = movimiento_str
-            elif len(formatted_numbers) >= 4:
+                    abonos = movimiento
+            elif len(amounts) >= 4:
                 # Formato completo: saldo anterior, cargos, abonos, saldo actual
-                saldo_anterior = formatted_numbers[0]
-                cargos = formatted_numbers[1]
-                abonos = formatted_numbers[2]
-                saldo_actual = formatted_numbers[3]
+                saldo_anterior = amounts[0]
+                cargos = amounts[1]
+                abonos = amounts[2]
+                saldo_actual = amounts[3]
             
             result = {
                 'CODIGO': codigo,
@@ -342,13 +894,32 @@ class BalanceExtractorEnhanced:
                 'SALDO_ACTUAL': saldo_actual
             }
             
-            logger.info(f"Línea procesada exitosamente: {codigo} - {nombre} - SA:{saldo_anterior} C:{cargos} A:{abonos} SAct:{saldo_actual}")
+            # Detalle por línea solo en modo trace: formatearlo en cada línea es caro
+            if self._trace:
+                logger.log(TRACE, f"Línea procesada: {codigo} - {nombre} - SA:{format_cents(saldo_anterior)} "
+                                  f"C:{format_cents(cargos)} A:{format_cents(abonos)} SAct:{format_cents(saldo_actual)}")
             return result
             
         except Exception as e:
             logger.error(f"Error procesando línea: {line[:50]}... - Error: {e}")
             return None
     
+    def _default_name(self, codigo: str) -> str:
+        """
+        Nombre descriptivo para una cuenta sin nombre, según su clase
+        """
+        if codigo.startswith('1'):
+            return "-"
+        elif codigo.startswith('2'):
+            return f"PASIVO_{codigo}"
+        elif codigo.startswith('3'):
+            return f"PATRIMONIO_{codigo}"
+        elif codigo.startswith('4'):
+            return f"GASTO_{codigo}"
+        elif codigo.startswith('5'):
+            return f"INGRESO_{codigo}"
+        return f"CUENTA_{codigo}"
+    
     def _extract_account_name(self, line: str, codigo: str, first_number: str) -> str:
         """
         Extrae el nombre de la cuenta entre el código y el primer número
@@ -385,6 +956,7 @@ class BalanceExtractorEnhanced:
             return ""
     
     def save_to_excel(self, data: List[Dict[str, Any]], output_path: str):
+        import pandas as pd
         
         try:
             if not data:
@@ -392,15 +964,22 @@ class BalanceExtractorEnhanced:
                 return
             
             # Crear DataFrame
-            df = pd.DataFrame(data)
+            with self.instrumentation.span('build_dataframe'):
+                df = pd.DataFrame(data)
             
             # Limpiar y validar datos
-            df = self._clean_and_validate_data(df)
+            with self.instrumentation.span('validate'):
+                df = self._clean_and_validate_data(df)
+            
+            # Los montos se guardan en céntimos; se formatean solo para exportar
+            df_export = df.copy()
+            for col in AMOUNT_COLUMNS:
+                df_export[col] = df[col].map(format_cents)
             
             # Guardar en Excel con formato
-            with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+            with self.instrumentation.span('write_xlsx'), pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
                 # Escribir los datos empezando desde la fila 2 (índice 1)
-                df.to_excel(writer, sheet_name='Balance_Comprobacion', index=False, startrow=1)
+                df_export.to_excel(writer, sheet_name='Balance_Comprobacion', index=False, startrow=1)
                 
                 # Obtener workbook y worksheet para formatear
                 workbook = writer.book
@@ -454,52 +1033,181 @@ class BalanceExtractorEnhanced:
                 worksheet.set_row(0, 25)  # Fila 1 (índice 0) con altura 25
                 
                 # Agregar hoja de resumen
-                self._add_summary_sheet(writer, df)
+                self._add_summary_sheet(writer, self.last_aggregates)
             
+            self._count_output(len(df_export), output_path)
             logger.info(f"Excel creado exitosamente: {output_path}")
             
             # Mostrar resumen en consola
             print("\n📊 RESUMEN DE EXTRACCIÓN")
             print("=" * 50)
-            print(f"Total de cuentas procesadas: {len(df)}")
-            
-            # Función para sumar strings con formato de montos
-            def sum_money_strings(series):
-                total = 0.0
-                for val in series:
-                    try:
-                        # Manejar valores con CR (crédito/negativo)
-                        if 'CR' in str(val):
-                            clean_val = str(val).replace(',', '').replace(' CR', '').replace('CR', '')
-                            total -= float(clean_val)
-                        else:
-                            total += float(str(val).replace(',', ''))
-                    except:
-                        continue
-                return total
-            
-            suma_sa = sum_money_strings(df['SALDO_ANTERIOR'])
-            suma_cargos = sum_money_strings(df['CARGOS'])
-            suma_abonos = sum_money_strings(df['ABONOS'])
-            suma_sact = sum_money_strings(df['SALDO_ACTUAL'])
-            
-            print(f"Suma saldos anteriores: {suma_sa:,.2f}")
-            print(f"Suma total cargos: {suma_cargos:,.2f}")
-            print(f"Suma total abonos: {suma_abonos:,.2f}")
-            print(f"Suma saldos actuales: {suma_sact:,.2f}")
+            aggregates = self.last_aggregates
+            print(f"Total de cuentas procesadas: {aggregates['total_cuentas']}")
+            print(f"Suma saldos anteriores: {format_cents(aggregates['suma_saldo_anterior'], cr_suffix=False)}")
+            print(f"Suma total cargos: {format_cents(aggregates['suma_cargos'], cr_suffix=False)}")
+            print(f"Suma total abonos: {format_cents(aggregates['suma_abonos'], cr_suffix=False)}")
+            print(f"Suma saldos actuales: {format_cents(aggregates['suma_saldo_actual'], cr_suffix=False)}")
             print(f"\n📁 Archivo generado: {output_path}")
             
             # Mostrar muestra de datos
             print(f"\n📋 Muestra de datos extraídos:")
-            print(df.head(10).to_string(index=False, max_cols=6))
+            print(df_export.head(10).to_string(index=False, max_cols=6))
         except Exception as e:
             logger.error(f"Error al crear Excel: {e}")
             raise
     
-    def _clean_and_validate_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def save_to_excel_streaming(self, rows: Iterable[Dict[str, Any]], output_path: str) -> int:
+        """
+        Exporta filas a Excel a medida que llegan, con memoria constante
+        
+        Usa el modo constant_memory de xlsxwriter: cada fila se escribe al disco
+        en cuanto se recibe, así que rows puede ser iter_balance_rows(...). Las
+        filas quedan en el orden del PDF (los totales de grupo después de sus
+        cuentas) en lugar de ordenarse por código; los duplicados se descartan
+        manteniendo el primero, como en save_to_excel.
+        Devuelve la cantidad de filas escritas.
+        """
+        import xlsxwriter
+        
+        rows = iter(rows)
+        # La fecha se conoce al generar la primera fila, antes del título
+        first_row = next(rows, None)
+        if first_row is None:
+            logger.warning("No hay datos para guardar")
+            return 0
+        
+        workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+        try:
+            worksheet = workbook.add_worksheet('Balance_Comprobacion')
+            
+            header_format = workbook.add_format({
+                'bold': True,
+                'text_wrap': True,
+                'valign': 'top',
+                'fg_color': '#D7E4BC',
+                'border': 1,
+                'align': 'center'
+            })
+            money_format = workbook.add_format({
+                'num_format': '#,##0.00',
+                'align': 'right'
+            })
+            
+            # En constant_memory las columnas y filas se configuran antes de escribirlas
+            worksheet.set_column('A:A', 12)  # CODIGO
+            worksheet.set_column('B:B', 35)  # NOMBRE
+            worksheet.set_column('C:F', 15, money_format)  # Montos
+            worksheet.set_row(0, 25)
+            
+            if self.extracted_date:
+                date_format = workbook.add_format({
+                    'bold': True,
+                    'font_size': 14,
+                    'bg_color': '#E6F3FF',
+                    'border': 1,
+                    'align': 'center',
+                    'valign': 'vcenter'
+                })
+                worksheet.merge_range('A1:F1', f'BALANCE DE COMPROBACIÓN - FECHA: {self.extracted_date}', date_format)
+            
+            headers = ['CODIGO', 'NOMBRE'] + AMOUNT_COLUMNS
+            for col_num, header in enumerate(headers):
+                worksheet.write(1, col_num, header, header_format)
+            
+            running = _RunningAggregates()
+            row_num = 2
+            
+            for row in self._unique_rows(itertools.chain([first_row], rows), running):
+                amounts = [int(row.get(col) or 0) for col in AMOUNT_COLUMNS]
+                worksheet.write_string(row_num, 0, row['CODIGO'])
+                worksheet.write_string(row_num, 1, row.get('NOMBRE') or '')
+                for col_num, cents in enumerate(amounts, 2):
+                    worksheet.write_string(row_num, col_num, format_cents(cents))
+                row_num += 1
+            
+            self.last_aggregates = running.result()
+            
+            summary_sheet = workbook.add_worksheet('Resumen')
+            bold_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+            summary_sheet.write_row(0, 0, ['Concepto', 'Valor'], bold_format)
+            for summary_row, values in enumerate(self._summary_rows(self.last_aggregates), 1):
+                summary_sheet.write_row(summary_row, 0, values)
+        finally:
+            # Las filas ya se escribieron mientras llegaban; aquí se cierra el zip
+            with self.instrumentation.span('write_xlsx_close'):
+                workbook.close()
+        
+        self._count_output(self.last_aggregates['total_cuentas'], output_path)
+        if running.duplicados:
+            print(f"   ⚠️ {running.duplicados} códigos duplicados descartados - manteniendo el primero")
+        self._report_hierarchy(self.last_aggregates)
+        logger.info(f"Excel creado exitosamente (streaming): {output_path}")
+        return self.last_aggregates['total_cuentas']
+    
+    def _unique_rows(self, rows: Iterable[Dict[str, Any]], running: '_RunningAggregates') -> Iterator[Dict[str, Any]]:
+        """
+        Filtra filas sin código y códigos repetidos (se mantiene el primero),
+        acumulando los totales de las filas que pasan
+        """
+        seen_codes = set()
+        for row in rows:
+            codigo = row.get('CODIGO')
+            if not codigo:
+                continue
+            if codigo in seen_codes:
+                running.duplicados += 1
+                continue
+            seen_codes.add(codigo)
+            running.add(codigo, *(int(row.get(col) or 0) for col in AMOUNT_COLUMNS))
+            yield row
+    
+    def export_rows(self, rows: Iterable[Dict[str, Any]], output_path: str, fmt: str = 'xlsx') -> int:
+        """
+        Exporta las filas en el formato indicado: 'xlsx', 'csv', 'jsonl' o 'parquet'
+        
+        'xlsx' usa save_to_excel (con limpieza, orden y hoja Resumen); los demás
+        formatos escriben fila a fila con el esquema CODIGO, NOMBRE, montos y
+        FECHA_REPORTE (ISO). Devuelve la cantidad de filas exportadas.
+        """
+        if fmt == 'xlsx':
+            data = list(rows)
+            self.save_to_excel(data, output_path)
+            return self.last_aggregates['total_cuentas'] if data else 0
+        
+        rows = iter(rows)
+        # La fecha se conoce al generar la primera fila
+        first_row = next(rows, None)
+        if first_row is None:
+            logger.warning("No hay datos para guardar")
+            return 0
+        fecha = report_date_iso(self.extracted_date)
+        
+        running = _RunningAggregates()
+        with get_exporter(fmt, output_path, BALANCE_EXPORT_COLUMNS,
+                          money_columns=AMOUNT_COLUMNS, date_columns=['FECHA_REPORTE']) as exporter:
+            for row in self._unique_rows(itertools.chain([first_row], rows), running):
+                exporter.write_row({**row, 'FECHA_REPORTE': fecha})
+        
+        self.last_aggregates = running.result()
+        self._count_output(exporter.rows_written, output_path)
+        if running.duplicados:
+            print(f"   ⚠️ {running.duplicados} códigos duplicados descartados - manteniendo el primero")
+        self._report_hierarchy(self.last_aggregates)
+        logger.info(f"Archivo {fmt} creado exitosamente: {output_path}")
+        return exporter.rows_written
+    
+    def _count_output(self, rows_written: int, output_path: str):
+        """Registra filas y bytes escritos en la instrumentación"""
+        if self.instrumentation.enabled:
+            self.instrumentation.count('rows_written', rows_written)
+            self.instrumentation.count('bytes_written', os.path.getsize(output_path))
+    
+    def _clean_and_validate_data(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
         """
         Limpia y valida los datos extraídos con manejo robusto de datos faltantes
         """
+        import pandas as pd
+        
         print(f"\n🔧 Limpiando y validando {len(df)} registros...")
         
         # Remover filas con código vacío
@@ -517,46 +1225,13 @@ class BalanceExtractorEnhanced:
         if len(auto_names) > 0:
             print(f"   ⚠️ {len(auto_names)} cuentas sin nombre detectadas (usando placeholders)")
         
-        # Limpiar y validar columnas de montos como strings
-        numeric_cols = ['SALDO_ANTERIOR', 'CARGOS', 'ABONOS', 'SALDO_ACTUAL']
-        for col in numeric_cols:
-            # Asegurar que sean strings y limpiar valores problemáticos
-            df[col] = df[col].astype(str)
-            # Reemplazar 'nan', 'None', etc. con '0.00'
-            df[col] = df[col].replace(['nan', 'None', ''], '0.00')
-            # Validar formato de montos (incluyendo CR)
-            invalid_format = ~df[col].str.match(r'^\d{1,3}(,\d{3})*\.\d{2}(?:\s*CR)?$|^0\.00$')
-            if invalid_format.any():
-                print(f"   ⚠️ {invalid_format.sum()} valores con formato incorrecto en '{col}' corregidos a '0.00'")
-                df.loc[invalid_format, col] = '0.00'
-        
-        # Detectar cuentas con datos incompletos (todos los valores son "0.00")
-        zero_data = df[(df['SALDO_ANTERIOR'] == '0.00') & (df['CARGOS'] == '0.00') & 
-                      (df['ABONOS'] == '0.00') & (df['SALDO_ACTUAL'] == '0.00')]
-        if len(zero_data) > 0:
-            print(f"   ⚠️ {len(zero_data)} cuentas con todos los valores en 0 (posibles datos incompletos)")
-        
-        # Función auxiliar para convertir string con formato a float para validaciones
-        def string_to_float(val_str):
-            try:
-                # Manejar valores con CR (crédito/negativo)
-                if 'CR' in str(val_str):
-                    clean_val = str(val_str).replace(',', '').replace(' CR', '').replace('CR', '')
-                    return -float(clean_val)
-                else:
-                    return float(str(val_str).replace(',', ''))
-            except:
-                return 0.0
-        
-        # Detectar posibles errores de balance (convertir temporalmente para cálculo)
-        df_temp = df.copy()
-        for col in numeric_cols:
-            df_temp[col + '_num'] = df_temp[col].apply(string_to_float)
-        
-        balance_errors = df_temp[abs(df_temp['SALDO_ANTERIOR_num'] + df_temp['CARGOS_num'] - 
-                                   df_temp['ABONOS_num'] - df_temp['SALDO_ACTUAL_num']) > 0.01]
-        if len(balance_errors) > 0:
-            print(f"   ⚠️ {len(balance_errors)} cuentas con posibles errores de balance")
+        # Validar columnas de montos (céntimos enteros con signo)
+        for col in AMOUNT_COLUMNS:
+            numeric = pd.to_numeric(df[col], errors='coerce')
+            invalid = numeric.isna()
+            if invalid.any():
+                print(f"   ⚠️ {invalid.sum()} valores con formato incorrecto en '{col}' corregidos a 0")
+            df[col] = numeric.fillna(0).astype('int64')
         
         # Remover duplicados por código
         duplicates = df.duplicated(subset=['CODIGO'], keep=False)
@@ -567,103 +1242,116 @@ class BalanceExtractorEnhanced:
         # Ordenar por código
         df = df.sort_values('CODIGO').reset_index(drop=True)
         
+        # Totales, conteos y validaciones en una sola pasada; el resultado queda
+        # en self.last_aggregates para la consola, la hoja Resumen y la GUI
+        aggregates = self._compute_aggregates(df)
+        if aggregates['cuentas_en_cero'] > 0:
+            print(f"   ⚠️ {aggregates['cuentas_en_cero']} cuentas con todos los valores en 0 (posibles datos incompletos)")
+        if aggregates['errores_balance'] > 0:
+            print(f"   ⚠️ {aggregates['errores_balance']} cuentas con posibles errores de balance")
+        self._report_hierarchy(aggregates)
+        
         print(f"   ✅ Validación completada: {len(df)} registros válidos")
         return df
     
-    def _add_summary_sheet(self, writer: pd.ExcelWriter, df: pd.DataFrame):
+    def _compute_aggregates(self, df: 'pd.DataFrame') -> Dict[str, Any]:
         """
-        Agrega hoja de resumen con totales y validaciones
+        Calcula totales, conteos y validaciones del balance con operaciones por columnas
+        
+        Los montos están en céntimos, así que las comparaciones son exactas
         """
-        # Función auxiliar para sumar strings con formato de montos
-        def sum_money_strings(series):
-            total = 0.0
-            for val in series:
-                try:
-                    # Manejar valores con CR (crédito/negativo)
-                    if 'CR' in str(val):
-                        clean_val = str(val).replace(',', '').replace(' CR', '').replace('CR', '')
-                        total -= float(clean_val)
-                    else:
-                        total += float(str(val).replace(',', ''))
-                except:
-                    continue
-            return total
-        
-        # Calcular sumas
-        suma_sa = sum_money_strings(df['SALDO_ANTERIOR'])
-        suma_cargos = sum_money_strings(df['CARGOS'])
-        suma_abonos = sum_money_strings(df['ABONOS'])
-        suma_sact = sum_money_strings(df['SALDO_ACTUAL'])
-        
-        # Contar cuentas con saldo mayor a 1M
-        cuentas_1m = 0
-        for val in df['SALDO_ACTUAL']:
-            try:
-                # Manejar valores con CR
-                if 'CR' in str(val):
-                    clean_val = str(val).replace(',', '').replace(' CR', '').replace('CR', '')
-                    saldo_val = -float(clean_val)
-                else:
-                    saldo_val = float(str(val).replace(',', ''))
-                if abs(saldo_val) > 1000000:
-                    cuentas_1m += 1
-            except:
-                continue
+        import numpy as np
         
-        # Contar cuentas con movimientos
-        cuentas_movimientos = 0
-        for idx in df.index:
-            try:
-                # Manejar CR en cargos
-                cargos_str = str(df.loc[idx, 'CARGOS'])
-                if 'CR' in cargos_str:
-                    clean_val = cargos_str.replace(',', '').replace(' CR', '').replace('CR', '')
-                    cargos = -float(clean_val)
-                else:
-                    cargos = float(cargos_str.replace(',', ''))
-                
-                # Manejar CR en abonos
-                abonos_str = str(df.loc[idx, 'ABONOS'])
-                if 'CR' in abonos_str:
-                    clean_val = abonos_str.replace(',', '').replace(' CR', '').replace('CR', '')
-                    abonos = -float(clean_val)
-                else:
-                    abonos = float(abonos_str.replace(',', ''))
-                
-                if abs(cargos) > 0 or abs(abonos) > 0:
-                    cuentas_movimientos += 1
-            except:
-                continue
+        amounts = df[AMOUNT_COLUMNS].to_numpy(dtype=np.int64)
+        saldo_anterior, cargos, abonos, saldo_actual = amounts.T
+        totals = amounts.sum(axis=0)
+        suma_sa, suma_cargos, suma_abonos, suma_sact = (int(total) for total in totals)
+        # Cuentas padre cuyos cuatro montos no son la suma de sus subcuentas
+        # directas: casi siempre una línea mal leída en esa rama
+        codes = df['CODIGO'].tolist()
+        descuadres = AccountTree(codes).rollup_mismatches(codes, amounts)
         
-        # Crear datos de resumen
-        summary_data = {
-            'Concepto': [
-                'Total de Cuentas',
-                'Suma Saldos Anteriores',
-                'Suma Total Cargos',
-                'Suma Total Abonos',
-                'Suma Saldos Actuales',
-                'Diferencia (Actual - Anterior)',
-                'Validación Balance',
-                'Cuentas con Saldo Mayor a 1M',
-                'Cuentas con Movimientos'
-            ],
-            'Valor': [
-                len(df),
-                f"{suma_sa:,.2f}",
-                f"{suma_cargos:,.2f}",
-                f"{suma_abonos:,.2f}",
-                f"{suma_sact:,.2f}",
-                f"{suma_sact - suma_sa:,.2f}",
-                'OK' if abs((suma_sa + suma_cargos - suma_abonos) - suma_sact) < 1 else 'REVISAR',
-                cuentas_1m,
-                cuentas_movimientos
-            ]
+        aggregates = {
+            'total_cuentas': len(df),
+            'suma_saldo_anterior': suma_sa,
+            'suma_cargos': suma_cargos,
+            'suma_abonos': suma_abonos,
+            'suma_saldo_actual': suma_sact,
+            'diferencia': suma_sact - suma_sa,
+            # Tolerancia de 1 sol sobre los totales, como la validación original
+            'balance_ok': abs((suma_sa + suma_cargos - suma_abonos) - suma_sact) < 100,
+            'errores_balance': int((saldo_anterior + cargos - abonos != saldo_actual).sum()),
+            'cuentas_en_cero': int((~amounts.any(axis=1)).sum()),
+            'cuentas_saldo_mayor_1m': int((np.abs(saldo_actual) > 1000000 * 100).sum()),
+            'cuentas_con_movimientos': int(((cargos != 0) | (abonos != 0)).sum()),
+            'errores_jerarquia': len(descuadres),
+            'cuentas_jerarquia_descuadre': descuadres,
         }
+        self.last_aggregates = aggregates
+        return aggregates
+    
+    @staticmethod
+    def _report_hierarchy(aggregates: Dict[str, Any], limit: int = 5):
+        """Avisa de las cuentas padre que no cuadran con sus subcuentas directas"""
+        codes = aggregates['cuentas_jerarquia_descuadre']
+        if not codes:
+            return
+        sample = ', '.join(codes[:limit]) + (', ...' if len(codes) > limit else '')
+        print(f"   ⚠️ {len(codes)} cuentas padre no cuadran con la suma de sus subcuentas: {sample}")
+    
+    def _summary_rows(self, aggregates: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """
+        Filas (Concepto, Valor) de la hoja de resumen
+        """
+        return [
+            ('Total de Cuentas', aggregates['total_cuentas']),
+            ('Suma Saldos Anteriores', format_cents(aggregates['suma_saldo_anterior'], cr_suffix=False)),
+            ('Suma Total Cargos', format_cents(aggregates['suma_cargos'], cr_suffix=False)),
+            ('Suma Total Abonos', format_cents(aggregates['suma_abonos'], cr_suffix=False)),
+            ('Suma Saldos Actuales', format_cents(aggregates['suma_saldo_actual'], cr_suffix=False)),
+            ('Diferencia (Actual - Anterior)', format_cents(aggregates['diferencia'], cr_suffix=False)),
+            ('Validación Balance', 'OK' if aggregates['balance_ok'] else 'REVISAR'),
+            ('Cuentas Padre sin Cuadrar con Subcuentas', aggregates['errores_jerarquia']),
+            ('Cuentas con Saldo Mayor a 1M', aggregates['cuentas_saldo_mayor_1m']),
+            ('Cuentas con Movimientos', aggregates['cuentas_con_movimientos']),
+        ]
+    
+    def _add_summary_sheet(self, writer: 'pd.ExcelWriter', aggregates: Dict[str, Any]):
+        """
+        Agrega hoja de resumen con totales y validaciones
+        """
+        import pandas as pd
         
-        summary_df = pd.DataFrame(summary_data)
+        summary_df = pd.DataFrame(self._summary_rows(aggregates), columns=['Concepto', 'Valor'])
         summary_df.to_excel(writer, sheet_name='Resumen', index=False)
 
+def _extract_page_range(pdf_path: str, backend: str, start: int, end: int,
+                        page_texts: Optional[Dict[int, Optional[str]]] = None,
+                        cache_dir: Optional[str] = None,
+                        instrumented: bool = False,
+                        layout: str = 'text',
+                        max_rss_mb: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int],
+                                                                     Optional[Dict[str, Any]],
+                                                                     Optional[float]]:
+    """
+    Trabajo de un proceso del pool: abre su propio PDF y parsea las páginas [start, end)
+    
+    Devuelve las filas del rango, sus contadores por página, los tiempos
+    medidos en este proceso si se pidió instrumentación (para sumarlos en el
+    proceso principal) y el pico de memoria del proceso
+    """
+    instrumentation = Instrumentation() if instrumented else None
+    extractor = BalanceExtractorEnhanced(backend, cache_dir=cache_dir, instrumentation=instrumentation,
+                                         layout=layout, max_rss_mb=max_rss_mb)
+    extractor._page_text_cache = dict(page_texts or {})
+    range_rows = []
+    with extractor._open_document(pdf_path) as pdf:
+        for page_index in range(start, end):
+            range_rows.extend(extractor._page_rows(pdf, page_index))
+            extractor.memory_guard.check(lambda: extractor._release_caches(pdf))
+    return (range_rows, extractor.page_counters, instrumentation.snapshot() if instrumentation else None,
+            peak_rss_mb())
+
 def main():
     """
     Función principal mejorada
@@ -671,17 +1359,46 @@ def main():
     # Configuración
     PDF_PATH = "test.pdf"
     EXCEL_OUTPUT = "test_3.xlsx"
+    WORKERS = 1  # Procesos para la extracción (1 = secuencial)
+    BACKEND = "pdfplumber"  # Motor de texto: "pdfplumber" o "pymupdf"
+    LAYOUT = "text"  # Modo: "text" (regex sobre el texto) o "words" (montos por columna)
+    STREAMING = False  # Exportar a Excel mientras se extrae, con memoria constante
+    CACHE_DIR = None  # Directorio de la caché de resultados (None = sin caché)
+    OUTPUT_FORMAT = "xlsx"  # Formato de salida: "xlsx", "csv", "jsonl" o "parquet"
+    PERFIL = False  # Mostrar al final los tiempos por etapa y los contadores
+    MAX_MEMORIA_MB = None  # Detener la extracción si la memoria supera estos MB (None = sin límite)
+    TRACE_LINEAS = False  # Registrar cada línea parseada (solo para depurar el parser)
+    
+    setup_logging(trace=TRACE_LINEAS)
     
     print("🏦 EXTRACTOR MEJORADO - Banco de la Nación")
     print("=" * 55)
     
+    instrumentation = Instrumentation() if PERFIL else None
     try:
         # Crear extractor mejorado
-        extractor = BalanceExtractorEnhanced()
+        extractor = BalanceExtractorEnhanced(backend=BACKEND, cache_dir=CACHE_DIR,
+                                             instrumentation=instrumentation, layout=LAYOUT,
+                                             max_rss_mb=MAX_MEMORIA_MB)
         
         # Extraer datos
         print(f"📖 Procesando archivo: {PDF_PATH}")
-        data = extractor.extract_balance_data(PDF_PATH)
+        if OUTPUT_FORMAT != "xlsx":
+            output_path = os.path.splitext(EXCEL_OUTPUT)[0] + output_extension(OUTPUT_FORMAT)
+            rows_written = extractor.export_rows(
+                extractor.iter_balance_rows(PDF_PATH, workers=WORKERS), output_path, OUTPUT_FORMAT)
+            print(f"✅ {rows_written} registros exportados a {output_path}")
+            print("\n🎉 ¡PROCESO COMPLETADO EXITOSAMENTE!")
+            return
+        
+        if STREAMING:
+            rows_written = extractor.save_to_excel_streaming(
+                extractor.iter_balance_rows(PDF_PATH, workers=WORKERS), EXCEL_OUTPUT)
+            print(f"✅ {rows_written} registros exportados a {EXCEL_OUTPUT}")
+            print("\n🎉 ¡PROCESO COMPLETADO EXITOSAMENTE!")
+            return
+        
+        data = extractor.extract_balance_data(PDF_PATH, workers=WORKERS)
         
         if not data:
             print("⚠️  No se encontraron datos válidos en el PDF")
@@ -704,6 +1421,10 @@ def main():
         logger.error(f"Error en main: {e}")
         import traceback
         print(f"   🔧 Detalles técnicos: {traceback.format_exc()}")
+    finally:
+        if PERFIL:
+            print()
+            print(instrumentation.report().format())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Motores de extracción de texto para el extractor de balances.
+
+Cada motor abre un PDF y devuelve el texto de cada página como líneas
+separadas por saltos de línea, con las palabras de una misma línea unidas
+por un espacio, que es el formato que espera _parse_page_data.
+
+page_words() devuelve en cambio las palabras con su posición, opcionalmente
+solo las de un rectángulo de la página, para ubicar cada monto en su columna.
+Las coordenadas son en puntos con origen arriba a la izquierda en ambos motores.
+
+Cada motor importa su biblioteca al abrir el primer documento, así importar
+este módulo no carga pdfplumber/pdfminer (ni PIL) ni PyMuPDF.
+"""
+
+import hashlib
+import importlib.util
+import re
+from typing import List, Optional, Set, Tuple
+
+# Tolerancia vertical (en puntos) para considerar que dos palabras están en la
+# misma línea; es la misma que usa pdfplumber por defecto en extract_text
+LINE_TOLERANCE = 3
+
+# Palabra con posición: (x0, x1, top, bottom, texto)
+Word = Tuple[float, float, float, float, str]
+# Rectángulo (x0, top, x1, bottom)
+BBox = Tuple[float, float, float, float]
+
+# Referencia indirecta "12 0 R" dentro del código fuente de un objeto PDF
+_XREF_PATTERN = re.compile(rb'(\d+) \d+ R')
+
+
+def _hash_pdfminer_object(obj, digest, seen: Set[int]):
+    """
+    Agrega al hash un objeto de pdfminer resolviendo sus referencias: fuentes,
+    mapas ToUnicode, codificaciones y formularios (XObject) con su contenido.
+    Las imágenes se omiten porque no aportan texto.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    
+    if isinstance(obj, PDFObjRef):
+        digest.update(b'R')
+        if obj.objid in seen:
+            digest.update(str(obj.objid).encode())
+            return
+        seen.add(obj.objid)
+        obj = obj.resolve()
+    if isinstance(obj, PDFStream):
+        if getattr(obj.get('Subtype'), 'name', None) == 'Image':
+            digest.update(b'image')
+            return
+        _hash_pdfminer_object(obj.attrs, digest, seen)
+        digest.update(obj.get_rawdata() or obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b'<<')
+        for key in sorted(obj):
+            digest.update(str(key).encode() + b' ')
+            _hash_pdfminer_object(obj[key], digest, seen)
+        digest.update(b'>>')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _hash_pdfminer_object(item, digest, seen)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode() + b' ')
+
+
+def _hash_pymupdf_source(doc, source: bytes, digest, seen: Set[int]):
+    """Agrega al hash el código de un objeto y, recursivamente, los objetos que referencia"""
+    digest.update(source)
+    for match in _XREF_PATTERN.finditer(source):
+        xref = int(match.group(1))
+        if xref in seen:
+            continue
+        seen.add(xref)
+        if doc.xref_get_key(xref, 'Subtype') == ('name', '/Image'):
+            continue
+        _hash_pymupdf_source(doc, doc.xref_object(xref, compressed=True).encode(), digest, seen)
+        if doc.xref_is_stream(xref):
+            digest.update(doc.xref_stream_raw(xref) or b'')
+
+
+class PdfplumberDocument:
+    """Documento abierto con pdfplumber (pdfminer)"""
+
+    name = 'pdfplumber'
+
+    def __init__(self, pdf_path: str):
+        import pdfplumber
+        self._pdf = pdfplumber.open(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages)
+
+    def page_text(self, page_index: int) -> Optional[str]:
+        return self._pdf.pages[page_index].extract_text()
+
+    def page_size(self, page_index: int) -> Tuple[float, float]:
+        page = self._pdf.pages[page_index]
+        return float(page.width), float(page.height)
+
+    def page_words(self, page_index: int, bbox: Optional[BBox] = None) -> List[Word]:
+        page = self._pdf.pages[page_index]
+        if bbox is not None:
+            # Solo los caracteres que caen enteros dentro del rectángulo
+            page = page.within_bbox(bbox)
+        return [(w['x0'], w['x1'], w['top'], w['bottom'], w['text']) for w in page.extract_words()]
+
+    def page_content_hash(self, page_index: int) -> str:
+        """
+        SHA-256 de los flujos de contenido de la página y de sus recursos
+        (fuentes con ToUnicode, formularios), sin hacer el layout
+        """
+        from pdfminer.pdftypes import resolve1
+        page_obj = self._pdf.pages[page_index].page_obj
+        digest = hashlib.sha256()
+        for stream in page_obj.contents:
+            digest.update(resolve1(stream).get_data())
+        # Los recursos ya vienen heredados del árbol de páginas
+        _hash_pdfminer_object(page_obj.resources, digest, set())
+        return digest.hexdigest()
+
+    def release_page(self, page_index: int):
+        """
+        Libera los objetos de layout (chars, líneas, rectángulos) que pdfplumber
+        guarda en la página; sin esto la memoria crece con cada página leída
+        """
+        self._pdf.pages[page_index].close()
+
+    def release_caches(self):
+        """Libera las cachés de todas las páginas y los objetos ya resueltos por pdfminer"""
+        for page in self._pdf.pages:
+            page.close()
+        cached_objs = getattr(self._pdf.doc, '_cached_objs', None)
+        if cached_objs is not None:
+            cached_objs.clear()
+
+    def close(self):
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+class PyMuPDFDocument:
+    """Documento abierto con PyMuPDF (fitz), bastante más rápido por página"""
+
+    name = 'pymupdf'
+
+    def __init__(self, pdf_path: str):
+        try:
+            import fitz  # PyMuPDF
+        except ImportError as e:
+            raise ImportError("El motor 'pymupdf' requiere PyMuPDF: pip install PyMuPDF") from e
+        self._doc = fitz.open(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._doc)
+
+    def page_text(self, page_index: int) -> Optional[str]:
+        # get_text() agrupa por bloques y no por renglón visual, así que se
+        # reconstruyen las líneas a partir de las palabras y sus coordenadas
+        words = self._doc.load_page(page_index).get_text("words")
+        if not words:
+            return None
+
+        lines: List[List[tuple]] = []
+        line_top = None
+        for word in sorted(words, key=lambda w: (w[1], w[0])):
+            if line_top is None or word[1] - line_top > LINE_TOLERANCE:
+                lines.append([])
+                line_top = word[1]
+            lines[-1].append(word)
+
+        return '\n'.join(
+            ' '.join(w[4] for w in sorted(line, key=lambda w: w[0]))
+            for line in lines
+        )
+
+    def page_content_hash(self, page_index: int) -> str:
+        """
+        SHA-256 de los flujos de contenido de la página y de sus recursos
+        (fuentes con ToUnicode, formularios), sin hacer el layout
+        """
+        page = self._doc.load_page(page_index)
+        digest = hashlib.sha256(page.read_contents())
+        # /Resources puede heredarse de un nodo padre del árbol de páginas
+        xref = page.xref
+        kind, value = self._doc.xref_get_key(xref, 'Resources')
+        while kind == 'null':
+            kind, parent = self._doc.xref_get_key(xref, 'Parent')
+            if kind != 'xref':
+                break
+            xref = int(parent.split()[0])
+            kind, value = self._doc.xref_get_key(xref, 'Resources')
+        _hash_pymupdf_source(self._doc, value.encode(), digest, set())
+        return digest.hexdigest()
+
+    def page_size(self, page_index: int) -> Tuple[float, float]:
+        rect = self._doc.load_page(page_index).rect
+        return rect.width, rect.height
+
+    def page_words(self, page_index: int, bbox: Optional[BBox] = None) -> List[Word]:
+        page = self._doc.load_page(page_index)
+        words = page.get_text("words", clip=bbox) if bbox is not None else page.get_text("words")
+        return [(w[0], w[2], w[1], w[3], w[4]) for w in words]
+
+    def release_page(self, page_index: int):
+        # Cada lectura carga la página de nuevo; no queda nada por página
+        pass
+
+    def release_caches(self):
+        """Vacía la caché de objetos de MuPDF (fuentes, imágenes, flujos decodificados)"""
+        import fitz
+        fitz.TOOLS.store_shrink(100)
+
+    def close(self):
+        self._doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+BACKENDS = {
+    PdfplumberDocument.name: PdfplumberDocument,
+    PyMuPDFDocument.name: PyMuPDFDocument,
+}
+
+
+def open_document(pdf_path: str, backend: str = 'pdfplumber'):
+    """
+    Abre un PDF con el motor de texto indicado ('pdfplumber' o 'pymupdf')
+    """
+    try:
+        document_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Motor de texto desconocido: {backend!r} "
+                         f"(opciones: {', '.join(BACKENDS)})") from None
+    return document_class(pdf_path)
+
+
+def fastest_backend() -> str:
+    """
+    'pymupdf' si PyMuPDF está instalado (bastante más rápido por página); si no, 'pdfplumber'
+    """
+    return PyMuPDFDocument.name if importlib.util.find_spec('fitz') is not None else PdfplumberDocument.name